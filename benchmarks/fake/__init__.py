@@ -0,0 +1,11 @@
+"""
+Stand-ins for Slurm and trame, with which the benchmarks run the extension on machines without either.
+
+- `bin/squeue`, `bin/sbatch` and `bin/sacctmgr` answer like their Slurm counterparts after `BENCH_SLURM_LATENCY`
+  seconds. `squeue` lists `BENCH_JOBS` running jobs and `sacctmgr` `BENCH_ACCOUNTS` accounts.
+- `trame_app.py` is a minimal trame app, that accepts the arguments of `TRAME_INSTANCE_ARGS`, answers the `/api`
+  requests of the manager, serves `/payload?size=<bytes>` and echoes websocket messages on `/ws`.
+- `configuration.py` contains `BenchConfiguration`, which launches ParaView Servers with the `SlurmMixin` and keeps
+  all of its files in `BENCH_DIR`. It is selected with `TRAME_MANAGER_CONFIGURATION=fake.configuration`, while the
+  `benchmarks` directory is on the `PYTHONPATH`.
+"""
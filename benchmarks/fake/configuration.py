@@ -0,0 +1,44 @@
+import getpass
+import os
+from pathlib import Path
+
+from jupyterlab_trame_manager.cmd import execute
+from jupyterlab_trame_manager.configuration import UserData, ParaViewInstance
+from jupyterlab_trame_manager.mixins.slurm import SlurmMixin
+
+
+_BENCH_DIR = Path(os.getenv("BENCH_DIR", "/tmp/trame-manager-bench"))
+
+
+class BenchConfiguration(SlurmMixin):
+    """
+    Runs the extension against the fake Slurm commands in `bin`. Servers are listed as running right away, so nothing
+    listens on their ports and they are not probed.
+    """
+    job_script_template = Path(__file__).parent / "job.jinja2"
+    temp_dir = _BENCH_DIR / "jobs"
+    cache_dir = _BENCH_DIR / "cache"
+    trame_state_file = _BENCH_DIR / "trame-manager.sqlite"
+
+    paraview_probe = False
+
+    # The fake trame app starts within a second, slower instances are considered hung
+    trame_launch_timeout = 10
+
+    def get_connection_address(self, server: ParaViewInstance) -> str:
+        return server.root_node or ""
+
+    async def get_user_data(self) -> UserData:
+        result = await execute(
+            "sacctmgr", "show", "association", "format=Account,Partition", "--parsable2", "--noheader",
+            timeout=self.slurm_timeout,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"sacctmgr exited with {result.returncode}: {result.stderr.strip()}")
+
+        associations = [line.split("|") for line in result.stdout.splitlines()]
+        return UserData(
+            user=getpass.getuser(),
+            accounts=sorted({account for account, _ in associations}),
+            partitions=sorted({partition for _, partition in associations}),
+        )
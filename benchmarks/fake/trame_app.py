@@ -0,0 +1,68 @@
+"""
+A minimal trame app, which starts as fast as tornado allows. Launch it with the arguments of `TRAME_INSTANCE_ARGS`:
+
+    python benchmarks/fake/trame_app.py $TRAME_INSTANCE_ARGS
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from tornado import web, websocket
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets, bind_unix_socket
+
+
+class _Api(web.RequestHandler):
+    # Accepts the connect, disconnect and claim messages of the manager
+    def post(self):
+        message = json.loads(self.request.body)
+        self.write({"action": message.get("action"), "ok": True})
+
+
+class _Payload(web.RequestHandler):
+    # Blocks of the requested size are cached, so the proxy is measured and not the app
+    _payloads: dict[int, bytes] = {}
+
+    def get(self):
+        size = int(self.get_query_argument("size", "1024"))
+        payload = self._payloads.get(size)
+        if payload is None:
+            payload = self._payloads[size] = os.urandom(size)
+        self.set_header("Content-Type", "application/octet-stream")
+        self.write(payload)
+
+
+class _Index(web.RequestHandler):
+    def get(self, path: str):
+        self.write("trame")
+
+
+class _Echo(websocket.WebSocketHandler):
+    def on_message(self, message):
+        self.write_message(message, binary=isinstance(message, bytes))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--unix-socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    args, _ = parser.parse_known_args()  # e.g., --server, --data and --authKeyFile
+
+    server = HTTPServer(web.Application([
+        (r"/api", _Api),
+        (r"/payload", _Payload),
+        (r"/ws", _Echo),
+        (r"/(.*)", _Index),
+    ]), max_body_size=2**30)
+    if args.unix_socket:
+        server.add_socket(bind_unix_socket(args.unix_socket))
+    else:
+        server.add_sockets(bind_sockets(args.port, args.host))
+
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,369 @@
+"""
+Measure the handlers of the extension end to end, in a Jupyter Server running in this process.
+
+Slurm and trame are replaced by the stand-ins of the `fake` package: `squeue`, `sbatch` and `sacctmgr` answer after
+`--slurm-latency` seconds, `squeue` lists as many jobs as the current size, and trame instances are a minimal tornado
+app. For each size, the benchmark measures the latency and throughput of listing ParaView Servers (from the snapshot
+and with a query of `squeue` per request), listing trame instances and the user data. It then measures launching trame
+instances until they accept connections, submitting ParaView Servers, connecting trame to a server, and the throughput
+of HTTP requests and websocket messages through the proxy, compared to connecting to the instance directly:
+
+    python benchmarks/handlers.py --sizes 10 100 1000 --output handlers-0.6.1.json
+    python benchmarks/handlers.py --sizes 10 100 1000 --baseline handlers-0.6.1.json
+
+Results are printed as JSON and written to `--output`. With `--baseline`, medians and throughputs that changed by more
+than `--tolerance` compared to an earlier run are reported on stderr.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shlex
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from secrets import token_hex
+
+
+BENCHMARKS = Path(__file__).resolve().parent
+
+
+def _prepare_environment(directory: Path, args):
+    # The extension reads its environment at import time, so this must run before it is imported
+    os.environ.update({
+        "TRAME_MANAGER_CONFIGURATION": "fake.configuration",
+        "BENCH_DIR": str(directory),
+        "BENCH_SLURM_LATENCY": str(args.slurm_latency),
+        "BENCH_JOBS": str(args.sizes[0]),
+        "PATH": f"{BENCHMARKS / 'fake' / 'bin'}{os.pathsep}{os.environ['PATH']}",
+        "JUPYTER_PATH": str(directory / "jupyter"),
+        "JUPYTER_DATA_DIR": str(directory / "data"),
+        "JUPYTER_CONFIG_DIR": str(directory / "config"),
+        "JUPYTER_RUNTIME_DIR": str(directory / "runtime"),
+    })
+    sys.path.insert(0, str(BENCHMARKS))
+
+    # `bench` runs the fake trame app, the instances of `idle` never listen and only fill the list of instances
+    trame_app = f"{shlex.quote(sys.executable)} {shlex.quote(str(BENCHMARKS / 'fake' / 'trame_app.py'))}"
+    apps = {
+        "bench": f"exec {trame_app} $TRAME_INSTANCE_ARGS",
+        "idle": "exec sleep 86400",
+    }
+    for name, command in apps.items():
+        app_dir = directory / "jupyter" / "trame" / name
+        app_dir.mkdir(parents=True)
+        # JSON is valid YAML
+        (app_dir / "app.yml").write_text(json.dumps({
+            "name": name.capitalize(), "command": command, "working_directory": str(directory),
+        }))
+
+    (directory / "instances").mkdir()
+
+
+def _open_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _summary(latencies: list[float], duration: float) -> dict:
+    latencies.sort()
+    return {
+        "operations_per_second": len(latencies) / duration,
+        "median_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+async def _drive(request, requests: int, concurrency: int) -> dict:
+    """ Call the coroutine function `request` with the index of each request, from `concurrency` workers """
+    latencies = []
+    pending = iter(range(requests))
+
+    async def worker():
+        for index in pending:
+            start = time.perf_counter()
+            await request(index)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, time.perf_counter() - start)
+
+
+class Bench:
+    def __init__(self, args, directory: Path):
+        from tornado.simple_httpclient import SimpleAsyncHTTPClient
+
+        self.args = args
+        self.directory = directory
+        self.token = token_hex(16)
+        self.port = _open_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.headers = {"Authorization": f"token {self.token}"}
+        self.client = SimpleAsyncHTTPClient(force_instance=True, max_clients=args.concurrency)
+        self.server_app = None
+        self.model = None
+
+    async def start(self):
+        from jupyter_server.serverapp import ServerApp
+
+        self.server_app = ServerApp()
+        self.server_app.initialize(argv=[
+            f"--port={self.port}",
+            "--ip=127.0.0.1",
+            f"--IdentityProvider.token={self.token}",
+            f"--ServerApp.root_dir={self.directory}",
+            "--ServerApp.jpserver_extensions={'jupyterlab_trame_manager': True}",
+            "--ServerApp.open_browser=False",
+            "--ServerApp.log_level=WARN",
+            "--allow-root",
+        ])
+        self.server_app.start_app()
+
+        self.model = self.server_app.web_app.settings["trame_manager_model"]
+        await self.model.wait_ready()
+
+    async def stop(self):
+        self.client.close()
+        await self.server_app.cleanup_extensions()
+        self.server_app.http_server.stop()
+
+    async def fetch(self, path: str, method: str = "GET", body: dict | None = None) -> bytes:
+        response = await self.client.fetch(
+            f"{self.url}/trame-manager/{path}", method=method, headers=self.headers,
+            body=json.dumps(body) if body is not None else None, request_timeout=300,
+        )
+        return response.body
+
+    async def _launch(self, app_name: str, name: str) -> dict:
+        data_directory = str(self.directory / "instances")
+        return json.loads(await self.fetch("trame", "POST", {
+            "appName": app_name, "name": name, "dataDirectory": data_directory,
+        }))
+
+    async def _until_started(self, uuids: list[str]):
+        # Instances that never listen are failed after `trame_launch_timeout`
+        while any(self.model.get_trame(uuid).state == "starting" for uuid in uuids):
+            await asyncio.sleep(0.01)
+
+    async def _stop(self, uuids: list[str]):
+        await _drive(lambda index: self.fetch(f"trame/{uuids[index]}/stop", "POST", {}), len(uuids), 16)
+
+    async def lists(self) -> dict:
+        results = {}
+        idle = []
+        for size in self.args.sizes:
+            os.environ["BENCH_JOBS"] = str(size)
+            await self.model.get_running_servers(force=True)
+
+            # Fill the list up to the size, launching a few instances at once like a workshop would
+            names = [f"idle-{index}" for index in range(len(idle), size)]
+            instances = [None] * len(names)
+
+            async def launch(index: int):
+                instances[index] = await self._launch("idle", names[index])
+
+            await _drive(launch, len(names), 16)
+            idle += [instance["uuid"] for instance in instances]
+            await self._until_started(idle)
+
+            requests, concurrency = self.args.requests, self.args.concurrency
+            snapshot = await _drive(lambda _: self.fetch("paraview"), requests, concurrency)
+
+            # Every request finds an outdated snapshot, so concurrent requests share a query of squeue
+            self.model._configuration.server_snapshot_ttl = 0
+            try:
+                query = await _drive(lambda _: self.fetch("paraview"), max(requests // 10, concurrency), concurrency)
+            finally:
+                del self.model._configuration.server_snapshot_ttl
+
+            results[str(size)] = {
+                "paraview": snapshot,
+                "paraview_query": query,
+                "trame": await _drive(lambda _: self.fetch("trame"), requests, concurrency),
+            }
+
+        await self._stop(idle)
+        return results
+
+    async def user(self) -> dict:
+        start = time.perf_counter()
+        await self.fetch("user")
+        first = (time.perf_counter() - start) * 1000
+
+        cached = await _drive(lambda _: self.fetch("user"), self.args.requests, self.args.concurrency)
+        return {"first_ms": first, "cached": cached}
+
+    async def launch_trame(self) -> dict:
+        requests, ready, uuids = [], [], []
+        for index in range(self.args.launches):
+            start = time.perf_counter()
+            instance = await self._launch("bench", f"launch-{index}")
+            requests.append(time.perf_counter() - start)
+
+            await self._until_started([instance["uuid"]])
+            ready.append(time.perf_counter() - start)
+            uuids.append(instance["uuid"])
+
+            if self.model.get_trame(instance["uuid"]).state != "ready":
+                raise RuntimeError(f"The fake trame app did not start, see {instance['log']}")
+
+        await self._stop(uuids)
+        return {
+            "request": _summary(requests, sum(requests)),
+            "ready": _summary(ready, sum(ready)),
+        }
+
+    async def launch_paraview(self) -> dict:
+        body = {"name": "Bench", "account": "bench0", "partition": "batch", "nodes": 1, "timeLimit": "01:00:00"}
+        return {
+            "single": await _drive(lambda _: self.fetch("paraview", "POST", body), self.args.launches, 1),
+            "array": await _drive(
+                lambda _: self.fetch("paraview", "POST", {**body, "name": "Bench {index}", "count": 16}),
+                self.args.launches, 1,
+            ),
+        }
+
+    async def connect(self, uuid: str) -> dict:
+        servers = await self.model.get_running_servers()
+        return await _drive(
+            lambda index: self.fetch(f"trame/{uuid}/connect", "POST", {"jobId": servers[index % len(servers)].job_id}),
+            self.args.requests, 1,
+        )
+
+    async def proxy(self, uuid: str) -> dict:
+        from tornado import websocket
+        from tornado.httpclient import HTTPRequest
+
+        instance = self.model.get_trame(uuid)
+        urls = {
+            "proxy": f"127.0.0.1:{self.port}/trame/{uuid}",
+            "direct": f"127.0.0.1:{instance.port}",
+        }
+        payload = os.urandom(self.args.payload)
+
+        results = {}
+        for route, url in urls.items():
+            results[route] = {"http": await _drive(
+                lambda _: self.client.fetch(f"http://{url}/payload?size={self.args.payload}", headers=self.headers),
+                self.args.requests, self.args.concurrency,
+            )}
+
+            connection = await websocket.websocket_connect(HTTPRequest(f"ws://{url}/ws", headers=self.headers))
+
+            async def echo(_):
+                await connection.write_message(payload, binary=True)
+                await connection.read_message()
+
+            results[route]["websocket"] = await _drive(echo, self.args.requests, 1)
+            connection.close()
+
+        results["overhead"] = {
+            kind: results["direct"][kind]["operations_per_second"] / results["proxy"][kind]["operations_per_second"]
+            for kind in ("http", "websocket")
+        }
+        return results
+
+    async def run(self) -> dict:
+        results = {
+            "lists": await self.lists(),
+            "user": await self.user(),
+            "launch_trame": await self.launch_trame(),
+            "launch_paraview": await self.launch_paraview(),
+        }
+
+        instance = await self._launch("bench", "proxy")
+        await self._until_started([instance["uuid"]])
+        results["connect"] = await self.connect(instance["uuid"])
+        results["proxy"] = await self.proxy(instance["uuid"])
+        await self._stop([instance["uuid"]])
+
+        return results
+
+
+def _metrics(results: dict, prefix: str = ""):
+    """ Yield the medians and throughputs of the results by their path, e.g., `lists.100.trame.median_ms` """
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _metrics(value, path)
+        elif key in ("operations_per_second", "median_ms", "first_ms"):
+            yield path, value
+
+
+def _compare(results: dict, baseline: dict, tolerance: float) -> list[dict]:
+    """ @return: The metrics, which got worse or better than the tolerance compared to the baseline """
+    previous = dict(_metrics(baseline["results"]))
+    changes = []
+    for path, value in _metrics(results["results"]):
+        if not previous.get(path):
+            continue
+
+        change = value / previous[path] - 1
+        if abs(change) > tolerance:
+            # Throughputs should increase, latencies decrease
+            worse = change < 0 if path.endswith("operations_per_second") else change > 0
+            changes.append({"metric": path, "baseline": previous[path], "value": value, "change": change,
+                            "regression": worse})
+    return changes
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Numbers of ParaView Servers and trame instances to list")
+    parser.add_argument("--requests", type=int, default=200, help="Requests and websocket messages per measurement")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent HTTP requests")
+    parser.add_argument("--launches", type=int, default=5, help="trame instances and ParaView Servers to launch")
+    parser.add_argument("--payload", type=int, default=64 * 1024, help="Bytes per response and message of the proxy")
+    parser.add_argument("--slurm-latency", type=float, default=0.05, help="Seconds each fake Slurm command takes")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON into this file")
+    parser.add_argument("--baseline", type=Path, help="Compare against the results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative changes to report for --baseline")
+    args = parser.parse_args()
+    args.sizes.sort()
+
+    directory = Path(tempfile.mkdtemp(prefix="trame-manager-bench-"))
+    try:
+        _prepare_environment(directory, args)
+        from jupyterlab_trame_manager import __version__
+
+        bench = Bench(args, directory)
+        await bench.start()
+        try:
+            results = {
+                "version": __version__,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+                "results": await bench.run(),
+            }
+        finally:
+            await bench.stop()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        args.output.write_text(output + "\n")
+
+    if args.baseline:
+        changes = _compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for change in changes:
+            print(f"{'REGRESSION' if change['regression'] else 'improvement'} {change['metric']}: "
+                  f"{change['baseline']:.3f} -> {change['value']:.3f} ({change['change']:+.0%})", file=sys.stderr)
+        if any(change["regression"] for change in changes):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Measure parsing Slurm hostlists of jobs with 1 to 10k nodes.
+
+Each hostlist is generated from a fragmented allocation, i.e., every few nodes are missing, like on a busy system, and
+is compressed like Slurm reports it. The benchmark times resolving the root node without and with the cache, expanding
+all nodes and compressing them again, and compares it with a single regular expression per system:
+
+    python benchmarks/hostlist_parsing.py --nodes 1 10 100 1000 10000 --repeat 200
+
+Results are printed as JSON.
+"""
+import argparse
+import json
+import re
+import time
+
+from jupyterlab_trame_manager import hostlist
+
+
+# The expression, that was used to find the root node on JUWELS Booster
+_LEGACY = re.compile(r"jwb\[?(\d{4})")
+
+
+def _allocation(nodes: int, gap: int) -> list[str]:
+    # Skip every `gap`th node, so the hostlist consists of many ranges
+    hosts, number = [], 1
+    while len(hosts) < nodes:
+        if number % gap:
+            hosts.append(f"jwb{number:05d}")
+        number += 1
+    return hosts
+
+
+def _time(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def _uncached(function, argument):
+    def call():
+        hostlist.parse.cache_clear()
+        function.cache_clear()
+        return function(argument)
+
+    return call
+
+
+def _benchmark(nodes: int, args) -> dict:
+    hosts = _allocation(nodes, args.gap)
+    compressed = hostlist.compress(hosts)
+    assert hostlist.expand(compressed) == tuple(hosts)
+    assert hostlist.count(compressed) == nodes
+
+    return {
+        "hostlist_length": len(compressed),
+        "first_us": _time(_uncached(hostlist.first, compressed), args.repeat),
+        "first_cached_us": _time(lambda: hostlist.first(compressed), args.repeat),
+        "count_us": _time(_uncached(hostlist.count, compressed), args.repeat),
+        "expand_us": _time(_uncached(hostlist.expand, compressed), max(args.repeat // 10, 1)),
+        "compress_us": _time(lambda: hostlist.compress(hosts), max(args.repeat // 10, 1)),
+        "legacy_findall_us": _time(lambda: _LEGACY.findall(compressed)[0], args.repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000], help="Nodes per job")
+    parser.add_argument("--gap", type=int, default=7, help="Every gap-th node of the allocation is missing")
+    parser.add_argument("--repeat", type=int, default=200, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    results = {nodes: _benchmark(nodes, args) for nodes in args.nodes}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
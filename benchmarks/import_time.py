@@ -0,0 +1,116 @@
+"""
+Check the time it takes to import the package and to load the server extension against a budget.
+
+Every measurement runs in a fresh interpreter, which imports Jupyter Server and initializes a ServerApp first, like
+JupyterLab does before it loads its extensions. It then times `import jupyterlab_trame_manager`, which happens whenever
+the extensions of Jupyter are listed, and loading the server extension, including all of its imports and the
+construction of the Model with the Configuration from `TRAME_MANAGER_CONFIGURATION` (`desktop` by default):
+
+    python benchmarks/import_time.py --repeat 5 --budget-ms 150
+
+Measure with compiled bytecode, i.e., without `PYTHONDONTWRITEBYTECODE`, as the package would be compiled on every run
+otherwise. Results are printed as JSON. The script exits with 1, if the median load time exceeds the budget, or if one of the
+dependencies, that are only needed on first use, was imported, e.g., Jinja or jupyter_server_proxy.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+# Imported on first use: yaml to parse new apps, Jinja to launch ParaView, the proxy to route the first trame instance
+DEFERRED = ["yaml", "jinja2", "jupyter_server_proxy", "aiohttp", "jupyterlab_trame_manager.proxy"]
+
+_MEASURE = """
+import asyncio, json, sys, time
+
+from jupyter_server.serverapp import ServerApp
+
+
+def modules(before):
+    return sorted(name for name in set(sys.modules) - before if "." not in name or name.startswith("jupyterlab_trame"))
+
+
+async def main():
+    server_app = ServerApp()
+    server_app.initialize(argv=["--ServerApp.jpserver_extensions={}", "--ServerApp.log_level=ERROR", "--allow-root"])
+
+    before = set(sys.modules)
+    start = time.perf_counter()
+    import jupyterlab_trame_manager
+    imported = time.perf_counter()
+    import_modules = modules(before)
+
+    before = set(sys.modules)
+    start_load = time.perf_counter()
+    jupyterlab_trame_manager._load_jupyter_server_extension(server_app)
+    loaded = time.perf_counter()
+    load_modules = modules(before)
+
+    await jupyterlab_trame_manager._unload_jupyter_server_extension(server_app)
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "load_ms": (loaded - start_load) * 1000,
+        "import_modules": import_modules,
+        "load_modules": load_modules,
+    }))
+
+
+asyncio.run(main())
+"""
+
+
+def _measure(directory: Path) -> dict:
+    env = {
+        **os.environ,
+        "TRAME_MANAGER_CONFIGURATION": os.getenv("TRAME_MANAGER_CONFIGURATION", "desktop"),
+        "JUPYTER_PATH": str(directory / "jupyter"),
+        "JUPYTER_DATA_DIR": str(directory / "data"),
+        "JUPYTER_CONFIG_DIR": str(directory / "config"),
+        "JUPYTER_RUNTIME_DIR": str(directory / "runtime"),
+        "PYTHONWARNINGS": "ignore",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", _MEASURE], env=env, cwd=directory, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--budget-ms", type=float, default=150, help="Maximal median time to load the extension")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="trame-manager-import-") as directory:
+        runs = [_measure(Path(directory)) for _ in range(args.repeat)]
+
+    deferred = sorted({
+        module for run in runs for module in run["import_modules"] + run["load_modules"] if module in DEFERRED
+    })
+    results = {
+        "import_ms": statistics.median(run["import_ms"] for run in runs),
+        "load_ms": statistics.median(run["load_ms"] for run in runs),
+        "budget_ms": args.budget_ms,
+        "import_modules": runs[-1]["import_modules"],
+        "load_modules": runs[-1]["load_modules"],
+        "deferred_imported": deferred,
+    }
+    print(json.dumps(results, indent=2))
+
+    if results["load_ms"] > args.budget_ms:
+        print(f"Loading the extension took {results['load_ms']:.1f} ms, the budget is {args.budget_ms:.1f} ms",
+              file=sys.stderr)
+        sys.exit(1)
+    if deferred:
+        print(f"Loading the extension imported {', '.join(deferred)}, which should be imported on first use",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
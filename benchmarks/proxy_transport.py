@@ -0,0 +1,134 @@
+"""
+Compare the throughput of the hop between the proxy and a trame instance over TCP and over a unix socket.
+
+The benchmark starts a minimal backend, that answers HTTP requests and echoes websocket messages, once on a TCP port and
+once on a unix socket. It then drives it with the same clients jupyter_server_proxy uses to forward requests:
+
+    python benchmarks/proxy_transport.py --requests 2000 --concurrency 16 --payload 65536
+
+Results are printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from jupyter_server_proxy.unixsock import UnixResolver
+from tornado import web, websocket
+from tornado.httpclient import HTTPRequest
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets, bind_unix_socket
+from tornado.simple_httpclient import SimpleAsyncHTTPClient
+
+
+class _Payload(web.RequestHandler):
+    def initialize(self, payload: bytes):
+        self.payload = payload
+
+    def get(self):
+        self.write(self.payload)
+
+
+class _Echo(websocket.WebSocketHandler):
+    def on_message(self, message):
+        self.write_message(message, binary=isinstance(message, bytes))
+
+
+def _make_server(payload: bytes) -> HTTPServer:
+    return HTTPServer(web.Application([(r"/payload", _Payload, {"payload": payload}), (r"/ws", _Echo)]))
+
+
+async def _http(client: SimpleAsyncHTTPClient, url: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    pending = iter(range(requests))
+
+    async def worker():
+        for _ in pending:
+            start = time.perf_counter()
+            response = await client.fetch(url)
+            latencies.append(time.perf_counter() - start)
+            assert response.code == 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+
+    return _summary(latencies, duration)
+
+
+async def _websocket(url: str, resolver, messages: int, payload: bytes) -> dict:
+    connection = await websocket.websocket_connect(HTTPRequest(url), resolver=resolver)
+    latencies = []
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        sent = time.perf_counter()
+        await connection.write_message(payload, binary=True)
+        await connection.read_message()
+        latencies.append(time.perf_counter() - sent)
+    duration = time.perf_counter() - start
+
+    connection.close()
+    return _summary(latencies, duration)
+
+
+def _summary(latencies: list[float], duration: float) -> dict:
+    latencies.sort()
+    return {
+        "operations_per_second": len(latencies) / duration,
+        "median_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+async def _benchmark(transport: str, args, payload: bytes) -> dict:
+    server = _make_server(payload)
+
+    if transport == "unix":
+        directory = tempfile.mkdtemp(prefix="trame-")
+        path = os.path.join(directory, "trame.sock")
+        server.add_socket(bind_unix_socket(path))
+        resolver = UnixResolver(path)
+        base_url = "localhost"
+    else:
+        sockets = bind_sockets(0, "127.0.0.1")
+        server.add_sockets(sockets)
+        resolver = None
+        base_url = f"127.0.0.1:{sockets[0].getsockname()[1]}"
+
+    client = SimpleAsyncHTTPClient(force_instance=True, resolver=resolver, max_clients=args.concurrency)
+    try:
+        return {
+            "http": await _http(client, f"http://{base_url}/payload", args.requests, args.concurrency),
+            "websocket": await _websocket(f"ws://{base_url}/ws", resolver, args.requests, payload),
+        }
+    finally:
+        client.close()
+        server.stop()
+        if transport == "unix":
+            os.unlink(path)
+            os.rmdir(directory)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests and websocket messages per transport")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent HTTP requests")
+    parser.add_argument("--payload", type=int, default=64 * 1024, help="Bytes per response and message")
+    args = parser.parse_args()
+
+    payload = os.urandom(args.payload)
+    results = {transport: await _benchmark(transport, args, payload) for transport in ("tcp", "unix")}
+    results["speedup"] = {
+        kind: results["unix"][kind]["operations_per_second"] / results["tcp"][kind]["operations_per_second"]
+        for kind in ("http", "websocket")
+    }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
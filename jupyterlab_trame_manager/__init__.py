@@ -1,4 +1,4 @@
-from jupyter_server.serverapp import ServerApp
+import time
 try:
     from ._version import __version__
 except ImportError:
@@ -8,8 +8,6 @@ except ImportError:
     import warnings
     warnings.warn("Importing 'jupyterlab_trame_manager' outside a proper installation.")
     __version__ = "dev"
-from .handlers import setup_handlers
-from .model import Model
 
 
 def _jupyter_labextension_paths():
@@ -25,9 +23,24 @@ def _jupyter_server_extension_points():
     }]
 
 
-def _load_jupyter_server_extension(server_app: ServerApp):
+def _load_jupyter_server_extension(server_app):
+    """ @type server_app: jupyter_server.serverapp.ServerApp """
+    start = time.perf_counter()
+    # The package is also imported, whenever the extensions of Jupyter are listed. The Model and the handlers, with
+    # their dependencies, are only imported once the extension is loaded
+    from .handlers import setup_handlers
+    from .model import Model
+
     model = Model(server_app)
+    server_app.web_app.settings["trame_manager_model"] = model
     setup_handlers(server_app.web_app, model)
 
     name = "jupyterlab_trame_manager"
-    server_app.log.info(f"Registered {name} server extension")
+    server_app.log.info(f"Registered {name} server extension in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+async def _unload_jupyter_server_extension(server_app):
+    """ @type server_app: jupyter_server.serverapp.ServerApp """
+    model = server_app.web_app.settings.get("trame_manager_model")
+    if model is not None:
+        await model.close()
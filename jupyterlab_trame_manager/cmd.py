@@ -1,61 +1,197 @@
 import asyncio
+import os
+import shlex
+import time
+from dataclasses import dataclass
+from typing import Callable
 
+from .tracing import span
 
-async def run(programm: str, *args: str, logger=None, **kwargs) -> int:
+
+__all__ = [
+    "CommandResult", "CommandTimeout",
+    "execute", "run", "output",
+    "set_concurrency_limit", "add_observer", "remove_observer",
+]
+
+
+# Timeout in seconds, after which a command is killed if no other timeout is given
+DEFAULT_TIMEOUT = 60
+
+# Number of processes of the same executable that may run at the same time, if no other limit is set
+DEFAULT_CONCURRENCY = 4
+
+
+@dataclass
+class CommandResult:
     """
-    Run a command asyncronously in a subprocess
+    The result of a finished command.
+    """
+    command: list[str]
+    returncode: int | None  # None, if the command timed out
+    stdout: str
+    stderr: str
+    duration: float  # Seconds, including the time spent waiting for a free slot
+
+    @property
+    def executable(self) -> str:
+        return _executable(self.command)
+
+
+class CommandTimeout(TimeoutError):
+    def __init__(self, result: CommandResult, timeout: float):
+        super().__init__(f"{shlex.join(result.command)!r} did not finish within {timeout}s")
+        self.result = result
+
+
+_concurrency_limits: dict[str, int] = {}
+_semaphores: dict[str, asyncio.Semaphore] = {}
+_observers: list[Callable[[CommandResult], None]] = []
+
+
+def set_concurrency_limit(executable: str, limit: int):
+    """
+    Set the number of processes of an executable that may run at the same time. Further commands wait for a free slot.
+
+    @param executable: The name of the executable, e.g., `squeue`
+    @param limit: The maximum number of concurrent processes
+    """
+    _concurrency_limits[executable] = limit
+    _semaphores.pop(executable, None)
+
+
+def add_observer(observer: Callable[[CommandResult], None]):
+    """
+    Register a callback, that is called with the result of every command, e.g., to report durations.
+    """
+    _observers.append(observer)
+
+
+def remove_observer(observer: Callable[[CommandResult], None]):
+    _observers.remove(observer)
+
+
+def _executable(command: list[str]) -> str:
+    # Shell commands might be passed as a single string
+    return os.path.basename(command[0].split(maxsplit=1)[0])
+
+
+def _semaphore(executable: str) -> asyncio.Semaphore:
+    if executable not in _semaphores:
+        _semaphores[executable] = asyncio.Semaphore(_concurrency_limits.get(executable, DEFAULT_CONCURRENCY))
+    return _semaphores[executable]
+
+
+async def _read_lines(stream: asyncio.StreamReader, on_line: Callable[[str], None] | None) -> str:
+    lines = []
+    while line := await stream.readline():
+        line = line.decode(errors="replace")
+        lines.append(line)
+        if on_line:
+            on_line(line.rstrip("\n"))
+
+    return "".join(lines)
+
+
+async def execute(
+        programm: str, *args: str,
+        timeout: float | None = DEFAULT_TIMEOUT,
+        shell: bool = False,
+        merge_stderr: bool = False,
+        on_line: Callable[[str], None] | None = None,
+        logger=None,
+        **kwargs
+) -> CommandResult:
+    """
+    Run a command asyncronously in a subprocess. The command is executed directly, without a shell, unless requested.
 
     @param programm: The command to run
     @param args: Arguments to the programm
+    @param timeout: Seconds after which the command is killed and L{CommandTimeout} is raised. None to wait forever
+    @param shell: Run the command through the shell, e.g., to expand variables
+    @param merge_stderr: Redirect stderr into stdout
+    @param on_line: A optional callback, which receives the lines of stdout while the command is running
     @param logger: A optional logger to log stdout and stderr into
-    @param kwargs: Additional Arguments passed to asyncio.create_subprocess_shell
-    @return: The exit-code of the command
+    @param kwargs: Additional Arguments passed to asyncio.create_subprocess_exec or asyncio.create_subprocess_shell
+    @return: The result of the command
     """
-    command = " ".join([programm, *args])
+    command = [programm, *args]
+    stderr = asyncio.subprocess.STDOUT if merge_stderr else asyncio.subprocess.PIPE
+    start = time.monotonic()
 
-    proccess = await asyncio.create_subprocess_shell(
-        command,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-        **kwargs
-    )
+    executable = _executable(command)
+    async with _semaphore(executable), span(f"cmd.{executable}"):
+        if shell:
+            process = await asyncio.create_subprocess_shell(
+                " ".join(command), stdout=asyncio.subprocess.PIPE, stderr=stderr, **kwargs
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=stderr, **kwargs
+            )
+
+        reader = asyncio.gather(
+            _read_lines(process.stdout, on_line),
+            _read_lines(process.stderr, None) if process.stderr else asyncio.sleep(0, ""),
+            process.wait(),
+        )
 
-    stdout, stderr = await proccess.communicate()
+        try:
+            out, err, returncode = await asyncio.wait_for(reader, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # Don't leave the process running, if nobody is waiting for it anymore
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+
+            result = CommandResult(command, None, "", "", time.monotonic() - start)
+            _notify(result)
+
+            if isinstance(e, asyncio.TimeoutError):
+                raise CommandTimeout(result, timeout) from None
+            raise
+
+    result = CommandResult(command, returncode, out, err, time.monotonic() - start)
+    _notify(result)
 
     if logger:
-        logger.info(f"{command!r} exited with {proccess.returncode}")
-        if stdout:
-            logger.info(f"[stdout]\n{stdout.decode()}")
-        if stderr:
-            logger.info(f"[stderr]\n{stderr.decode()}")
+        logger.info(f"{shlex.join(command)!r} exited with {returncode} after {result.duration:.2f}s")
+        if out:
+            logger.info(f"[stdout]\n{out}")
+        if err:
+            logger.info(f"[stderr]\n{err}")
 
-    return proccess.returncode
+    return result
 
 
-async def output(programm: str, *args: str, logger=None, **kwargs) -> tuple[int, str]:
+def _notify(result: CommandResult):
+    for observer in _observers:
+        observer(result)
+
+
+async def run(programm: str, *args: str, logger=None, **kwargs) -> int:
     """
-    Run a command asyncronously in a subprocess and collect stdout and stderr
+    Run a command asyncronously in a subprocess
 
     @param programm: The command to run
     @param args: Arguments to the programm
     @param logger: A optional logger to log stdout and stderr into
-    @param kwargs: Additional Arguments passed to asyncio.create_subprocess_shell
-    @return: A tuple with exit-code of the command and a string containing the output of the command
+    @param kwargs: Additional Arguments passed to L{execute}
+    @return: The exit-code of the command
     """
-    command = " ".join([programm, *args])
+    result = await execute(programm, *args, logger=logger, **kwargs)
+    return result.returncode
 
-    proccess = await asyncio.create_subprocess_shell(
-        command,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.STDOUT,
-        **kwargs
-    )
-
-    stdout, _ = await proccess.communicate()
 
-    if logger:
-        logger.info(f"{command!r} exited with {proccess.returncode}")
-        if stdout:
-            logger.info(f"[stdout]\n{stdout.decode()}")
+async def output(programm: str, *args: str, logger=None, **kwargs) -> tuple[int, str]:
+    """
+    Run a command asyncronously in a subprocess and collect stdout and stderr
 
-    return proccess.returncode, stdout.decode()
+    @param programm: The command to run
+    @param args: Arguments to the programm
+    @param logger: A optional logger to log stdout and stderr into
+    @param kwargs: Additional Arguments passed to L{execute}
+    @return: A tuple with exit-code of the command and a string containing the output of the command
+    """
+    result = await execute(programm, *args, merge_stderr=True, logger=logger, **kwargs)
+    return result.returncode, result.stdout
@@ -1,27 +1,42 @@
+import asyncio
+import json
 import os
+import shlex
+import shutil
+import signal
+import time
 from abc import ABC, abstractmethod
 from io import FileIO
+from jupyter_core.paths import jupyter_data_dir, jupyter_runtime_dir
 from jupyter_server.serverapp import ServerApp
+from jupyter_server.utils import url_path_join
 from pathlib import Path
 from secrets import token_urlsafe, token_hex
 from socket import socket
-from subprocess import Popen
-from tempfile import mkstemp
-from yaml import safe_load
-from pydantic import BaseModel, Field, ConfigDict, alias_generators, types, networks
+from tempfile import mkdtemp, mkstemp
+from pydantic import BaseModel, Field, ConfigDict, alias_generators, types
 from pydantic.functional_validators import BeforeValidator
+from typing import Literal
 from typing_extensions import Annotated
 
-from .proxy import make_trame_proxy_handler
+from . import hostlist
+from .control import ControlClient
+from .logs import backup_file
+from .store import AdoptedProcess
+from .tracing import span
 
 
 __all__ = [
     "Configuration",
-    "UserData", "TrameApp", "TrameLaunchOptions", "TrameInstance", "ParaViewLaunchOptions", "ParaViewInstance",
+    "UserData", "TrameApp", "TrameLaunchOptions", "TrameInstance", "TrameConnection", "ParaViewLaunchOptions", "ParaViewInstance",
     "ParentModel", "DirectoryPath", "FilePath"
 ]
 
 
+# The prefix of the private directories of unix sockets. They are removed together with the socket
+_UNIX_SOCKET_PREFIX = "trame-"
+
+
 # Ensure, that paths have the tilde expanded and are fully resolved, to give a nice, complete path when dumping
 def _expand_and_resolve_path(path: Path | str) -> Path:
     return Path(path).expanduser().resolve()
@@ -37,6 +52,8 @@ class ParentModel(BaseModel):
         alias_generator=alias_generators.to_camel,
         arbitrary_types_allowed=True,
         populate_by_name=True,
+        # The schemas are built on first use instead of on import, i.e., on every start of JupyterLab
+        defer_build=True,
     )
 
 class TrameLaunchOptions(ParentModel):
@@ -48,6 +65,17 @@ class TrameLaunchOptions(ParentModel):
     name: str
     data_directory: DirectoryPath
 
+class TrameConnection(ParentModel):
+    """
+    The ParaView Server a trame instance is connected to.
+    """
+    server: str
+    job_id: str | None = None
+    url: str
+    port: int
+    latency: float | None = None  # Round-trip time of the connect message in milliseconds
+
+
 class TrameInstance(TrameLaunchOptions):
     """
     Data related to a running Instance of a trame App.
@@ -55,14 +83,42 @@ class TrameInstance(TrameLaunchOptions):
     ToDo: Let App decide what fields should be specified by the User (e.g. via app.yml)
     """
     uuid: str = Field(default_factory=lambda: token_hex(8))
-    port: int
-    base_url: networks.HttpUrl | None
+    app_name: str | None = Field(None, exclude=True)
+    port: int | None = None  # None, if trame listens on a unix socket
+    unix_socket: Path | None = Field(None, exclude=True)
+    base_url: str | None
     log_file: FilePath = Field(alias="log")
+    # Bytes rotated out of the log file so far. See L{jupyterlab_trame_manager.logs}
+    log_rotated: int = Field(0, exclude=True)
+    connection: TrameConnection | None = None
+
+    # Whether trame accepts connections yet, or whether its process has exited
+    state: Literal["starting", "ready", "failed", "exited"] = "starting"
+    exit_code: int | None = None
+    # Duration of the launch phases in milliseconds
+    timings: dict[str, float] = {}
 
     auth_key: str = Field(exclude=True)
     auth_key_file: FilePath = Field(exclude=True)
     logger: FileIO = Field(exclude=True)
-    process_handle: Popen | None = Field(exclude=True)
+    # An AdoptedProcess, if the instance was launched by a previous server
+    process_handle: asyncio.subprocess.Process | AdoptedProcess | None = Field(exclude=True)
+
+    # Pre-started for a warm pool and not yet claimed by the user
+    warm: bool = Field(False, exclude=True)
+
+    # Keep-alive connection for control messages, created on first use
+    control_client: ControlClient | None = Field(None, exclude=True)
+
+    # Time of the last proxied request or message, and the number of open websockets, to detect idle instances
+    last_activity: float = Field(default_factory=time.time, exclude=True)
+    open_websockets: int = Field(0, exclude=True)
+
+    # Traffic through the proxy since the launch, see L{jupyterlab_trame_manager.metrics}
+    proxied_bytes_sent: int = Field(0, exclude=True)
+    proxied_bytes_received: int = Field(0, exclude=True)
+    proxied_requests: int = Field(0, exclude=True)
+    proxied_websockets: int = Field(0, exclude=True)
 
 
 class TrameApp(ParentModel):
@@ -76,6 +132,12 @@ class TrameApp(ParentModel):
     command: str = Field(exclude=True)
     working_directory: DirectoryPath | None = Field(exclude=True)
 
+    # Number of instances that are started ahead of time and handed out on launch
+    warm_pool: int = Field(0, exclude=True)
+
+    # How the proxy connects to the instances. None uses the default of the Configuration
+    transport: Literal["tcp", "unix"] | None = Field(None, exclude=True)
+
     instances: list[TrameInstance] = []
 
 
@@ -107,10 +169,23 @@ class ParaViewInstance(ParaViewLaunchOptions, extra="allow"):
     Store data about a running ParaView Server.
     You can add extra information for your Configuration if required.
     """
+    job_id: str | None = None  # Identifies the server, if the job scheduler assigns ids
+    port: int | None = None  # The port pvserver listens on. None for the default of the Configuration
     time_used: str
     state: str
+    # Whether pvserver accepts connections, and the time to establish a connection in milliseconds
+    ready: bool = False
+    latency: float | None = None
+    # The hostlist of the nodes of the job, e.g. `jwb[0001-0004]`, and the first of them, on which pvserver runs
+    node_list: str = ""
+    root_node: str | None = None
     connection_address: str = Field(exclude=True)
 
+    @property
+    def hosts(self) -> tuple[str, ...]:
+        """ All nodes of the job, see L{jupyterlab_trame_manager.hostlist} """
+        return hostlist.expand(self.node_list)
+
 
 class Configuration(ABC):
     """
@@ -120,14 +195,99 @@ class Configuration(ABC):
     The Configuration is determined at runtime using the "TRAME_MANAGER_CONFIGURATION" environment variable.
     """
 
+    # Interval in seconds, in which the list of running ParaView Servers is refreshed in the background
+    server_poll_interval: float = 30
+
+    # Maximum age in seconds of the list of running ParaView Servers. Requests for an older list trigger a refresh in the
+    # background, while the list is served from memory
+    server_snapshot_ttl: float = 60
+
+    # Age in seconds, after which the cached user data is revalidated in the background
+    user_data_ttl: float = 3600
+
+    # Directory where data is cached across restarts of JupyterLab. Resolved on use, so it follows JUPYTER_DATA_DIR.
+    # Subclasses may set it as class attribute
+    @property
+    def cache_dir(self) -> Path:
+        return Path(jupyter_data_dir(), "trame-manager")
+
+    # Interval in seconds, in which the trame apps are rediscovered in the background. None disables the rescan
+    app_rescan_interval: float | None = None
+
+    # Seconds to wait for a launched trame instance to accept connections, before it is considered as failed
+    trame_launch_timeout: float = 120
+
+    # Seconds to wait for a trame instance to answer a control message, and how often failed connections are retried
+    trame_control_timeout: float = 10
+    trame_control_retries: int = 3
+
+    # The port pvserver listens on, unless the Configuration reports a port for a ParaView Server
+    paraview_port: int = 11111
+
+    # Probe whether pvserver accepts connections on the running ParaView Servers. The probe connects without a
+    # handshake, which pvserver without --multi-clients takes as its only client, so it refuses the actual one. Only
+    # enable it, if all job scripts start pvserver with --multi-clients. See L{jupyterlab_trame_manager.probe}
+    paraview_probe: bool = False
+
+    # Seconds between probes of servers that are not ready yet, and after which a ready server is probed again
+    paraview_probe_interval: float = 5
+    paraview_probe_ttl: float = 60
+
+    # Seconds to wait for a connection to pvserver, and the number of servers probed at the same time
+    paraview_probe_timeout: float = 2
+    paraview_probe_concurrency: int = 8
+
+    # Bytes of memory, that the idle instances of all warm pools may use together. None for no limit
+    warm_pool_memory_budget: int | None = None
+
+    # Seconds without proxied traffic and open websockets, after which a trame instance is stopped. None to never stop
+    trame_idle_timeout: float | None = None
+
+    # Seconds an exited trame instance is still shown, before it is removed
+    trame_exited_retention: float = 60
+
+    # Size in bytes, above which the log of a trame instance is rotated. Only the previous part is kept. None to disable
+    trame_log_max_bytes: int | None = 10 * 2**20
+
+    # How the proxy connects to trame instances, unless the app.yml specifies a transport. With "unix", trame listens
+    # on a private unix socket instead of a TCP port
+    trame_transport: Literal["tcp", "unix"] = "tcp"
+
+    # Database of the running trame instances, so they are taken over after a restart of JupyterLab. Records of other
+    # hosts are ignored, so the runtime directory may be shared. Resolved on use, so it follows JUPYTER_RUNTIME_DIR.
+    # Subclasses may set it as class attribute, or to None to stop tracking instances across restarts
+    @property
+    def trame_state_file(self) -> Path | None:
+        return Path(jupyter_runtime_dir(), "trame-manager.sqlite")
+
+    # Send the durations of the Configuration hooks and commands of each request as `Server-Timing` header. Enabled
+    # with the TRAME_MANAGER_TRACING environment variable by default. See L{jupyterlab_trame_manager.tracing}
+    tracing: bool = os.getenv("TRAME_MANAGER_TRACING", "0").lower() not in ("0", "false", "")
+
+    # Directory, into which the profiles of requests slower than profile_threshold seconds are written, sampled every
+    # profile_interval seconds. None disables the profiler. Defaults to the TRAME_MANAGER_PROFILE_DIR and
+    # TRAME_MANAGER_PROFILE_THRESHOLD environment variables
+    profile_dir: Path | None = Path(os.environ["TRAME_MANAGER_PROFILE_DIR"]) \
+        if os.getenv("TRAME_MANAGER_PROFILE_DIR") else None
+    profile_threshold: float = float(os.getenv("TRAME_MANAGER_PROFILE_THRESHOLD", 2))
+    profile_interval: float = 0.005
+
     def __init__(self, logger):
         self._logger = logger
+        # Routed trame instances by their UUID, served by a single TrameProxyHandler
+        self._trame_routes: dict[str, TrameInstance] = {}
+        self._proxy_registered = False
 
     @property
     def log(self):
         """ Logger property """
         return self._logger
 
+    @property
+    def cache_key(self) -> str:
+        """ Distinguishes cached data of different Configurations (or systems) sharing the same L{cache_dir} """
+        return type(self).__name__
+
     @staticmethod
     def get_open_port() -> int:
         """ Query an open socket on the machine """
@@ -143,6 +303,9 @@ class Configuration(ABC):
         The default behavious will rely on the `JUPYTER_PATH`environment variable, where trame apps will be found in
         `trame/<app_name> directories`.
 
+        The found apps are stored in an index in the L{cache_dir}, together with the modification times of the
+        directories and config files. Only apps that changed since the last discovery are parsed again.
+
         @return: A list wich all the found trame apps
         """
         # We use JUPYTER_PATH to discover Apps
@@ -150,18 +313,87 @@ class Configuration(ABC):
         paths = paths.split(os.pathsep) if paths else []
         self.log.info(f"Searching for trame apps in {paths!r}")
 
+        index = self._load_app_index()
+        new_index = {"roots": {}, "apps": {}}
+
         apps = []
         for path in paths:
             path = Path(path) / "trame"
-            if not path.is_dir() or not path.exists():
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            if not path.is_dir():
                 continue
 
-            for name in path.iterdir():
-                app = self.parse_app_config(name)
+            # The list of apps in a directory only changes, if the directory itself is modified
+            root = index["roots"].get(str(path))
+            if root is None or root["mtime"] != mtime:
+                root = {"mtime": mtime, "apps": sorted(entry.name for entry in path.iterdir() if entry.is_dir())}
+            new_index["roots"][str(path)] = root
+
+            for name in root["apps"]:
+                app_path = path / name
+                try:
+                    app, entry = self._discover_app(app_path, index["apps"].get(str(app_path)))
+                except Exception as e:
+                    self.log.error(f"Skipping trame app at {str(app_path)!r}: {e}")
+                    continue
+
+                new_index["apps"][str(app_path)] = entry
                 apps.append(app)
 
+        self._store_app_index(new_index)
         return apps
 
+    def _discover_app(self, path: Path, entry: dict | None) -> tuple[TrameApp, dict]:
+        # Reuse the indexed app, if neither its directory nor its config file changed
+        if entry is not None:
+            try:
+                if self._app_stat(path, entry["file"]) == entry["stat"]:
+                    return TrameApp.model_validate(entry["app"]), entry
+            except (OSError, ValueError):
+                pass
+
+        app = self.parse_app_config(path)
+
+        # Excluded fields are not dumped, so we collect the fields ourselves
+        fields = {field: getattr(app, field) for field in TrameApp.model_fields if field != "instances"}
+        entry = {
+            "file": str(app.path),
+            "stat": self._app_stat(path, app.path),
+            "app": json.loads(json.dumps(fields, default=str)),
+        }
+        return app, entry
+
+    @staticmethod
+    def _app_stat(path: Path, config_file: Path | str) -> list[int]:
+        config_stat = os.stat(config_file)
+        return [path.stat().st_mtime_ns, config_stat.st_mtime_ns, config_stat.st_size]
+
+    @property
+    def _app_index_file(self) -> Path:
+        return self.cache_dir / "apps.json"
+
+    def _load_app_index(self) -> dict:
+        try:
+            return json.loads(self._app_index_file.read_text())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.log.warning(f"Ignoring invalid trame app index {str(self._app_index_file)!r}: {e}")
+
+        return {"roots": {}, "apps": {}}
+
+    def _store_app_index(self, index: dict):
+        try:
+            self._app_index_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self._app_index_file.with_suffix(f".{os.getpid()}.tmp")
+            temp_file.write_text(json.dumps(index))
+            temp_file.replace(self._app_index_file)
+        except OSError as e:
+            self.log.warning(f"Failed to store trame app index in {str(self._app_index_file)!r}: {e}")
+
     def parse_app_config(self, path) -> TrameApp:
         """
         Parse the app.yml file of a trame app. A default config file has the following values:
@@ -171,6 +403,8 @@ class Configuration(ABC):
             This command must append the $TRAME_INSTANCE_ARGS environment variable to the python script, which provides
             some information for trame. See L{Configuration.generate_trame_env} for the generation of the variable.
         - working_directore: Optional, location here I{command} will be executed.
+        - warm_pool: Optional, number of instances that are started ahead of time. See L{jupyterlab_trame_manager.pool}
+        - transport: Optional, `tcp` or `unix`. With `unix`, the app must listen on the socket passed via `--unix-socket`
 
         @param path: The path to the app folder, i.e., `share/jupyter/trame/my-app/`
         @return: The parsed app information for the app
@@ -185,7 +419,10 @@ class Configuration(ABC):
 
         self.log.info(f"Found trame app config at {config_file.resolve()!r}")
 
-        config = safe_load(config_file.read_text())
+        # Only apps missing in the index are parsed, so yaml is imported on first use.
+        # The C implementation of the YAML parser is much faster, but might not be available
+        import yaml
+        config = yaml.load(config_file.read_text(), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
         config["display_name"] = config.pop("name")
         return TrameApp(name=path.name, path=config_file, **config)
 
@@ -194,19 +431,23 @@ class Configuration(ABC):
         Some of the parameters for a launched trame app is generated on the server by this configuration. The parameters
         generated by this function are directly passed to the constructor of L{TrameAppInstance}.
 
-        By default, this function generated a UUID, the port to run on, a logger where the outputs of the app are logged
-        to, and a tempfile where the authentication key is stored.
+        By default, this function generated a UUID, the port or unix socket to run on, a logger where the outputs of the
+        app are logged to, and a tempfile where the authentication key is stored.
 
         @param app: A reference to the trame app that should be launched
         @return: A dict with the generated parameters
         """
 
-        # Port
-        port = self.get_open_port()
+        # Port or unix socket. The socket lives in a private directory, so only the user can connect to it
+        if (app.transport or self.trame_transport) == "unix":
+            port, unix_socket = None, Path(mkdtemp(prefix=_UNIX_SOCKET_PREFIX), "trame.sock")
+        else:
+            port, unix_socket = self.get_open_port(), None
 
-        # Log-file
-        _, log_dir = mkstemp(suffix=".log", text=True)
-        logger = FileIO(log_dir, "w")
+        # Log-file. trame must append to it, so it continues at the start of the file after it has been rotated
+        log_fd, log_dir = mkstemp(suffix=".log", text=True)
+        os.close(log_fd)
+        logger = FileIO(log_dir, "a")
 
         # authKey
         auth_key = token_urlsafe(32)
@@ -216,9 +457,10 @@ class Configuration(ABC):
         with open(tempfile, "w") as file:
             file.write(auth_key)
 
-        self.log.info(f"{port=}, {log_dir=}, {auth_key_file=}")
+        self.log.info(f"{port=}, {unix_socket=}, {log_dir=}, {auth_key_file=}")
         return {
             "port": port,
+            "unix_socket": unix_socket,
             "log_file": log_dir,
             "logger": logger,
             "auth_key": auth_key,
@@ -234,59 +476,226 @@ class Configuration(ABC):
         @return: The generated environment
         """
         env = os.environ.copy()
-        env["TRAME_INSTANCE_ARGS"] = (f"--port={instance.port} "
-                                      f"--data=\"{instance.data_directory}\" "
-                                      f"--authKeyFile=\"{instance.auth_key_file}\" "
+        # The paths are quoted for the shell, in case the command evaluates the arguments, e.g., with `eval`
+        listen = (f"--unix-socket={shlex.quote(str(instance.unix_socket))}" if instance.unix_socket
+                  else f"--port={instance.port}")
+        env["TRAME_INSTANCE_ARGS"] = (f"{listen} "
+                                      f"--data={shlex.quote(str(instance.data_directory))} "
+                                      f"--authKeyFile={shlex.quote(str(instance.auth_key_file))} "
                                       f"--server")
 
+        # Warm instances receive their actual name and data directory when they are claimed
+        if instance.warm:
+            env["TRAME_WARM_POOL"] = "1"
+
         return env
 
     def route_trame(self, instance: TrameInstance, server_app: ServerApp) -> str:
         """
         After trame has been lauched, it must be routed to the user and made accessible by the browser. This
-        implementation relies on L{jupyter_server_proxy.NamedLocalProxyHandler}, that will be registered to
-        `/trame/<UUID>/` on the server.
+        implementation relies on L{jupyterlab_trame_manager.proxy.TrameProxyHandler}, a single handler registered to
+        `/trame/<UUID>/` on the server, which finds the instance by its UUID.
 
         @param instance: The launched trame instance
         @param server_app: A reference to the server of this JupyterLab
         @return: The base_url of the trame instance that will be opened when the user click on this instance in the lab
         """
-        base_url, rule = make_trame_proxy_handler(instance, server_app.base_url)
-        server_app.web_app.add_handlers('.*', [rule])
-        return base_url
+        if not self._proxy_registered:
+            # jupyter_server_proxy and its HTTP clients are only imported, once the first instance is routed
+            from .proxy import TrameProxyHandler
+
+            rule = TrameProxyHandler.rule(server_app.base_url)
+            server_app.web_app.add_handlers(".*", [(rule, TrameProxyHandler, dict(routes=self._trame_routes))])
+            self._proxy_registered = True
+
+        self._trame_routes[instance.uuid] = instance
+        return url_path_join(server_app.base_url, "trame", instance.uuid, "/")
+
+    def unroute_trame(self, instance: TrameInstance):
+        """
+        Make a trame instance inaccessible again, after it has been stopped.
+
+        @param instance: The stopped trame instance
+        """
+        self._trame_routes.pop(instance.uuid, None)
 
-    async def launch_trame(self, app: TrameApp, options: TrameLaunchOptions, server_app) -> TrameInstance:
+    async def launch_trame(
+            self, app: TrameApp, options: TrameLaunchOptions, server_app, warm: bool = False
+    ) -> TrameInstance:
         """
         Launch a new instance of the given trame app.
 
         @param app: The trame app that should be launched.
         @param options: The options for this instance that were entered by the user in the launch dialog.
         @param server_app: A reference to the server of JupyterLab, might be required to route trame.
+        @param warm: Whether the instance is started ahead of time for a warm pool.
         @return: The launched trame instance.
         """
-        parameters = self.generate_trame_parameters(app)
+        start = time.perf_counter()
+
+        # Generating the parameters creates files, so we don't block the event loop with it
+        with span("configuration.generate_trame_parameters"):
+            parameters = await asyncio.get_running_loop().run_in_executor(None, self.generate_trame_parameters, app)
         self.log.info(f"Starting {app.name}")
+        generated = time.perf_counter()
 
         instance = TrameInstance(
             **options.model_dump(),
             **parameters,
             process_handle=None,
             base_url=None,
+            warm=warm,
         )
 
-        # env and handler
-        env = self.generate_trame_env(instance)
-        instance.base_url = self.route_trame(instance, server_app)
+        try:
+            # env and handler
+            env = self.generate_trame_env(instance)
+            with span("configuration.route_trame"):
+                instance.base_url = self.route_trame(instance, server_app)
+
+            # Create Process. The command might spawn further processes, so we give it its own process group
+            with span("trame.spawn"):
+                instance.process_handle = await asyncio.create_subprocess_shell(
+                    app.command, env=env, cwd=app.working_directory, stdout=instance.logger, stderr=instance.logger,
+                    start_new_session=True,
+                )
+        except BaseException:
+            # Nothing runs behind the route, so it is removed again together with the generated files
+            self.unroute_trame(instance)
+            instance.logger.close()
+            self._remove_trame_files(instance.log_file, instance.auth_key_file, instance.unix_socket)
+            raise
+        spawned = time.perf_counter()
+
+        instance.timings = {
+            "parameters": (generated - start) * 1000,
+            "spawn": (spawned - generated) * 1000,
+        }
+        return instance
+
+    async def stop_trame(self, instance: TrameInstance, timeout: float = 10):
+        """
+        Stop a trame instance. The instance is unrouted and its process group is terminated and killed, if it does not
+        exit within the timeout. Afterwards, the log and the file with the authentication key are removed.
+
+        @param instance: The trame instance to stop
+        @param timeout: Seconds to wait for the instance to exit after terminating it
+        """
+        self.unroute_trame(instance)
+        if instance.control_client is not None:
+            await instance.control_client.close()
+
+        process = instance.process_handle
+        if process is not None and process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+                await asyncio.wait_for(process.wait(), timeout)
+            except asyncio.TimeoutError:
+                os.killpg(process.pid, signal.SIGKILL)
+                await process.wait()
+            except ProcessLookupError:
+                pass
+
+        instance.logger.close()
+        self._remove_trame_files(instance.log_file, instance.auth_key_file, instance.unix_socket)
+
+    @staticmethod
+    def _remove_trame_files(log_file: Path, auth_key_file: Path, unix_socket: Path | None):
+        for file in (log_file, backup_file(log_file), auth_key_file, unix_socket):
+            if file is None:
+                continue
+            try:
+                os.unlink(file)
+            except FileNotFoundError:
+                pass
+
+        # The private directory of the socket, see generate_trame_parameters. trame might have left further files in it
+        if unix_socket is not None and unix_socket.parent.name.startswith(_UNIX_SOCKET_PREFIX):
+            shutil.rmtree(unix_socket.parent, ignore_errors=True)
+
+    def adopt_trame(self, app: TrameApp, record: dict, server_app: ServerApp) -> TrameInstance:
+        """
+        Take over a running trame instance, that was launched by a previous server, and route it again.
 
-        # Create Process
-        process = Popen(
-            app.command, env=env, cwd=app.working_directory,
-            shell=True, stdout=instance.logger, stderr=instance.logger, text=True
+        @param app: The trame app of the instance
+        @param record: The stored record of the instance, see L{jupyterlab_trame_manager.store.InstanceStore.orphans}
+        @param server_app: A reference to the server of this JupyterLab
+        @return: The adopted trame instance
+        @raise Exception: If the instance can't be restored, e.g., because its files are gone
+        """
+        auth_key_file = Path(record["auth_key_file"])
+        instance = TrameInstance(
+            uuid=record["uuid"],
+            name=record["name"],
+            data_directory=record["data_directory"],
+            port=record["port"],
+            unix_socket=record["unix_socket"],
+            log_file=record["log_file"],
+            logger=FileIO(record["log_file"], "a"),
+            auth_key=auth_key_file.read_text(),
+            auth_key_file=auth_key_file,
+            process_handle=AdoptedProcess(record["pid"], record["start_time"]),
+            connection=record["connection"],
+            base_url=None,
         )
-        instance.process_handle = process
 
+        instance.base_url = self.route_trame(instance, server_app)
+        self.log.info(f"Adopted trame instance {instance.name!r} of {app.name!r} with PID {record['pid']}")
         return instance
 
+    def discard_trame(self, record: dict):
+        """
+        Clean up after a trame instance of a previous server, that can't be taken over. Its process group is
+        terminated, if it is still running, and its files are removed.
+
+        @param record: The stored record of the instance, see L{jupyterlab_trame_manager.store.InstanceStore.orphans}
+        """
+        if record["running"]:
+            try:
+                os.killpg(record["pid"], signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        unix_socket = Path(record["unix_socket"]) if record["unix_socket"] else None
+        self._remove_trame_files(Path(record["log_file"]), Path(record["auth_key_file"]), unix_socket)
+
+    async def wait_for_trame(self, instance: TrameInstance) -> bool:
+        """
+        Wait until a launched trame instance accepts connections. By default, this probes the port or unix socket of
+        the instance until a connection succeeds, the process exits or L{trame_launch_timeout} expires.
+
+        @param instance: The launched trame instance
+        @return: Whether the instance is ready
+        """
+        deadline = time.monotonic() + self.trame_launch_timeout
+        delay = 0.05
+
+        while time.monotonic() < deadline:
+            if instance.process_handle is not None and instance.process_handle.returncode is not None:
+                return False
+
+            try:
+                if instance.unix_socket is not None:
+                    _, writer = await asyncio.open_unix_connection(instance.unix_socket)
+                else:
+                    _, writer = await asyncio.open_connection("localhost", instance.port)
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 1)
+            else:
+                writer.close()
+                await writer.wait_closed()
+                return True
+
+        return False
+
+    async def close(self):
+        """
+        Release the resources of the Configuration, e.g., open connections, when the server shuts down. Running trame
+        instances are kept, so they can be taken over after a restart.
+        """
+        pass
+
     @abstractmethod
     async def get_running_servers(self) -> list[ParaViewInstance]:
         """
@@ -309,6 +718,24 @@ class Configuration(ABC):
         """
         pass
 
+    async def launch_paraview_batch(self, batch: list[tuple[ParaViewLaunchOptions, int]]) -> list[dict]:
+        """
+        Launch several ParaView Servers at once. The names of the servers may contain `{index}`, which is replaced by
+        the index of each server within the batch. By default, the servers are launched one after another with
+        L{launch_paraview}.
+
+        @param batch: The options and the number of servers to launch with them
+        @return: The status of each server, with its `name`, `jobId` (None, if it is unknown), `returnCode` and
+            `message`
+        """
+        elements = []
+        for index, options in enumerate(options for options, count in batch for _ in range(count)):
+            options = options.model_copy(update={"name": options.name.replace("{index}", str(index))})
+            return_code, message = await self.launch_paraview(options)
+            elements.append({"name": options.name, "jobId": None, "returnCode": return_code, "message": message})
+
+        return elements
+
     @abstractmethod
     async def get_user_data(self) -> UserData:
         """
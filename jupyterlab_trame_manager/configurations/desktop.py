@@ -2,9 +2,13 @@ from ..configuration import Configuration, UserData, ParaViewInstance, ParaViewL
 
 
 class DesktopConfiguration(Configuration):
+    # The local pvserver is started by the user, who might not pass --multi-clients
+    paraview_probe = False
+
     async def get_running_servers(self) -> list[ParaViewInstance]:
         return [
             ParaViewInstance(
+                job_id="local",
                 name="Local Server",
                 account="",
                 partition="",
@@ -12,7 +16,7 @@ class DesktopConfiguration(Configuration):
                 time_used="00:00",
                 time_limit="00:00",
                 state="RUNNING",
-                connection_address="localhost:11111"
+                connection_address="localhost"
             )
         ]
 
@@ -1,11 +1,11 @@
-import asyncio
 import os
+import pwd
 from pathlib import Path
-from re import findall
 
-from jupyterlab_trame_manager.configuration import Configuration, UserData, ParaViewInstance, ParaViewLaunchOptions
+from jupyterlab_trame_manager.configuration import UserData, ParaViewInstance, ParaViewLaunchOptions
 from jupyterlab_trame_manager.mixins.slurm import SlurmMixin
-from jupyterlab_trame_manager.cmd import output
+from jupyterlab_trame_manager.cmd import execute
+from jupyterlab_trame_manager import slurm_cache
 
 
 SUPPORTED_PARTITIONS = {
@@ -15,60 +15,73 @@ SUPPORTED_PARTITIONS = {
     "jusuf": ["batch", "scraper", "gpus", "develgpus"],
 }
 
-async def _get_account_partition_associations() -> list[tuple[str, str]]:
+# The domain of the interconnect of the nodes, by system
+INTERCONNECT_DOMAINS = {
+    "juwelsbooster": "juwels",
+    "juwels": "juwels",
+    "jurecadc": "jureca",
+    "jusuf": "jusuf",
+}
+
+async def _get_account_partition_associations(timeout: float) -> list[tuple[str, str]]:
     # Query all valid associations between Account and Partition from Slurm.
     # To prevent submitting across cluster (e.g., JUWELS Booster <-> JUWELS Cluster),
     # we filter with a predefined selection of paritions.
-    partitions = ",".join(SUPPORTED_PARTITIONS[os.environ["SYSTEMNAME"]])
-    _, out = await output(
-        "sacctmgr",
-        "show", "association", f"{partitions=}", "format=Account,Partition",
-        "--parsable2", "--noheader"
-    )
-    lines = out.splitlines()
-    return [tuple(line.split("|")) for line in lines]
+    supported = SUPPORTED_PARTITIONS[os.environ["SYSTEMNAME"]]
+
+    # The node-local cache holds the associations of all partitions, so we filter them ourselves
+    out = await slurm_cache.query("associations")
+    if out is None:
+        result = await execute(
+            "sacctmgr",
+            "show", "association", f"partitions={','.join(supported)}", f"format={slurm_cache.ASSOCIATIONS_FORMAT}",
+            "--parsable2", "--noheader",
+            timeout=timeout,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"sacctmgr exited with {result.returncode}: {result.stderr.strip()}")
+        out = result.stdout
 
+    associations = [tuple(line.split("|")) for line in out.splitlines()]
+    return [assoc for assoc in associations if assoc[1] in supported]
 
-class JscConfiguration(Configuration, SlurmMixin):
+
+class JscConfiguration(SlurmMixin):
     job_script_template = Path(__file__).parent / "paraview-template.jinja2"
     temp_dir = Path(os.getenv("SCRATCH"), "trame-manager-jobs")
+    # The job template starts pvserver with --multi-clients, so it survives the probes
+    paraview_probe = True
+
+    @property
+    def cache_key(self) -> str:
+        # The home directory is shared between the systems, but the available partitions are not
+        return f"{super().cache_key}-{os.environ['SYSTEMNAME']}"
 
     def get_connection_address(self, server: ParaViewInstance) -> str:
         cluster = os.environ["SYSTEMNAME"]
+        if cluster not in INTERCONNECT_DOMAINS:
+            raise ValueError(f"Unknown {cluster = !r}")
 
-        if cluster == "juwelsbooster":
-            root_node = findall(r"jwb\[?(\d{4})", server.node_list)[0]
-            server.root_node = root_node
-            return f"jwb{root_node}i.juwels"
-
-        if cluster == "juwels":
-            root_node = findall(r"jwc(\d{2}n\[?\d{2,})", server.node_list)[0].replace("[", "")
-            server.root_node = root_node
-            return f"jwc{root_node}i.juwels"
-
-        if cluster == "jurecadc":
-            root_node = findall(r"jrc\[?(\d{4})", server.node_list)[0]
-            server.root_node = root_node
-            return f"jrc{root_node}i.jureca"
-
-        if cluster == "jusuf":
-            root_node = findall(r"jsfc\[?(\d{3,})", server.node_list)[0]
-            server.root_node = root_node
-            return f"jsfc{root_node}i.jusuf"
-
-        raise ValueError(f"Unknown {cluster = !r}")
+        # Pending jobs have no nodes yet
+        if server.root_node is None:
+            return ""
+        # pvserver is reached through the interconnect, whose host names end with `i`
+        return f"{server.root_node}i.{INTERCONNECT_DOMAINS[cluster]}"
 
     async def launch_paraview(self, options: ParaViewLaunchOptions) -> tuple[int, str]:
         options.cluster = os.environ["SYSTEMNAME"]  # Needed for Template
         return await super().launch_paraview(options)
 
+    async def launch_paraview_batch(self, batch: list[tuple[ParaViewLaunchOptions, int]]) -> list[dict]:
+        for options, _ in batch:
+            options.cluster = os.environ["SYSTEMNAME"]  # Needed for Template
+        return await super().launch_paraview_batch(batch)
+
     async def get_user_data(self) -> UserData:
-        username, associations = await asyncio.gather(
-            output("whoami"),
-            _get_account_partition_associations()
-        )
+        username = pwd.getpwuid(os.getuid()).pw_name
+        associations = await _get_account_partition_associations(self.slurm_timeout)
 
         accounts = {assoc[0] for assoc in associations}
         partitions = {assoc[1] for assoc in associations}
 
-        return UserData(user=username[1], accounts=list(accounts), partitions=list(partitions))
+        return UserData(user=username, accounts=list(accounts), partitions=list(partitions))
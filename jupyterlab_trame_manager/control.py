@@ -0,0 +1,184 @@
+"""
+Control channel to the `/api` endpoint of trame instances.
+
+The manager sends control messages, e.g., to connect an instance to a ParaView Server, as JSON in POST requests. Each
+instance has a L{ControlClient}, which keeps its connection open between messages, so only the first message pays for
+establishing it. A minimal HTTP/1.1 client is sufficient for this, as we only ever talk to trame on the same host.
+"""
+import asyncio
+import json
+import time
+from pathlib import Path
+
+
+__all__ = ["ControlClient", "ControlError"]
+
+
+class ControlError(RuntimeError):
+    """ The instance answered a control message with an error status """
+
+    def __init__(self, status: int, body: bytes):
+        super().__init__(f"trame answered with {status}: {body.decode(errors='replace')[:200]}")
+        self.status = status
+
+
+class _NoResponse(ConnectionError):
+    """ The connection was closed before any part of the response arrived """
+
+
+class ControlClient:
+    """
+    A keep-alive connection to the `/api` endpoint of one trame instance. Messages are sent one after another.
+    """
+
+    def __init__(
+            self, port: int | None = None, unix_socket: Path | str | None = None,
+            timeout: float = 10, retries: int = 3, backoff: float = 0.1,
+    ):
+        """
+        @param port: The port trame listens on
+        @param unix_socket: The unix socket trame listens on, instead of a port
+        @param timeout: Seconds to wait for a response, including establishing the connection
+        @param retries: Number of retries, if the connection fails before a message is sent
+        @param backoff: Seconds to wait before the first retry. The delay doubles with every retry
+        """
+        self.port = port
+        self.unix_socket = unix_socket
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self._lock = asyncio.Lock()
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def post(self, message: dict) -> tuple[dict | None, float]:
+        """
+        Send a control message. If the connection fails before the message is sent, it is retried with an exponential
+        backoff. Once it was sent, trame might have acted on it, so it is never sent again, e.g., after a timeout. The
+        only exception is a kept-alive connection, that trame closes without answering, as trame drops a message, when
+        it closes an idle connection. Then the message is sent once more on a new connection.
+
+        @param message: The message, that is sent as JSON
+        @return: The JSON response, if there is one, and the round-trip time in milliseconds
+        @raise ControlError: If trame answers with an error status
+        @raise OSError: If the connection fails, even after retrying, or breaks while waiting for the response
+        @raise asyncio.TimeoutError: If trame does not answer within the timeout
+        @raise asyncio.IncompleteReadError: If trame closes the connection before answering completely
+        """
+        body = json.dumps(message).encode()
+
+        async with self._lock:
+            while True:
+                start, reused = await self._send_retrying(body)
+                try:
+                    remaining = max(self.timeout - (time.perf_counter() - start), 0)
+                    status, response = await asyncio.wait_for(self._receive(), remaining)
+                    break
+                except _NoResponse:
+                    await self._disconnect()
+                    if not reused:
+                        raise
+                except BaseException:
+                    # The response might still arrive later and would be taken for the response of the next message
+                    await self._disconnect()
+                    raise
+
+        latency = (time.perf_counter() - start) * 1000
+        if status >= 400:
+            raise ControlError(status, response)
+
+        try:
+            return (json.loads(response) if response else None), latency
+        except ValueError:
+            return None, latency
+
+    async def _send_retrying(self, body: bytes) -> tuple[float, bool]:
+        """ @return: The time the message was sent at, see L{time.perf_counter}, and whether the connection was reused """
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                return start, await asyncio.wait_for(self._send(body), self.timeout)
+            except asyncio.TimeoutError:
+                await self._disconnect()
+                raise
+            except OSError:
+                await self._disconnect()
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _send(self, body: bytes) -> bool:
+        # A kept-alive connection, that trame has closed in the meantime, is reestablished before sending
+        if self._writer is not None and (self._writer.is_closing() or self._reader.at_eof()):
+            await self._disconnect()
+
+        reused = self._writer is not None
+        if self._writer is None:
+            if self.unix_socket is not None:
+                self._reader, self._writer = await asyncio.open_unix_connection(self.unix_socket)
+            else:
+                self._reader, self._writer = await asyncio.open_connection("localhost", self.port)
+
+        self._writer.write(
+            b"POST /api HTTP/1.1\r\n"
+            b"Host: localhost\r\n"
+            b"Content-Type: application/json\r\n"
+            b"Content-Length: %d\r\n"
+            b"\r\n" % len(body) + body
+        )
+        await self._writer.drain()
+        return reused
+
+    async def _receive(self) -> tuple[int, bytes]:
+        # Status line and headers
+        try:
+            status_line = await self._reader.readuntil(b"\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise
+            raise _NoResponse("trame closed the connection without answering") from e
+        except ConnectionResetError as e:
+            raise _NoResponse("trame reset the connection without answering") from e
+
+        status = int(status_line.split(b" ", 2)[1])
+        headers = {}
+        while (line := await self._reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        # Body
+        if headers.get("transfer-encoding") == "chunked":
+            response = b""
+            while size := int((await self._reader.readuntil(b"\r\n")).split(b";")[0], 16):
+                response += (await self._reader.readexactly(size + 2))[:-2]  # Strip the CRLF after each chunk
+            await self._reader.readuntil(b"\r\n")
+        elif "content-length" in headers:
+            response = await self._reader.readexactly(int(headers["content-length"]))
+        elif status < 200 or status in (204, 304):
+            response = b""
+        else:
+            # Without a length, the body ends when trame closes the connection
+            response = await self._reader.read()
+            headers["connection"] = "close"
+
+        if headers.get("connection") == "close":
+            await self._disconnect()
+
+        return status, response
+
+    async def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+    async def close(self):
+        """ Close the connection """
+        async with self._lock:
+            await self._disconnect()
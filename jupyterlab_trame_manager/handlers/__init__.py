@@ -1,16 +1,24 @@
 from jupyter_server.utils import url_path_join
 from jupyter_server.serverapp import ServerWebApplication
 
+from .events import EventsHandler
+from .metrics import MetricsHandler
 from .paraview import ParaViewHandler
-from .trame import TrameHandler, TrameActionHandler
+from .status import StatusHandler
+from .trame import TrameHandler, TrameActionHandler, TrameLogHandler
 from .user import UserHandler
 
 
 def setup_handlers(web_app: ServerWebApplication, model):
     base_url = url_path_join(web_app.settings["base_url"], "trame-manager")
     web_app.add_handlers(".*$", [
-        (url_path_join(base_url, "paraview"),        ParaViewHandler,    dict(model=model)),
-        (url_path_join(base_url, "trame"),           TrameHandler,       dict(model=model)),
-        (url_path_join(base_url, "trame", r"(\w+)"), TrameActionHandler, dict(model=model)),
-        (url_path_join(base_url, "user"),            UserHandler,        dict(model=model)),
+        (url_path_join(base_url, "paraview"),                  ParaViewHandler,    dict(model=model)),
+        (url_path_join(base_url, "trame"),                     TrameHandler,       dict(model=model)),
+        (url_path_join(base_url, "trame", r"(\w+)"),           TrameActionHandler, dict(model=model)),
+        (url_path_join(base_url, "trame", r"(\w+)", "log"),    TrameLogHandler,    dict(model=model)),
+        (url_path_join(base_url, "trame", r"(\w+)", r"(\w+)"), TrameActionHandler, dict(model=model)),
+        (url_path_join(base_url, "user"),                      UserHandler,        dict(model=model)),
+        (url_path_join(base_url, "events"),                    EventsHandler,      dict(model=model)),
+        (url_path_join(base_url, "status"),                    StatusHandler,      dict(model=model)),
+        (url_path_join(base_url, "metrics"),                   MetricsHandler,     dict(model=model)),
     ])
@@ -0,0 +1,40 @@
+from jupyter_server.base.handlers import JupyterHandler
+from jupyter_server.base.websocket import WebSocketMixin
+from tornado.web import HTTPError
+from tornado.websocket import WebSocketHandler, WebSocketClosedError
+
+from ..model import Model
+from .metrics import RequestMetricsMixin
+
+
+class EventsHandler(RequestMetricsMixin, WebSocketMixin, WebSocketHandler, JupyterHandler):
+    """
+    Push the change events of the Model to the browser, so it does not have to poll the other endpoints.
+    """
+    _model: Model
+
+    def initialize(self, model):
+        self._model = model
+
+    async def get(self, *args, **kwargs):
+        if self.current_user is None:
+            raise HTTPError(403)
+
+        response = super().get(*args, **kwargs)
+        if response is not None:
+            await response
+
+    def open(self, *args, **kwargs):
+        self._model.add_listener(self._send)
+
+    def on_message(self, message):
+        pass  # The channel is push-only
+
+    def on_close(self):
+        self._model.remove_listener(self._send)
+
+    def _send(self, event: str):
+        try:
+            self.write_message(event)
+        except WebSocketClosedError:
+            self._model.remove_listener(self._send)
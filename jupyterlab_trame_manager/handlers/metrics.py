@@ -0,0 +1,39 @@
+from jupyter_server.base.handlers import APIHandler
+from tornado.web import authenticated
+
+from ..model import Model
+
+
+class RequestMetricsMixin:
+    """
+    Records the number and duration of the requests of a handler into the metrics of the Model. The handler must store
+    the Model as `_model`.
+    """
+    _model: Model
+
+    def on_finish(self):
+        self._model.metrics.observe_request(
+            type(self).__name__, self.request.method, self.get_status(), self.request.request_time(),
+        )
+        super().on_finish()
+
+
+class MetricsHandler(RequestMetricsMixin, APIHandler):
+    """
+    Serve the metrics of the extension in the text format of Prometheus. Like the other endpoints, scrapes must be
+    authenticated, e.g., with `Authorization: token <token>`.
+    """
+    _model: Model
+
+    def initialize(self, model):
+        self._model = model
+
+    @authenticated
+    async def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.set_header("Cache-Control", "no-store")
+        await self.finish(self._model.metrics.render())
+
+    def finish(self, *args, **kwargs):
+        # APIHandler would answer with JSON and count the scrape as activity, which keeps idle servers from being culled
+        return super(APIHandler, self).finish(*args, **kwargs)
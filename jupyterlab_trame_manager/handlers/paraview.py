@@ -1,11 +1,11 @@
 import json
-from jupyter_server.base.handlers import APIHandler
 from tornado.web import authenticated
 
 from ..model import Model
+from .snapshot import SnapshotHandler
 
 
-class ParaViewHandler(APIHandler):
+class ParaViewHandler(SnapshotHandler):
     _model: Model
 
     def initialize(self, model):
@@ -13,14 +13,21 @@ class ParaViewHandler(APIHandler):
 
     @authenticated
     async def get(self):
-        await self.finish(
-            "[" + ",".join(server.model_dump_json(by_alias=True) for server in self._model.servers) + "]"
-        )  # ToDo: Proper Serialization
+        # Always answer from memory, even while Slurm hangs or fails. An outdated snapshot is refreshed in the background
+        self._model.refresh_outdated_servers()
+        if self._model.servers_age != float("inf"):
+            self.set_header("Age", str(int(self._model.servers_age)))
+        await self.finish_snapshot(self._model.snapshot("paraview"))
 
     @authenticated
     async def post(self):
         try:
-            return_code, message = await self._model.launch_paraview(json.loads(self.request.body))
+            body = json.loads(self.request.body)
+            if "elements" in body or "count" in body:
+                await self._launch_batch(body.get("elements", [body]))
+                return
+
+            return_code, message = await self._model.launch_paraview(body)
             self.set_status(200)
             await self.finish({"returnCode": return_code, "message": message})
 
@@ -28,3 +35,22 @@ class ParaViewHandler(APIHandler):
             self.log.error(str(e))
             self.set_status(400)
             await self.finish(str(e))
+
+    async def _launch_batch(self, elements: list[dict]):
+        """
+        Launch several servers, given as a list of launch options with an optional `count` each. The response contains
+        the status of each server in `elements`
+        """
+        statuses = await self._model.launch_paraview_batch(elements)
+        failed = [status for status in statuses if status["returnCode"] != 0]
+
+        message = f"Submitted {len(statuses) - len(failed)} of {len(statuses)} ParaView Servers"
+        for failure in dict.fromkeys(status["message"] for status in failed):
+            message += f"\n{failure}"
+
+        self.set_status(200)
+        await self.finish({
+            "returnCode": failed[0]["returnCode"] if failed else 0,
+            "message": message,
+            "elements": statuses,
+        })
@@ -0,0 +1,36 @@
+from jupyter_server.base.handlers import APIHandler
+from tornado.web import HTTPError
+
+from ..snapshot import Snapshot
+from .metrics import RequestMetricsMixin
+from .tracing import RequestTracingMixin
+
+
+class SnapshotHandler(RequestMetricsMixin, RequestTracingMixin, APIHandler):
+    """
+    Base class for handlers, which serve the list of a resource from a L{Snapshot}. Clients can revalidate the list with
+    `If-None-Match`, or fetch only the changes since a version with `?since=<version>`. The version of the response is
+    sent in the `X-Snapshot-Version` header.
+    """
+
+    async def finish_snapshot(self, snapshot: Snapshot):
+        since = self.get_query_argument("since", None)
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                raise HTTPError(400, f"Invalid version {since!r}")
+
+        # The ETag of a delta depends on the requested version as well
+        etag = snapshot.etag if since is None else f'{snapshot.etag[:-1]}-since-{since}"'
+        self.set_header("Etag", etag)
+        self.set_header("X-Snapshot-Version", str(snapshot.version))
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("Content-Type", "application/json")
+
+        if self.check_etag_header():
+            self.set_status(304)
+            await self.finish()
+            return
+
+        await self.finish(snapshot.body() if since is None else snapshot.delta(since))
@@ -0,0 +1,21 @@
+from jupyter_server.base.handlers import APIHandler
+from tornado.web import authenticated
+
+from ..model import Model
+from .metrics import RequestMetricsMixin
+from .tracing import RequestTracingMixin
+
+
+class StatusHandler(RequestMetricsMixin, RequestTracingMixin, APIHandler):
+    _model: Model
+
+    def initialize(self, model):
+        self._model = model
+
+    @authenticated
+    async def get(self):
+        await self.finish({
+            "state": self._model.state,
+            "apps": len(self._model.apps),
+            "servers": len(self._model.servers),
+        })
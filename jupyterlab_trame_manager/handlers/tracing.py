@@ -0,0 +1,25 @@
+from ..model import Model
+from ..tracing import Trace
+
+
+class RequestTracingMixin:
+    """
+    Traces the requests of a handler, if tracing or profiling is enabled in the Configuration, and sends the spans as
+    `Server-Timing` header. See L{jupyterlab_trame_manager.tracing}. The handler must store the Model as `_model`.
+    """
+    _model: Model
+    _trace: Trace | None = None
+
+    async def prepare(self, *args, **kwargs):
+        # The trace is set in the context of the request, which prepare shares with the method handling the request
+        self._trace = self._model.tracer.start(f"{type(self).__name__}.{self.request.method}")
+        return await super().prepare(*args, **kwargs)
+
+    def finish(self, *args, **kwargs):
+        if self._trace is not None:
+            header = self._model.tracer.finish(self._trace)
+            self._trace = None
+            if header is not None:
+                self.set_header("Server-Timing", header)
+
+        return super().finish(*args, **kwargs)
@@ -1,10 +1,23 @@
+import asyncio
+import time
 from jupyter_server.base.handlers import APIHandler
-from tornado.web import authenticated
+from tornado.iostream import StreamClosedError
+from tornado.web import HTTPError, authenticated
 
+from .. import logs
 from ..model import Model
+from .metrics import RequestMetricsMixin
+from .snapshot import SnapshotHandler
+from .tracing import RequestTracingMixin
 
 
-class TrameHandler(APIHandler):
+def _required(body: dict, field: str):
+    if field not in body:
+        raise ValueError(f"Missing {field!r} in request")
+    return body[field]
+
+
+class TrameHandler(SnapshotHandler):
     _model: Model
 
     def initialize(self, model):
@@ -12,50 +25,183 @@ class TrameHandler(APIHandler):
 
     @authenticated
     async def get(self):
-        await self.finish(
-            "[" + ",".join(app.model_dump_json(by_alias=True) for app in self._model.apps.values()) + "]"
-        )  # ToDo: Proper Serialization
+        # While the apps are still discovered, the list might be incomplete
+        self.set_header("X-Trame-Manager-State", self._model.state)
+        await self.finish_snapshot(self._model.snapshot("trame"))
 
     @authenticated
     async def post(self):
         try:
             body = self.get_json_body()
-            app_name = body.pop("appName")
+            app_name = _required(body, "appName")
+            del body["appName"]
             self.log.info(f"Launching new trame instance {app_name!r}")
 
             instance = await self._model.launch_trame(app_name, body)
             self.set_status(200)
             await self.finish(instance.model_dump_json(by_alias=True))
 
+        except KeyError as e:
+            self.log.error(e.args[0])
+            self.set_status(404)
+            await self.finish(e.args[0])
+
         except Exception as e:
             self.log.error(str(e))
             self.set_status(400)
             await self.finish(str(e))
 
 
-class TrameActionHandler(APIHandler):
+class TrameActionHandler(RequestMetricsMixin, RequestTracingMixin, APIHandler):
+    """
+    Actions on trame instances. An instance is either addressed by its UUID in the URL, i.e., `trame/<uuid>/<action>`,
+    or by `appName` and `instanceName` in the body of `trame/<action>`. ParaView Servers are addressed by `jobId`, or
+    by `serverName` if it is unique.
+
+    Several instances can be connected or disconnected at once, by passing their `uuids`, or only the `appName` for
+    all instances of an app, to `trame/connect` or `trame/disconnect`. The response contains the result for each
+    instance.
+    """
     _model: Model
 
+    actions = ("connect", "disconnect", "stop")
+
     def initialize(self, model):
         self._model = model
 
     @authenticated
-    async def post(self, action: str):
+    async def post(self, *path: str):
+        *uuid, action = path
         try:
-            app_name = self.get_json_body()["appName"]
-            instance_name = self.get_json_body()["instanceName"]
+            if action == "discover" and not uuid:
+                changed = await self._model.discover_apps()
+                self.set_status(200)
+                await self.finish({"changed": changed, "apps": self._model.app_names})
+                return
+
+            if action not in self.actions:
+                raise KeyError(f"Unknown action {action!r}")
+
+            body = self.get_json_body() or {}
+            if not uuid and action in ("connect", "disconnect") and "instanceName" not in body:
+                await self._post_many(action, body)
+                return
+
+            if uuid:
+                instance = self._model.get_trame(uuid[0])
+            else:
+                instance = self._model.find_trame(_required(body, "appName"), _required(body, "instanceName"))
 
             response = None
             if action == "connect":
-                server_name = self.get_json_body()["serverName"]
-                response = await self._model.connect_to_backend(app_name, instance_name, server_name)
+                response = await self._model.connect_to_backend(instance.uuid, self._job_id(body))
             elif action == "disconnect":
-                await self._model.disconnect(app_name, instance_name)
+                response = await self._model.disconnect(instance.uuid)
+            elif action == "stop":
+                await self._model.stop_trame(instance.uuid)
 
             self.set_status(200)
             await self.finish(response)
 
+        except KeyError as e:
+            self.log.error(e.args[0])
+            self.set_status(404)
+            await self.finish(e.args[0])
+
         except Exception as e:
             self.log.error(str(e))
             self.set_status(400)
             await self.finish(str(e))
+
+    def _job_id(self, body: dict) -> str:
+        return body.get("jobId") or self._model.find_server(_required(body, "serverName")).job_id
+
+    async def _post_many(self, action: str, body: dict):
+        # Several instances by their UUIDs, or all instances of an app
+        if "uuids" in body:
+            uuids = body["uuids"]
+        else:
+            uuids = [instance.uuid for instance in self._model.get_app(_required(body, "appName")).instances]
+
+        if action == "connect":
+            results = await self._model.connect_many(uuids, self._job_id(body))
+        else:
+            results = await self._model.disconnect_many(uuids)
+
+        self.set_status(200)
+        await self.finish({"results": results})
+
+
+class TrameLogHandler(RequestMetricsMixin, RequestTracingMixin, APIHandler):
+    """
+    Serves the log of a trame instance from a byte offset. The `X-Log-Offset` header contains the offset of the returned
+    data, which is later than requested, if the data was already rotated out of the log. `X-Log-End` contains the end of
+    the log at the time of the request. With `follow=1`, the response does not stop at the end of the log, but streams
+    appended data until the instance is removed, the client disconnects or L{follow_timeout} expires. Clients continue
+    after the timeout with a new request from the offset they have received up to.
+    """
+    _model: Model
+
+    # Bytes returned by default, if the log is not followed
+    default_limit = 2**20
+
+    # Interval in seconds, in which a followed log is checked for new data
+    follow_interval = 0.5
+
+    # Seconds, after which following a log ends
+    follow_timeout = 3600
+
+    def initialize(self, model):
+        self._model = model
+        self._disconnected = asyncio.Event()
+
+    def on_connection_close(self):
+        # Writes only fail once the client has gone, so an idle log would be followed forever otherwise
+        self._disconnected.set()
+        super().on_connection_close()
+
+    @authenticated
+    async def get(self, uuid: str):
+        try:
+            offset = int(self.get_query_argument("offset", "0"))
+            limit = int(self.get_query_argument("limit", str(self.default_limit)))
+            follow = self.get_query_argument("follow", "0").lower() in ("1", "true")
+            start, end = self._model.trame_log_range(uuid)
+        except KeyError as e:
+            raise HTTPError(404, str(e))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+        offset = min(max(offset, start), end)
+        self.set_header("Content-Type", "text/plain; charset=utf-8")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Log-Offset", str(offset))
+        self.set_header("X-Log-End", str(end))
+
+        # Only a single chunk is held in memory at a time
+        deadline = time.monotonic() + self.follow_timeout
+        try:
+            while (time.monotonic() < deadline) if follow else (limit > 0):
+                size = logs.CHUNK_SIZE if follow else min(limit, logs.CHUNK_SIZE)
+                offset, chunk = await self._model.read_trame_log(uuid, offset, size)
+
+                if chunk:
+                    self.write(chunk)
+                    await self.flush()
+                    offset += len(chunk)
+                    limit -= len(chunk)
+                elif follow:
+                    try:
+                        await asyncio.wait_for(self._disconnected.wait(), self.follow_interval)
+                    except asyncio.TimeoutError:
+                        continue
+                    return  # The client disconnected
+                else:
+                    break
+
+        except KeyError:
+            pass  # The instance was removed while following its log
+        except StreamClosedError:
+            return  # The client disconnected
+
+        await self.finish()
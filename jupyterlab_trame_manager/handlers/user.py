@@ -2,9 +2,11 @@ from jupyter_server.base.handlers import APIHandler
 from tornado.web import authenticated
 
 from ..model import Model
+from .metrics import RequestMetricsMixin
+from .tracing import RequestTracingMixin
 
 
-class UserHandler(APIHandler):
+class UserHandler(RequestMetricsMixin, RequestTracingMixin, APIHandler):
     _model: Model
 
     def initialize(self, model):
@@ -0,0 +1,200 @@
+"""
+Slurm hostlists, e.g., `jwb[0001-0004,0010],jwc00n[001-002]`.
+
+A hostlist is a comma separated list of host expressions. Each expression may contain several bracketed groups of
+numbers and ranges, which are expanded like a cartesian product, e.g., `rack[1-2]n[01-02]` is `rack1n01`, `rack1n02`,
+`rack2n01` and `rack2n02`. Leading zeros of a range determine the width of its numbers.
+
+Parsed hostlists are cached by their string, as the same lists are parsed on every listing of the jobs. L{first} and
+L{count} never expand the ranges, and L{first} only parses the beginning of a hostlist, so both are cheap even for jobs
+with thousands of nodes.
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+
+__all__ = ["parse", "iterate", "expand", "first", "count", "compress"]
+
+
+# Top-level expressions, i.e., split at commas outside of brackets
+_EXPRESSION = re.compile(r"(?:[^,\[\]]|\[[^\[\]]*\])+")
+# A well-formed hostlist, i.e., expressions separated by single commas
+_HOSTLIST = re.compile(rf"{_EXPRESSION.pattern}(?:,{_EXPRESSION.pattern})*")
+# The literal text and bracketed groups of an expression
+_GROUP = re.compile(r"([^\[]*)(?:\[([^\]]*)\])?")
+# A single number or range within a group
+_RANGE = re.compile(r"\s*(\d+)(?:-(\d+))?\s*")
+# A host name with a trailing number, which can be compressed into a range
+_NUMBERED = re.compile(r"(.*?)(\d+)$")
+
+# A range of numbers: its first and last number and the width, to which the numbers are padded with zeros
+Range = tuple[int, int, int]
+# An expression as a sequence of literal text and groups of ranges
+Expression = tuple[str | tuple[Range, ...], ...]
+
+
+def _parse_group(group: str) -> tuple[Range, ...]:
+    ranges = []
+    for part in group.split(","):
+        match = _RANGE.fullmatch(part)
+        if match is None:
+            raise ValueError(f"Invalid range {part!r} in hostlist")
+
+        start, end = match.group(1), match.group(2) or match.group(1)
+        width = len(start) if start.startswith("0") else 0
+        if int(end) < int(start):
+            raise ValueError(f"Invalid range {part!r} in hostlist")
+        ranges.append((int(start), int(end), width))
+
+    return tuple(ranges)
+
+
+@lru_cache(maxsize=1024)
+def parse(hostlist: str) -> tuple[Expression, ...]:
+    """
+    @param hostlist: The hostlist, e.g., as reported by Slurm
+    @return: The parsed expressions of the hostlist
+    @raise ValueError: If the hostlist is malformed
+    """
+    hostlist = hostlist.strip()
+    if not hostlist:
+        return ()
+    if _HOSTLIST.fullmatch(hostlist) is None:
+        raise ValueError(f"Invalid hostlist {hostlist!r}")
+
+    expressions = []
+    for expression in _EXPRESSION.findall(hostlist):
+        parts = []
+        for literal, group in _GROUP.findall(expression):
+            if literal:
+                parts.append(literal)
+            if group:
+                parts.append(_parse_group(group))
+        expressions.append(tuple(parts))
+
+    return tuple(expressions)
+
+
+def _iterate(parts: Expression, prefix: str = "") -> Iterator[str]:
+    if not parts:
+        yield prefix
+        return
+
+    part, rest = parts[0], parts[1:]
+    if isinstance(part, str):
+        yield from _iterate(rest, prefix + part)
+        return
+
+    for start, end, width in part:
+        for number in range(start, end + 1):
+            yield from _iterate(rest, f"{prefix}{number:0{width}d}")
+
+
+def iterate(hostlist: str) -> Iterator[str]:
+    """
+    Iterate over the hosts of a hostlist, without expanding it all at once.
+
+    @param hostlist: The hostlist
+    @return: The hosts in order
+    """
+    for expression in parse(hostlist):
+        yield from _iterate(expression)
+
+
+@lru_cache(maxsize=256)
+def expand(hostlist: str) -> tuple[str, ...]:
+    """
+    @param hostlist: The hostlist
+    @return: All hosts of the hostlist
+    """
+    return tuple(iterate(hostlist))
+
+
+@lru_cache(maxsize=1024)
+def first(hostlist: str) -> str | None:
+    """
+    @param hostlist: The hostlist
+    @return: The first host, i.e., the root node of a job, or None if the hostlist is empty
+    @raise ValueError: If the first host is malformed. The rest of the hostlist is not parsed
+    """
+    hostlist = hostlist.strip()
+    if not hostlist:
+        return None
+
+    expression = _EXPRESSION.match(hostlist)
+    if expression is None:
+        raise ValueError(f"Invalid hostlist {hostlist!r}")
+
+    # Only the first range of each group is needed
+    parts = []
+    for literal, group in _GROUP.findall(expression.group()):
+        if literal:
+            parts.append(literal)
+        if group:
+            parts.append(_parse_group(group.partition(",")[0]))
+
+    return next(_iterate(tuple(parts)))
+
+
+@lru_cache(maxsize=1024)
+def count(hostlist: str) -> int:
+    """
+    @param hostlist: The hostlist
+    @return: The number of hosts in the hostlist
+    """
+    total = 0
+    for expression in parse(hostlist):
+        hosts = 1
+        for part in expression:
+            if not isinstance(part, str):
+                hosts *= sum(end - start + 1 for start, end, _ in part)
+        total += hosts
+
+    return total
+
+
+def compress(hosts: Iterable[str]) -> str:
+    """
+    Compress hosts into a hostlist. Hosts, which only differ in their trailing number, are combined into ranges, e.g.,
+    `jwb0001`, `jwb0002` and `jwb0004` become `jwb[0001-0002,0004]`. The order of the hosts is kept, as far as
+    possible.
+
+    @param hosts: The host names
+    @return: The hostlist
+    """
+    # Numbers by the prefix and width of their hosts, in the order of their first appearance
+    groups: dict[tuple[str, int], list[int] | None] = {}
+    for host in hosts:
+        match = _NUMBERED.fullmatch(host)
+        if match is None:
+            groups.setdefault((host, -1), None)
+            continue
+
+        prefix, digits = match.groups()
+        width = len(digits) if digits.startswith("0") else 0
+        groups.setdefault((prefix, width), []).append(int(digits))
+
+    expressions = []
+    for (prefix, width), numbers in groups.items():
+        if numbers is None:
+            expressions.append(prefix)
+            continue
+
+        ranges = []
+        for number in sorted(set(numbers)):
+            if ranges and number == ranges[-1][1] + 1:
+                ranges[-1][1] = number
+            else:
+                ranges.append([number, number])
+
+        if len(ranges) == 1 and ranges[0][0] == ranges[0][1]:
+            expressions.append(f"{prefix}{ranges[0][0]:0{width}d}")
+            continue
+
+        group = ",".join(
+            f"{start:0{width}d}" if start == end else f"{start:0{width}d}-{end:0{width}d}" for start, end in ranges
+        )
+        expressions.append(f"{prefix}[{group}]")
+
+    return ",".join(expressions)
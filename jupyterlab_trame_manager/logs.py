@@ -0,0 +1,98 @@
+"""
+Size-limited logs of trame instances.
+
+trame writes its output directly into the log file through an inherited file descriptor, so the file can't be renamed
+to rotate it. Instead, the log is copied to `<log>.1` and truncated, once it exceeds a size. Because the descriptor is
+opened in append mode, trame continues writing at the start of the truncated file. Output written while the log is
+copied might be lost.
+
+Positions in a log are absolute byte offsets since the instance was started, i.e., they include the bytes that were
+rotated out of the file. This allows clients to fetch only new data, regardless of rotations in the meantime.
+"""
+import os
+import shutil
+from pathlib import Path
+
+
+__all__ = ["CHUNK_SIZE", "backup_file", "rotate", "start", "end", "read"]
+
+
+# Bytes read from a log at once
+CHUNK_SIZE = 64 * 1024
+
+
+def backup_file(path: Path) -> Path:
+    """ The file, which contains the previous part of a rotated log """
+    return path.with_name(path.name + ".1")
+
+
+def _size(path: Path) -> int:
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+def rotate(path: Path, max_bytes: int) -> int:
+    """
+    Rotate a log, if it exceeds the given size.
+
+    @param path: The log file
+    @param max_bytes: The size in bytes, above which the log is rotated
+    @return: The number of bytes rotated out of the log file, i.e., 0 if it was not rotated
+    """
+    if _size(path) <= max_bytes:
+        return 0
+
+    with open(path, "rb") as source, open(backup_file(path), "wb") as backup:
+        shutil.copyfileobj(source, backup)
+        rotated = backup.tell()
+        os.truncate(path, 0)
+
+    return rotated
+
+
+def start(path: Path, rotated: int) -> int:
+    """
+    @param path: The log file
+    @param rotated: The number of bytes rotated out of the log file so far
+    @return: The offset of the oldest byte, that is still available
+    """
+    return rotated - _size(backup_file(path)) if rotated else 0
+
+
+def end(path: Path, rotated: int) -> int:
+    """
+    @param path: The log file
+    @param rotated: The number of bytes rotated out of the log file so far
+    @return: The offset after the newest byte of the log
+    """
+    return rotated + _size(path)
+
+
+def read(path: Path, rotated: int, offset: int, size: int = CHUNK_SIZE) -> tuple[int, bytes]:
+    """
+    Read a chunk of a log. Never reads more than the given size into memory.
+
+    @param path: The log file
+    @param rotated: The number of bytes rotated out of the log file so far
+    @param offset: The offset to read from. If the data at this offset was already discarded, the oldest available data
+        is read instead
+    @param size: The maximum number of bytes to read
+    @return: The offset of the returned data and the data itself. The data is empty, if there is no data at the offset
+    """
+    offset = max(offset, start(path, rotated))
+
+    if offset < rotated:
+        file, position = backup_file(path), offset - (rotated - _size(backup_file(path)))
+        # Don't read across the end of the backup, the remaining data follows in the log file
+        size = min(size, rotated - offset)
+    else:
+        file, position = path, offset - rotated
+
+    try:
+        with open(file, "rb") as log:
+            log.seek(position)
+            return offset, log.read(size)
+    except FileNotFoundError:
+        return offset, b""
@@ -0,0 +1,278 @@
+"""
+Metrics of the extension in the text format of Prometheus, served on `/trame-manager/metrics`.
+
+Recording is cheap on the hot paths: the series of a metric are created on first use, afterwards counting a request or
+observing a duration only adds to the numbers of an existing series. Values, which can be read from the Model at any
+time, like the number of running instances or the traffic through the proxy, are not recorded at all, but collected
+when the metrics are scraped, see L{Registry.add_collector}.
+"""
+from bisect import bisect_left
+from typing import Callable
+
+from .cmd import CommandResult
+
+
+__all__ = ["Registry", "Counter", "Gauge", "Histogram", "Metrics", "DEFAULT_BUCKETS"]
+
+
+# Upper bounds in seconds of the buckets of a histogram, if no others are given
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value: str) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+
+def _escape_help(value: str) -> str:
+    # Unlike label values, the documentation keeps its double quotes
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    labels = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last bucket counts values above all bounds
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    """
+    A metric with a series for each combination of label values.
+    """
+    type: str
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        """
+        @param name: The name of the metric, e.g., `trame_manager_http_requests_total`
+        @param documentation: The help text of the metric
+        @param labels: The names of the labels of each series
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._series: dict[tuple, _Value | _Buckets] = {}
+
+    def _create(self) -> _Value | _Buckets:
+        return _Value()
+
+    def labels(self, *values):
+        """
+        @param values: The values of the labels, in the order of their names
+        @return: The series with these label values, which is created on first use
+        """
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects the labels {self.label_names}, got {values}")
+            series = self._series[values] = self._create()
+        return series
+
+    def clear(self):
+        """ Remove all series, e.g., before a collector sets the current values """
+        self._series.clear()
+
+    def render(self, lines: list[str]):
+        lines.append(f"# HELP {self.name} {_escape_help(self.documentation)}")
+        lines.append(f"# TYPE {self.name} {self.type}")
+        for values, series in self._series.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} {_format_value(series.value)}")
+
+
+class Counter(_Metric):
+    """ A value, that only increases """
+    type = "counter"
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """ A value, that may increase and decrease """
+    type = "gauge"
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    """ The distribution of observed values, e.g., durations in seconds """
+    type = "histogram"
+
+    def __init__(
+            self, name: str, documentation: str, labels: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        """
+        @param buckets: The upper bounds of the buckets in ascending order
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _create(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def render(self, lines: list[str]):
+        lines.append(f"# HELP {self.name} {_escape_help(self.documentation)}")
+        lines.append(f"# TYPE {self.name} {self.type}")
+        for values, series in self._series.items():
+            total = 0
+            for bound, count in zip((*self.buckets, float("inf")), series.counts):
+                total += count
+                labels = _format_labels(self.label_names, values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {total}")
+
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{labels} {total}")
+
+
+class Registry:
+    """
+    A set of metrics, which are rendered together.
+    """
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if any(other.name == metric.name for other in self._metrics):
+            raise ValueError(f"Metric {metric.name!r} is already registered")
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+            self, name: str, documentation: str, labels: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """
+        Register a callback, which updates metrics right before they are rendered, e.g., to set gauges from the current
+        state instead of tracking every change.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        @return: All metrics in the text format of Prometheus
+        """
+        for collector in self._collectors:
+            collector()
+
+        lines = []
+        for metric in self._metrics:
+            metric.render(lines)
+        return "\n".join(lines) + "\n"
+
+
+class Metrics(Registry):
+    """
+    The metrics of the extension. The Model collects the gauges and the traffic through the proxy when scraped.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.http_requests = self.counter(
+            "trame_manager_http_requests_total", "Requests to the handlers of the extension",
+            ("handler", "method", "code"),
+        )
+        self.http_request_duration = self.histogram(
+            "trame_manager_http_request_duration_seconds", "Duration of the requests to the handlers of the extension",
+            ("handler", "method"),
+        )
+
+        self.command_duration = self.histogram(
+            "trame_manager_command_duration_seconds",
+            "Duration of commands, e.g. squeue or sbatch, including waiting for a free slot", ("executable",),
+        )
+        self.command_failures = self.counter(
+            "trame_manager_command_failures_total", "Commands, which exited with an error or timed out",
+            ("executable", "reason"),
+        )
+
+        self.trame_launch_duration = self.histogram(
+            "trame_manager_trame_launch_seconds", "Time from launching a trame instance until it accepts connections",
+            ("app", "source"),
+        )
+        self.trame_launch_failures = self.counter(
+            "trame_manager_trame_launch_failures_total", "trame instances, which never accepted connections", ("app",),
+        )
+
+        self.trame_instances = self.gauge(
+            "trame_manager_trame_instances", "Running trame instances", ("app", "state"),
+        )
+        self.paraview_jobs = self.gauge(
+            "trame_manager_paraview_servers", "Queued ParaView Servers", ("state", "ready"),
+        )
+
+        self.proxy_bytes = self.counter(
+            "trame_manager_proxy_bytes_total", "Bytes proxied to and from a trame instance",
+            ("app", "instance", "direction"),
+        )
+        self.proxy_connections = self.counter(
+            "trame_manager_proxy_connections_total", "Requests and websockets proxied to a trame instance",
+            ("app", "instance", "kind"),
+        )
+        self.proxy_open_websockets = self.gauge(
+            "trame_manager_proxy_open_websockets", "Open websockets to a trame instance", ("app", "instance"),
+        )
+
+    def observe_request(self, handler: str, method: str, code: int, duration: float):
+        self.http_requests.labels(handler, method, code).inc()
+        self.http_request_duration.labels(handler, method).observe(duration)
+
+    def observe_command(self, result: CommandResult):
+        """ An observer of L{jupyterlab_trame_manager.cmd}, see L{jupyterlab_trame_manager.cmd.add_observer} """
+        executable = result.executable
+        self.command_duration.labels(executable).observe(result.duration)
+        if result.returncode is None:
+            self.command_failures.labels(executable, "timeout").inc()
+        elif result.returncode != 0:
+            self.command_failures.labels(executable, "exit").inc()
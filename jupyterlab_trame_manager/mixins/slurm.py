@@ -1,10 +1,32 @@
+import asyncio
 from abc import ABC, abstractmethod
-from jinja2 import Template
 from pathlib import Path
 from tempfile import mkdtemp
 import os
+import re
 from ..configuration import Configuration, ParaViewLaunchOptions, ParaViewInstance
-from ..cmd import output
+from .. import hostlist
+from ..tracing import span
+from ..slurm_backends import SlurmBackend, SlurmCliBackend
+
+
+# The line, in which pvserver reports the port it listens on
+_ACCEPTING_CONNECTIONS = re.compile(rb"Accepting connection\(s\): \S+:(\d+)")
+
+# Compiled job script templates (jinja2.Template) by their path, with the modification time of the file they were
+# compiled from
+_templates: dict[Path, tuple[int, object]] = {}
+
+
+def _load_template(path: Path):
+    # Jinja is only needed to launch ParaView Servers, so it is imported on first use
+    from jinja2 import Template
+
+    mtime = path.stat().st_mtime_ns
+    cached = _templates.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _templates[path] = (mtime, Template(path.read_text()))
+    return cached[1]
 
 
 class SlurmMixin(Configuration, ABC):
@@ -18,28 +40,88 @@ class SlurmMixin(Configuration, ABC):
     # The directory, where new temporary folders for the jobs should be created
     temp_dir: Path
 
+    # Seconds after which a Slurm command is considered as hung and killed
+    slurm_timeout: float = 30
+
+    # How Slurm is accessed. SlurmCliBackend forks squeue and sbatch, SlurmRestBackend talks to slurmrestd
+    slurm_backend: type[SlurmBackend] = SlurmCliBackend
+
+    # The URL and API version of slurmrestd, and the lifespan in seconds of the tokens requested for it
+    slurmrestd_url: str = "http://localhost:6820"
+    slurmrestd_api_version: str = "v0.0.40"
+    slurmrestd_token_lifespan: int = 1800
+
+    # The file in the directory of a job, in which the job script may write the port pvserver listens on. The tasks of
+    # job arrays write `<port_file>.<task id>`. Otherwise, the port is read from the output of pvserver
+    port_file: str = "port"
+
+    def __init__(self, logger):
+        super().__init__(logger)
+        self.slurm = self.slurm_backend(self)
+        # The ports of the running jobs by their job id, once they are known
+        self._ports: dict[str, int] = {}
+
+    def read_port(self, job_id: str, std_out: str) -> int | None:
+        """
+        Find the port, that the pvserver of a job listens on, in its port file or its output. This is blocking.
+
+        @param job_id: The id of the job
+        @param std_out: The file of the standard output of the job
+        @return: The port, or None if it is not known (yet)
+        """
+        if not std_out:
+            return None
+
+        array_job_id, _, task = job_id.partition("_")
+        std_out = Path(std_out.replace("%a", task).replace("%A", array_job_id))
+
+        try:
+            return int((std_out.parent / (f"{self.port_file}.{task}" if task else self.port_file)).read_text())
+        except (OSError, ValueError):
+            pass
+
+        # pvserver reports the port right after its start, so the beginning of the output is sufficient
+        try:
+            with open(std_out, "rb") as output:
+                match = _ACCEPTING_CONNECTIONS.search(output.read(64 * 1024))
+        except OSError:
+            return None
+        return int(match.group(1)) if match else None
+
+    async def _update_ports(self, jobs: list[dict]):
+        self._ports = {job["job_id"]: self._ports[job["job_id"]] for job in jobs if job["job_id"] in self._ports}
+
+        pending = [job for job in jobs if job["state"] == "RUNNING" and job["job_id"] not in self._ports]
+        loop = asyncio.get_running_loop()
+        ports = await asyncio.gather(*(
+            loop.run_in_executor(None, self.read_port, job["job_id"], job["std_out"]) for job in pending
+        ))
+
+        for job, port in zip(pending, ports):
+            if port is not None:
+                self._ports[job["job_id"]] = port
+
     async def get_running_servers(self) -> list[ParaViewInstance]:
-        _, out = await output(
-            "squeue",
-            "--me", "--noheader",
-            "--Format='Name:;,Account:;,Partition:;,NumNodes:;,TimeUsed:;,TimeLimit:;,State:;,NodeList'"
-        )
+        jobs = await self.slurm.get_jobs()
+        await self._update_ports(jobs)
 
         servers = []
-        for server in out.splitlines():
-            self.log.info(f"Found Server: {server}")
-            name, partition, account, nodes, time_used, time_limit, state, node_list = server.split(";")
-
-            server = ParaViewInstance(
-                name=name,
-                account=account,
-                partition=partition,
-                nodes=int(nodes),
-                time_used=time_used,
-                time_limit=time_limit,
-                state=state,
-                connection_address="",
-            )
+        for job in jobs:
+            del job["std_out"]
+            job["port"] = self._ports.get(job["job_id"])
+
+            # The tasks of a job array share its name, so `{index}` becomes by the task id, see launch_paraview_batch
+            _, _, task = job["job_id"].partition("_")
+            if task:
+                job["name"] = job["name"].replace("{index}", task)
+
+            # Pending jobs have no nodes yet
+            try:
+                job["root_node"] = hostlist.first(job["node_list"])
+            except ValueError as e:
+                self.log.warning(f"Job {job['job_id']}: {e}")
+
+            server = ParaViewInstance(**job, connection_address="")
             server.connection_address = self.get_connection_address(server)
             servers.append(server)
 
@@ -48,26 +130,83 @@ class SlurmMixin(Configuration, ABC):
     @abstractmethod
     def get_connection_address(self, server: ParaViewInstance) -> str:
         """
-        Generate the Address where a trame Instance can connect to the ParaView Server
+        Generate the Address where a trame Instance can connect to the ParaView Server. pvserver runs on the first node
+        of the job, which is `server.root_node`, or None while the job is pending.
         """
         pass
 
-    async def launch_paraview(self, options: ParaViewLaunchOptions) -> tuple[int, str]:
-        self.log.info(f"Launching ParaView with {options!r}")
+    def write_job_script(self, options: ParaViewLaunchOptions, array: bool = False) -> tuple[Path, Path]:
+        """
+        Render the job script into a new directory, which will also contain the output of the job. This is blocking,
+        see L{_write_job_script}.
 
+        @param options: The options of the job
+        @param array: Whether the job is submitted as a job array, whose tasks need separate output files
+        @return: The path of the job script and its directory
+        """
         # Create a tempfile and write the SLURM Config and log files into it
         self.temp_dir.mkdir(parents=True, exist_ok=True)
 
         job_dir = Path(mkdtemp(prefix=os.getenv("USER"), dir=self.temp_dir))
         job_path = (job_dir / "paraview.job").resolve()
 
-        template = Template(self.job_script_template.read_text())
+        template = _load_template(self.job_script_template)
         template_options = options.model_dump()
-        template_options["stdout"] = (job_dir / "stdout").resolve()
-        template_options["stderr"] = (job_dir / "stderr").resolve()
+        suffix = ".%a" if array else ""  # Replaced by the task id
+        template_options["stdout"] = (job_dir / f"stdout{suffix}").resolve()
+        template_options["stderr"] = (job_dir / f"stderr{suffix}").resolve()
 
         with open(job_path, "w") as job_file:
             job_file.write(template.render(template_options))
 
         self.log.info(f"Job files can be found in {str(job_dir)!r}")
-        return await output("sbatch", str(job_path), logger=self.log)
+        return job_path, job_dir
+
+    async def _write_job_script(self, options: ParaViewLaunchOptions, array: bool = False) -> tuple[Path, Path]:
+        # Rendering and writing the job script does file I/O, so we don't block the event loop with it
+        with span("slurm.write_job_script"):
+            return await asyncio.get_running_loop().run_in_executor(None, self.write_job_script, options, array)
+
+    async def launch_paraview(self, options: ParaViewLaunchOptions) -> tuple[int, str]:
+        self.log.info(f"Launching ParaView with {options!r}")
+        job_path, job_dir = await self._write_job_script(options)
+        return await self.slurm.submit(job_path, job_dir, options)
+
+    async def launch_paraview_batch(self, batch: list[tuple[ParaViewLaunchOptions, int]]) -> list[dict]:
+        """
+        Submit the servers with the same options as one job array with a single `sbatch` call. The task ids are the
+        indices within the whole batch, so names with `{index}` stay unique across the arrays.
+        """
+        elements = []
+        first = 0
+        for options, count in batch:
+            indices = range(first, first + count)
+            first += count
+
+            # Single jobs are no array, so they get their final name right away
+            if count == 1:
+                options = options.model_copy(update={"name": options.name.replace("{index}", str(indices[0]))})
+            array = f"{indices[0]}-{indices[-1]}" if count > 1 else None
+
+            self.log.info(f"Launching {count} ParaView Servers with {options!r}")
+            job_path, job_dir = await self._write_job_script(options, array=array is not None)
+            return_code, message = await self.slurm.submit(job_path, job_dir, options, array=array)
+
+            match = re.search(r"Submitted batch job (\d+)", message) if return_code == 0 else None
+            for index in indices:
+                job_id = None
+                if match is not None:
+                    job_id = f"{match.group(1)}_{index}" if array else match.group(1)
+
+                elements.append({
+                    "name": options.name.replace("{index}", str(index)),
+                    "jobId": job_id,
+                    "returnCode": return_code,
+                    "message": message.strip(),
+                })
+
+        return elements
+
+    async def close(self):
+        await super().close()
+        await self.slurm.close()
@@ -1,22 +1,30 @@
 import asyncio
+import inspect
 import json
 import logging
 import os
+import time
 from importlib import import_module
+from pathlib import Path
 from jupyter_server.serverapp import ServerApp
-from jupyter_server.utils import url_path_join
-from socket import socket
-from tornado.httpclient import AsyncHTTPClient
+from typing import Awaitable, Callable
+from tornado.ioloop import IOLoop, PeriodicCallback
 
 from .configuration import *
 from .configuration import TrameLaunchOptions
+from . import cmd, logs
+from .control import ControlClient
+from .metrics import Metrics
+from .pool import WarmPool
+from .probe import ServerProber
+from .snapshot import Snapshot
+from .store import InstanceStore
+from .tracing import Tracer, span, traced
 
 
-def _next_open_port() -> int:
-    # We let socket determine an available open port
-    with socket() as s:
-        s.bind(("", 0))
-        return s.getsockname()[1]
+def _error_message(error: Exception) -> str:
+    # The message of a KeyError is its key, which str() would quote
+    return error.args[0] if isinstance(error, KeyError) and error.args else str(error)
 
 
 class Model:
@@ -31,39 +39,398 @@ class Model:
 
     _configuration: Configuration
     _apps: dict[str, TrameApp]
+    _instances: dict[str, TrameInstance]
+    _instance_names: dict[tuple[str, str], TrameInstance]
+    _launching: set[tuple[str, str]]
+    _pools: dict[str, WarmPool]
     _servers: list[ParaViewInstance]
+    _servers_by_job_id: dict[str, ParaViewInstance]
+    _servers_updated: float
+    _servers_refresh: asyncio.Future | None
+    _servers_refresh_started: float
+    _state: str
+    _ready: asyncio.Event
+    _listeners: set[Callable[[str], None]]
+    _user_data: UserData | None
+    _user_data_updated: float
+    _user_data_refresh: asyncio.Future | None
+    _snapshots: dict[str, Snapshot]
+    _store: InstanceStore | None
+    _prober: ServerProber | None
+    _periodic_callbacks: list[PeriodicCallback]
+    _closed: bool
+    metrics: Metrics
+    tracer: Tracer
 
     def __init__(self, server_app: ServerApp):
         super().__init__()
 
+        self._state = "loading"
+        self._ready = asyncio.Event()
+        self._listeners = set()
+        self._user_data = None
+        self._user_data_updated = -float("inf")
+        self._user_data_refresh = None
         self._apps = dict()
+        self._instances = dict()
+        self._instance_names = dict()
+        self._launching = set()
+        self._pools = dict()
         self._servers = []
+        self._servers_by_job_id = dict()
+        self._servers_updated = -float("inf")
+        self._servers_refresh = None
+        self._servers_refresh_started = -float("inf")
         self._server_app = server_app
+        self._periodic_callbacks = []
+        self._closed = False
+        self._snapshots = {
+            "trame": Snapshot("trame", self._serialize_apps),
+            "paraview": Snapshot("paraview", self._serialize_servers),
+        }
+
+        self.metrics = Metrics()
+        self.metrics.add_collector(self._collect_metrics)
+        cmd.add_observer(self.metrics.observe_command)
 
         # Get Configuration
         conf_name = os.getenv("TRAME_MANAGER_CONFIGURATION")
         if conf_name is None:
             raise EnvironmentError("'TRAME_MANAGER_CONFIGURATION' not set!")
 
-        module = import_module(f"jupyterlab_trame_manager.configurations.{conf_name}")
+        # Configurations outside of this package are given by their absolute module name, e.g., `my_site.trame`
+        if "." not in conf_name:
+            conf_name = f"jupyterlab_trame_manager.configurations.{conf_name}"
+        module = import_module(conf_name)
         cls = [
             cls for cls in module.__dict__.values()
-            if isinstance(cls, type) and issubclass(cls, Configuration) and cls != Configuration
+            if isinstance(cls, type) and issubclass(cls, Configuration) and not inspect.isabstract(cls)
         ][0]
         self._log.info(f"Found Configuration class {cls.__name__!r}")
 
         self._configuration = cls(self._log)
 
-        # Discover Apps and Servers
-        self.discover_apps()
-        asyncio.run(self.get_running_servers())
+        self.tracer = Tracer(
+            enabled=self._configuration.tracing,
+            profile_dir=self._configuration.profile_dir,
+            profile_threshold=self._configuration.profile_threshold,
+            profile_interval=self._configuration.profile_interval,
+            logger=self._log,
+        )
+
+        state_file = self._configuration.trame_state_file
+        self._store = InstanceStore(Path(state_file)) if state_file is not None else None
+
+        self._prober = None
+        self._probing = False
+        if self._configuration.paraview_probe:
+            self._prober = ServerProber(
+                concurrency=self._configuration.paraview_probe_concurrency,
+                timeout=self._configuration.paraview_probe_timeout,
+                ttl=self._configuration.paraview_probe_ttl,
+            )
+
+        # Discovering Apps and Servers might take a while, so we don't block the startup of the server with it
+        IOLoop.current().add_callback(self._initialize)
+
+    async def _initialize(self):
+        if self._closed:
+            return
+
+        self._start_periodic(self._poll_servers, self._configuration.server_poll_interval)
+        IOLoop.current().add_callback(self._poll_servers)
+
+        if self._prober is not None:
+            self._start_periodic(self._probe_servers, self._configuration.paraview_probe_interval)
+
+        try:
+            await self.discover_apps()
+            # Instances of a previous server can only be taken over, once their apps are known
+            await self._adopt_trame()
+        except Exception as e:
+            self._log.error(f"Failed to discover trame apps: {e}")
+            self._state = "failed"
+        else:
+            self._state = "ready"
+        finally:
+            self._ready.set()
+
+        # The server might have been stopped while the apps were discovered
+        if self._closed:
+            return
+
+        self._start_periodic(self._maintain_pools, self._pool_maintenance_interval)
+        IOLoop.current().add_callback(self._maintain_pools)
+
+        if self._configuration.trame_log_max_bytes is not None:
+            self._start_periodic(self._rotate_logs, self._log_rotation_interval)
+
+        if self._configuration.trame_idle_timeout:
+            self._start_periodic(self._stop_idle_trame, self._idle_check_interval)
+
+        if self._configuration.app_rescan_interval:
+            self._start_periodic(self._rescan_apps, self._configuration.app_rescan_interval)
+
+    def _start_periodic(self, callback: Callable, interval: float):
+        """ Call a callback every `interval` seconds, until the Model is closed """
+        periodic = PeriodicCallback(callback, interval * 1000)
+        periodic.start()
+        self._periodic_callbacks.append(periodic)
 
     @property
     def _log(self) -> logging.Logger:
         return self._server_app.log
 
+    @property
+    def state(self) -> str:
+        """ Whether the Model is still `loading`, `ready` or `failed` to initialize """
+        return self._state
+
+    async def wait_ready(self):
+        """ Wait until the initialization of the Model has finished """
+        await self._ready.wait()
+
+    ########################################################
+    #
+    #   User
+    #
+    ########################################################
+
+    @property
+    def _user_data_file(self) -> Path:
+        return self._configuration.cache_dir / f"user-{self._configuration.cache_key}.json"
+
+    @traced("model.get_user_data")
     async def get_user_data(self) -> UserData:
-        return await self._configuration.get_user_data()
+        """
+        Get the data about the user. Cached data, also from previous sessions, is returned immediately and
+        revalidated in the background, once it is older than L{Configuration.user_data_ttl}.
+
+        @return: The data about the user
+        """
+        if self._user_data is None:
+            self._load_user_data()
+
+        if self._user_data is None:
+            return await self.refresh_user_data()
+
+        if time.time() - self._user_data_updated > self._configuration.user_data_ttl:
+            IOLoop.current().add_callback(self._refresh_user_data_in_background)
+
+        return self._user_data
+
+    async def refresh_user_data(self) -> UserData:
+        """
+        Query the data about the user from the Configuration. Concurrent callers share a single in-flight query.
+
+        @return: The new data about the user
+        """
+        if self._user_data_refresh is None:
+            self._user_data_refresh = asyncio.ensure_future(self._query_user_data())
+
+        return await asyncio.shield(self._user_data_refresh)
+
+    async def _query_user_data(self) -> UserData:
+        try:
+            with span("configuration.get_user_data"):
+                self._user_data = await self._configuration.get_user_data()
+            self._user_data_updated = time.time()
+        finally:
+            self._user_data_refresh = None
+
+        self._store_user_data()
+        return self._user_data
+
+    async def _refresh_user_data_in_background(self):
+        try:
+            await self.refresh_user_data()
+        except Exception as e:
+            self._log.error(f"Failed to refresh user data: {e}")
+
+    def _load_user_data(self):
+        try:
+            cache = json.loads(self._user_data_file.read_text())
+            self._user_data = UserData.model_validate(cache["data"])
+            self._user_data_updated = cache["updated"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self._log.warning(f"Ignoring invalid user data cache {str(self._user_data_file)!r}: {e}")
+
+    def _store_user_data(self):
+        cache = {"updated": self._user_data_updated, "data": self._user_data.model_dump(mode="json")}
+
+        try:
+            self._user_data_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self._user_data_file.with_suffix(".tmp")
+            temp_file.write_text(json.dumps(cache))
+            temp_file.replace(self._user_data_file)
+        except OSError as e:
+            self._log.warning(f"Failed to cache user data in {str(self._user_data_file)!r}: {e}")
+
+    ########################################################
+    #
+    #   Events
+    #
+    ########################################################
+
+    def add_listener(self, listener: Callable[[str], None]):
+        """
+        Register a listener for change events. Each event is a JSON object with the changed `resource`
+        (`paraview`, `trame` or `connection`), the `action` that happened and the data of the changed items.
+
+        @param listener: Callback that will receive the serialized event
+        """
+        self._listeners.add(listener)
+
+    def remove_listener(self, listener: Callable[[str], None]):
+        self._listeners.discard(listener)
+
+    def _publish(self, resource: str, action: str, **data):
+        # Connections are part of the trame instances
+        self._snapshots["trame" if resource == "connection" else resource].invalidate()
+
+        if not self._listeners:
+            return
+
+        # Serialize only once for all listeners
+        data = {
+            key: value.model_dump(mode="json", by_alias=True) if isinstance(value, ParentModel) else value
+            for key, value in data.items()
+        }
+        event = json.dumps({"resource": resource, "action": action, **data})
+
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                self._log.error(f"Failed to publish event to {listener!r}: {e}")
+
+    ########################################################
+    #
+    #   Snapshots
+    #
+    ########################################################
+
+    def snapshot(self, resource: str) -> Snapshot:
+        """
+        The serialized list of a resource, which is only rebuilt after it changed. See L{Snapshot}
+
+        @param resource: Either `trame` or `paraview`
+        """
+        return self._snapshots[resource]
+
+    def _serialize_apps(self) -> dict[str, dict]:
+        return {name: app.model_dump(mode="json", by_alias=True) for name, app in self._apps.items()}
+
+    def _serialize_servers(self) -> dict[str, dict]:
+        return {server.job_id or server.name: server.model_dump(mode="json", by_alias=True) for server in self._servers}
+
+    ########################################################
+    #
+    #   Metrics
+    #
+    ########################################################
+
+    def _collect_metrics(self):
+        # Called on every scrape, so the gauges and the traffic are not tracked on every change
+        metrics = self.metrics
+
+        metrics.trame_instances.clear()
+        for name, pool in self._pools.items():
+            metrics.trame_instances.labels(name, "warm").set(len(pool.workers))
+        for instance in self._instances.values():
+            metrics.trame_instances.labels(instance.app_name, instance.state).inc()
+
+        metrics.paraview_jobs.clear()
+        for server in self._servers:
+            metrics.paraview_jobs.labels(server.state, str(server.ready).lower()).inc()
+
+        # The traffic is counted on the instances, so the series disappear together with their instance
+        for metric in (metrics.proxy_bytes, metrics.proxy_connections, metrics.proxy_open_websockets):
+            metric.clear()
+        for instance in self._instances.values():
+            labels = (instance.app_name, instance.uuid)
+            metrics.proxy_bytes.labels(*labels, "sent").set(instance.proxied_bytes_sent)
+            metrics.proxy_bytes.labels(*labels, "received").set(instance.proxied_bytes_received)
+            metrics.proxy_connections.labels(*labels, "http").set(instance.proxied_requests)
+            metrics.proxy_connections.labels(*labels, "websocket").set(instance.proxied_websockets)
+            metrics.proxy_open_websockets.labels(*labels).set(instance.open_websockets)
+
+    ########################################################
+    #
+    #   Registry
+    #
+    ########################################################
+
+    def get_app(self, app_name: str) -> TrameApp:
+        """
+        @raise KeyError: If there is no app with this name
+        """
+        try:
+            return self._apps[app_name]
+        except KeyError:
+            raise KeyError(f"No trame app named {app_name!r}") from None
+
+    def get_trame(self, uuid: str) -> TrameInstance:
+        """
+        @param uuid: The UUID of a trame instance
+        @return: The running trame instance
+        @raise KeyError: If there is no instance with this UUID
+        """
+        try:
+            return self._instances[uuid]
+        except KeyError:
+            raise KeyError(f"No trame instance with UUID {uuid!r}") from None
+
+    def find_trame(self, app_name: str, instance_name: str) -> TrameInstance:
+        """
+        @param app_name: The name of the app of the instance
+        @param instance_name: The name of the instance
+        @return: The running trame instance
+        @raise KeyError: If the app has no instance with this name
+        """
+        try:
+            return self._instance_names[(app_name, instance_name)]
+        except KeyError:
+            raise KeyError(f"trame app {app_name!r} has no instance named {instance_name!r}") from None
+
+    def get_server(self, job_id: str) -> ParaViewInstance:
+        """
+        @param job_id: The job id of a ParaView Server, as reported by the job scheduler
+        @return: The ParaView Server in the current snapshot
+        @raise KeyError: If the snapshot contains no server with this job id
+        """
+        try:
+            return self._servers_by_job_id[job_id]
+        except KeyError:
+            raise KeyError(f"No ParaView Server with job id {job_id!r}") from None
+
+    def find_server(self, server_name: str) -> ParaViewInstance:
+        """
+        @param server_name: The name of a ParaView Server
+        @return: The ParaView Server in the current snapshot
+        @raise KeyError: If the snapshot contains none or multiple servers with this name
+        """
+        servers = [server for server in self._servers if server.name == server_name]
+        if len(servers) != 1:
+            raise KeyError(f"Found {len(servers)} ParaView Servers named {server_name!r}, use the job id instead")
+        return servers[0]
+
+    def _register_trame(self, app: TrameApp, instance: TrameInstance):
+        instance.app_name = app.name
+        app.instances.append(instance)
+        self._instances[instance.uuid] = instance
+        self._instance_names[(app.name, instance.name)] = instance
+
+    def _unregister_trame(self, instance: TrameInstance) -> bool:
+        """ @return: Whether the instance was still registered """
+        if self._instances.pop(instance.uuid, None) is None:
+            return False
+
+        self._instance_names.pop((instance.app_name, instance.name), None)
+        self._apps[instance.app_name].instances.remove(instance)
+        return True
 
     ########################################################
     #
@@ -79,22 +446,344 @@ class Model:
     def app_names(self) -> list[str]:
         return list(self._apps.keys())
 
-    def discover_apps(self):
-        apps = self._configuration.discover_apps()
-        app_names = [app.name for app in apps]
+    async def discover_apps(self) -> bool:
+        """
+        Discover the trame apps and update the known apps incrementally. Running instances of changed apps are kept,
+        removed apps are only dropped once they don't have any running instances left.
+
+        @return: Whether any app was added, changed or removed
+        """
+        # Walking the file system and parsing the configs is blocking, so we move it off the event loop
+        apps = await asyncio.get_running_loop().run_in_executor(None, self._configuration.discover_apps)
+        discovered = {app.name: app for app in apps}
+        self._log.debug(f"Discovered apps: {', '.join(discovered)}")
+
+        changed = False
+        for name, app in discovered.items():
+            if name in self._apps:
+                app.instances = self._apps[name].instances
+                changed |= app != self._apps[name]
+            else:
+                changed = True
+
+        for name, app in self._apps.items():
+            if name not in discovered:
+                changed = True
+                if app.instances:
+                    discovered[name] = app
 
-        self._log.debug(f"Discovered apps: {', '.join(app_names)}")
-        self._apps = dict(zip(app_names, apps))
+        self._apps = discovered
+        if changed:
+            self._publish("trame", "discovered")
+            await self._update_pools()
 
+        return changed
+
+    async def _rescan_apps(self):
+        try:
+            await self.discover_apps()
+        except Exception as e:
+            self._log.error(f"Failed to rediscover trame apps: {e}")
+
+    @traced("model.launch_trame")
     async def launch_trame(self, app_name: str, options: dict) -> TrameInstance:
-        app = self.apps[app_name]
-        options = TrameLaunchOptions.model_validate(options)
+        await self.wait_ready()
+        app = self.get_app(app_name)
+        with span("validate"):
+            options = TrameLaunchOptions.model_validate(options)
 
-        instance = await self._configuration.launch_trame(app, options, self._server_app)
-        app.instances.append(instance)
+        # Instances are addressed by their name in the UI, so names must be unique per app. The name is reserved until
+        # the instance is registered, so a concurrent launch with the same name is rejected as well
+        name = (app_name, options.name)
+        if name in self._instance_names or name in self._launching:
+            raise ValueError(f"trame app {app_name!r} already has an instance named {options.name!r}")
+
+        self._launching.add(name)
+        try:
+            return await self._launch_trame(app, options)
+        finally:
+            self._launching.discard(name)
+
+    async def _launch_trame(self, app: TrameApp, options: TrameLaunchOptions) -> TrameInstance:
+        # Prefer a pre-started instance over a cold start
+        pool = self._pools.get(app.name)
+        with span("pool.claim"):
+            instance = await pool.claim(options) if pool else None
+
+        if instance is not None:
+            IOLoop.current().add_callback(self._maintain_pools)
+            self.metrics.trame_launch_duration.labels(app.name, "warm").observe(sum(instance.timings.values()) / 1000)
+            await self._add_trame(app, instance)
+            IOLoop.current().add_callback(self._watch_trame, instance)
+            return instance
 
+        with span("configuration.launch_trame"):
+            instance = await self._configuration.launch_trame(app, options, self._server_app)
+        await self._add_trame(app, instance)
+
+        IOLoop.current().add_callback(self._wait_for_trame, instance)
+        IOLoop.current().add_callback(self._watch_trame, instance)
         return instance
 
+    async def _add_trame(self, app: TrameApp, instance: TrameInstance):
+        """ Register and store a launched instance. If this fails or is cancelled, the instance is stopped again """
+        try:
+            self._register_trame(app, instance)
+            self._publish("trame", "added", app=app.name, instance=instance)
+            await self._save_trame(instance)
+        except BaseException:
+            # Unregisters the instance, unroutes it, terminates its process group and closes its log
+            if instance.uuid in self._instances:
+                await self._remove_trame(instance)
+            else:
+                await self._configuration.stop_trame(instance)
+            raise
+
+    async def _wait_for_trame(self, instance: TrameInstance):
+        start = time.perf_counter()
+        try:
+            ready = await self._configuration.wait_for_trame(instance)
+        except Exception as e:
+            self._log.error(f"Failed to wait for trame instance {instance.name!r}: {e}")
+            ready = False
+
+        instance.state = "ready" if ready else "failed"
+        instance.timings["listen"] = (time.perf_counter() - start) * 1000
+        if ready:
+            self.metrics.trame_launch_duration.labels(instance.app_name, "cold").observe(
+                sum(instance.timings.values()) / 1000
+            )
+        else:
+            self.metrics.trame_launch_failures.labels(instance.app_name).inc()
+        self._log.info(f"trame instance {instance.name!r} is {instance.state}: {instance.timings}")
+
+        self._publish("trame", "changed", app=instance.app_name, instance=instance)
+
+    @traced("model.stop_trame")
+    async def stop_trame(self, uuid: str):
+        await self._remove_trame(self.get_trame(uuid))
+
+    async def _remove_trame(self, instance: TrameInstance):
+        # The instance might be removed concurrently, e.g., when it is stopped while it exits on its own
+        if not self._unregister_trame(instance):
+            return
+
+        await self._forget_trame(instance)
+        try:
+            with span("configuration.stop_trame"):
+                await self._configuration.stop_trame(instance)
+        finally:
+            self._publish("trame", "removed", app=instance.app_name, instance=instance)
+
+    async def _watch_trame(self, instance: TrameInstance):
+        if instance.process_handle is None:
+            return
+
+        exit_code = await instance.process_handle.wait()
+        if instance.uuid not in self._instances:
+            return  # Stopped on purpose
+
+        instance.state = "exited"
+        instance.exit_code = exit_code
+        self._log.warning(f"trame instance {instance.name!r} exited with {exit_code}, see {str(instance.log_file)!r}")
+        self._publish("trame", "changed", app=instance.app_name, instance=instance)
+
+        # Keep the instance around for a moment, so the user can see what happened
+        await asyncio.sleep(self._configuration.trame_exited_retention)
+        await self._remove_trame(instance)
+
+    # Interval in seconds, in which instances are checked against the idle timeout
+    _idle_check_interval = 30
+
+    async def _stop_idle_trame(self):
+        timeout = self._configuration.trame_idle_timeout
+        now = time.time()
+
+        for instance in list(self._instances.values()):
+            if instance.open_websockets == 0 and now - instance.last_activity > timeout:
+                self._log.info(f"Stopping trame instance {instance.name!r}, idle for {timeout}s")
+                try:
+                    await self._remove_trame(instance)
+                except Exception as e:
+                    self._log.error(f"Failed to stop idle trame instance {instance.name!r}: {e}")
+
+    ########################################################
+    #
+    #   Persistence
+    #
+    ########################################################
+
+    async def _adopt_trame(self):
+        """ Take over the instances of a previous server, that are still running, and discard the others """
+        if self._store is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            records = await loop.run_in_executor(None, self._store.orphans)
+        except Exception as e:
+            self._log.error(f"Failed to load stored trame instances from {str(self._store.path)!r}: {e}")
+            return
+
+        for record in records:
+            try:
+                if not record["running"]:
+                    raise RuntimeError("its process has exited")
+
+                app = self.get_app(record["app_name"])
+                if record["warm"]:
+                    if app.name not in self._pools:
+                        raise RuntimeError("its app has no warm pool anymore")
+                elif (app.name, record["name"]) in self._instance_names:
+                    raise ValueError(f"trame app {app.name!r} already has an instance named {record['name']!r}")
+
+                # Routing must happen on the event loop
+                instance = self._configuration.adopt_trame(app, record, self._server_app)
+
+            except Exception as e:
+                self._log.warning(f"Discarding stored trame instance {record['name']!r}: {_error_message(e)}")
+                try:
+                    await loop.run_in_executor(None, self._configuration.discard_trame, record)
+                    await loop.run_in_executor(None, self._store.remove, record["uuid"])
+                except Exception as e:
+                    self._log.error(f"Failed to discard stored trame instance {record['name']!r}: {e}")
+                continue
+
+            if record["warm"]:
+                IOLoop.current().add_callback(self._pools[app.name].adopt, instance)
+                continue
+
+            self._register_trame(app, instance)
+            self._publish("trame", "added", app=app.name, instance=instance)
+            await self._save_trame(instance)  # Take over the ownership of the record
+
+            IOLoop.current().add_callback(self._wait_for_trame, instance)
+            IOLoop.current().add_callback(self._watch_trame, instance)
+
+    async def _save_trame(self, instance: TrameInstance):
+        if self._store is None:
+            return
+
+        try:
+            with span("store.save"):
+                await asyncio.get_running_loop().run_in_executor(None, self._store.save, instance)
+        except Exception as e:
+            self._log.error(f"Failed to store trame instance {instance.name!r}: {e}")
+
+    async def _forget_trame(self, instance: TrameInstance):
+        if self._store is None:
+            return
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._store.remove, instance.uuid)
+        except Exception as e:
+            self._log.error(f"Failed to remove stored trame instance {instance.name!r}: {e}")
+
+    ########################################################
+    #
+    #   Logs
+    #
+    ########################################################
+
+    # Interval in seconds, in which the logs are checked against the maximum size
+    _log_rotation_interval = 10
+
+    async def read_trame_log(self, uuid: str, offset: int, size: int = logs.CHUNK_SIZE) -> tuple[int, bytes]:
+        """
+        Read a chunk of the log of a trame instance. See L{jupyterlab_trame_manager.logs.read}
+
+        @raise KeyError: If there is no instance with this UUID
+        """
+        instance = self.get_trame(uuid)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, logs.read, instance.log_file, instance.log_rotated, offset, size
+        )
+
+    def trame_log_range(self, uuid: str) -> tuple[int, int]:
+        """
+        @return: The offsets of the oldest available and after the newest byte in the log of a trame instance
+        @raise KeyError: If there is no instance with this UUID
+        """
+        instance = self.get_trame(uuid)
+        return logs.start(instance.log_file, instance.log_rotated), logs.end(instance.log_file, instance.log_rotated)
+
+    async def _rotate_logs(self):
+        max_bytes = self._configuration.trame_log_max_bytes
+        loop = asyncio.get_running_loop()
+
+        for instance in list(self._instances.values()):
+            try:
+                instance.log_rotated += await loop.run_in_executor(None, logs.rotate, instance.log_file, max_bytes)
+            except OSError as e:
+                self._log.error(f"Failed to rotate log of trame instance {instance.name!r}: {e}")
+
+    ########################################################
+    #
+    #   Warm Pools
+    #
+    ########################################################
+
+    # Interval in seconds, in which the warm pools are refilled and checked against the memory budget
+    _pool_maintenance_interval = 30
+
+    async def _update_pools(self):
+        for name, app in self._apps.items():
+            if name in self._pools:
+                self._pools[name].app = app
+            elif app.warm_pool > 0:
+                self._pools[name] = WarmPool(
+                    app, self._configuration, self._server_app, self._post_to_trame, self._log,
+                    save=self._save_trame, forget=self._forget_trame,
+                )
+
+        for name, pool in list(self._pools.items()):
+            if name not in self._apps or self._apps[name].warm_pool == 0:
+                del self._pools[name]
+                await pool.close()
+
+        # Until then, the workers of the previous server might still be adopted
+        if self._ready.is_set():
+            await self._maintain_pools()
+
+    async def _remaining_pool_memory(self) -> int | None:
+        budget = self._configuration.warm_pool_memory_budget
+        if budget is None:
+            return None
+
+        return budget - sum([await pool.idle_memory() for pool in self._pools.values()])
+
+    async def _maintain_pools(self):
+        try:
+            # Evict idle workers from the largest pools, until they fit into the budget
+            remaining = await self._remaining_pool_memory()
+            while remaining is not None and remaining < 0 and self._pools:
+                pool = max(self._pools.values(), key=lambda p: len(p.workers))
+                freed = await pool.evict()
+                if freed == 0:
+                    break
+                remaining += freed
+
+            for pool in self._pools.values():
+                pool.fill(remaining)
+
+        except Exception as e:
+            self._log.error(f"Failed to maintain warm pools: {e}")
+
+    async def close(self):
+        """ Stop everything that would outlive the server otherwise """
+        self._closed = True
+        for periodic in self._periodic_callbacks:
+            periodic.stop()
+        self._periodic_callbacks.clear()
+        if self._prober is not None:
+            self._prober.close()
+
+        cmd.remove_observer(self.metrics.observe_command)
+        # Idle workers keep running like other instances, so the next server takes them over
+        for pool in self._pools.values():
+            await pool.close(stop=self._store is None)
+        await self._configuration.close()
+
     ########################################################
     #
     #   ParaView
@@ -102,15 +791,160 @@ class Model:
     ########################################################
 
     @property
-    def servers(self):
+    def servers(self) -> list[ParaViewInstance]:
+        return self._servers
+
+    @property
+    def servers_age(self) -> float:
+        """ Seconds since the list of running ParaView Servers was last refreshed """
+        return time.monotonic() - self._servers_updated
+
+    @traced("model.get_running_servers")
+    async def get_running_servers(self, force: bool = False) -> list[ParaViewInstance]:
+        """
+        Get the snapshot of running ParaView Servers. The snapshot is only queried from the Configuration, if it is
+        older than L{Configuration.server_snapshot_ttl} or if a refresh is forced.
+
+        @param force: Always query a new snapshot
+        @return: The list of running ParaView Servers
+        """
+        if force or self.servers_age > self._configuration.server_snapshot_ttl:
+            await self.refresh_servers(force)
+
         return self._servers
 
-    async def get_running_servers(self):
-        self._servers = await self._configuration.get_running_servers()
+    def refresh_outdated_servers(self):
+        """
+        Refresh the snapshot of running ParaView Servers in the background, if it is older than
+        L{Configuration.server_snapshot_ttl}. Errors are logged, and the current snapshot is kept
+        """
+        if self.servers_age > self._configuration.server_snapshot_ttl and self._servers_refresh is None:
+            IOLoop.current().add_callback(self._refresh_servers_in_background)
+
+    async def refresh_servers(self, force: bool = False):
+        """
+        Refresh the snapshot of running ParaView Servers. Concurrent callers share a single in-flight query.
+
+        @param force: Don't join a query that was started before this call, but wait for a new one
+        """
+        requested = time.monotonic()
+
+        while True:
+            if self._servers_refresh is None:
+                # A query that has not started yet will pick up all changes
+                self._servers_refresh_started = float("inf")
+                self._servers_refresh = asyncio.ensure_future(self._query_servers())
+
+            refresh = self._servers_refresh
+            if not force or self._servers_refresh_started >= requested:
+                return await asyncio.shield(refresh)
+
+            # The in-flight query might not contain the latest changes, so we wait for it and start a new one
+            await asyncio.wait([refresh])
+
+    async def _query_servers(self):
+        self._servers_refresh_started = time.monotonic()
+        try:
+            with span("configuration.get_running_servers"):
+                servers = await self._configuration.get_running_servers()
+            self._servers_updated = time.monotonic()
+        finally:
+            self._servers_refresh = None
+
+        for server in servers:
+            if server.port is None:
+                server.port = self._configuration.paraview_port
+
+        # Keep the readiness of known servers, until they are probed again
+        if self._prober is not None and not self._closed:
+            for server in servers:
+                self._prober.apply(server)
+            self._prober.forget(servers)
+            IOLoop.current().add_callback(self._probe_servers)
+
+        previous, self._servers = self._servers, servers
+        self._servers_by_job_id = {server.job_id: server for server in servers if server.job_id is not None}
+        self._snapshots["paraview"].invalidate()
+        self._publish_server_changes(previous, servers)
+
+    async def _probe_servers(self):
+        # Rounds might overlap, if probes take longer than the interval
+        if self._probing:
+            return
+
+        self._probing = True
+        try:
+            servers = [server for server in self._servers if not self._prober.apply(server)]
+            changed = await asyncio.gather(*(self._prober.probe(server) for server in servers))
+        finally:
+            self._probing = False
 
+        for server, server_changed in zip(servers, changed):
+            if server_changed:
+                self._log.info(f"ParaView Server {server.name!r} is {'ready' if server.ready else 'not ready'}")
+                self._publish("paraview", "changed", server=server)
+
+    def _publish_server_changes(self, previous: list[ParaViewInstance], current: list[ParaViewInstance]):
+        if not self._listeners:
+            return
+
+        previous = {server.job_id or server.name: server for server in previous}
+        current = {server.job_id or server.name: server for server in current}
+
+        for name, server in current.items():
+            if name not in previous:
+                self._publish("paraview", "added", server=server)
+            elif server != previous[name]:
+                self._publish("paraview", "changed", server=server)
+
+        for name in previous.keys() - current.keys():
+            self._publish("paraview", "removed", server=previous[name])
+
+    async def _poll_servers(self):
+        # Requests might have refreshed the snapshot in the meantime. Allow for some jitter of the callback
+        if self.servers_age >= self._configuration.server_poll_interval / 2:
+            await self._refresh_servers_in_background()
+
+    async def _refresh_servers_in_background(self, force: bool = False):
+        try:
+            await self.refresh_servers(force)
+        except Exception as e:
+            self._log.error(f"Failed to refresh running ParaView Servers: {e}")
+
+    @traced("model.launch_paraview")
     async def launch_paraview(self, options: dict) -> tuple[int, str]:
-        options = ParaViewLaunchOptions.model_validate(options)
-        return await self._configuration.launch_paraview(options)
+        with span("validate"):
+            options = ParaViewLaunchOptions.model_validate(options)
+        with span("configuration.launch_paraview"):
+            status = await self._configuration.launch_paraview(options)
+
+        # Pick up the new job in the background
+        IOLoop.current().add_callback(self._refresh_servers_in_background, True)
+        return status
+
+    @traced("model.launch_paraview_batch")
+    async def launch_paraview_batch(self, elements: list[dict]) -> list[dict]:
+        """
+        Launch several ParaView Servers at once. See L{Configuration.launch_paraview_batch}
+
+        @param elements: The launch options, each with an optional `count` of servers to launch with them
+        @return: The status of each server
+        """
+        batch = []
+        for element in elements:
+            element = dict(element)
+            count = int(element.pop("count", 1))
+            if count < 1:
+                raise ValueError(f"Invalid count {count} for {element.get('name')!r}")
+            with span("validate"):
+                batch.append((ParaViewLaunchOptions.model_validate(element), count))
+
+        with span("configuration.launch_paraview_batch"):
+            statuses = await self._configuration.launch_paraview_batch(batch)
+
+        # Pick up the new jobs in the background
+        IOLoop.current().add_callback(self._refresh_servers_in_background, True)
+        return statuses
 
     ########################################################
     #
@@ -118,27 +952,102 @@ class Model:
     #
     ########################################################
 
-    async def connect_to_backend(self, app_name: str, instance_name: str, server_name):
-        instance = [app for app in self.apps[app_name].instances if app.name == instance_name][0]
-        server = [server for server in self.servers if server.name == server_name][0]
+    async def _post_to_trame(self, instance: TrameInstance, message: dict) -> float:
+        """
+        Send a control message to a trame instance over its keep-alive connection.
+
+        @return: The round-trip time in milliseconds
+        """
+        if instance.control_client is None:
+            instance.control_client = ControlClient(
+                port=instance.port,
+                unix_socket=instance.unix_socket,
+                timeout=self._configuration.trame_control_timeout,
+                retries=self._configuration.trame_control_retries,
+            )
+
+        with span("trame.control"):
+            _, latency = await instance.control_client.post(message)
+        self._log.debug(f"trame instance {instance.name!r} answered {message['action']!r} in {latency:.1f} ms")
+        return latency
+
+    @traced("model.connect_to_backend")
+    async def connect_to_backend(self, uuid: str, job_id: str) -> dict:
+        instance = self.get_trame(uuid)
+        try:
+            server = self.get_server(job_id)
+        except KeyError:
+            # The server might have been launched after the last snapshot
+            await self.refresh_servers(force=True)
+            server = self.get_server(job_id)
+
+        # Connecting before pvserver listens would fail anyway, so we give a clear error instead
+        if self._prober is not None and not server.ready:
+            with span("paraview.probe"):
+                ready_changed = await self._prober.probe(server)
+            if ready_changed:
+                self._publish("paraview", "changed", server=server)
+            if not server.ready:
+                raise ValueError(f"ParaView Server {server.name!r} does not accept connections yet")
+
+        try:
+            latency = await self._post_to_trame(instance, {
+                "action": "connect",
+                "url": server.connection_address,
+                "port": server.port,
+            })
+        except Exception as e:
+            self._publish(
+                "connection", "failed", app=instance.app_name, instance=instance, server=server.name, error=str(e)
+            )
+            raise
+
+        instance.connection = TrameConnection(
+            server=server.name, job_id=job_id, url=server.connection_address, port=server.port, latency=latency
+        )
+        self._publish("connection", "connected", app=instance.app_name, instance=instance)
+        await self._save_trame(instance)
+
+        return dict(url=server.connection_address, port=server.port, latency=latency)
+
+    @traced("model.disconnect")
+    async def disconnect(self, uuid: str) -> dict:
+        instance = self.get_trame(uuid)
+
+        try:
+            latency = await self._post_to_trame(instance, {
+                "action": "disconnect",
+            })
+        except Exception as e:
+            self._publish("connection", "failed", app=instance.app_name, instance=instance, error=str(e))
+            raise
+
+        instance.connection = None
+        self._publish("connection", "disconnected", app=instance.app_name, instance=instance)
+        await self._save_trame(instance)
+
+        return dict(latency=latency)
 
-        app_url = url_path_join(f"http://localhost:{instance.port}", "api")  # ToDo: Also use JSP?
-        self._log.info(f"trame App Endpoint: {app_url!r}")
+    async def connect_many(self, uuids: list[str], job_id: str) -> dict[str, dict]:
+        """
+        Connect several trame instances to the same ParaView Server concurrently.
 
-        client = AsyncHTTPClient()
-        await client.fetch(app_url, method="POST", body=json.dumps({
-            "action": "connect",
-            "url": server.connection_address,
-            "port": 11111,
-        }))
+        @return: The result of L{connect_to_backend} or the error for each instance
+        """
+        return await self._run_many(uuids, lambda uuid: self.connect_to_backend(uuid, job_id))
 
-        return dict(url=server.connection_address)
+    async def disconnect_many(self, uuids: list[str]) -> dict[str, dict]:
+        """
+        Disconnect several trame instances concurrently.
 
-    async def disconnect(self, app_name, instance_name):
-        instance = [app for app in self.apps[app_name].instances if app.name == instance_name][0]
-        app_url = url_path_join(f"http://localhost:{instance.port}", "api")
+        @return: The result of L{disconnect} or the error for each instance
+        """
+        return await self._run_many(uuids, self.disconnect)
 
-        client = AsyncHTTPClient()
-        await client.fetch(app_url, method="POST", body=json.dumps({
-            "action": "disconnect",
-        }))
+    @staticmethod
+    async def _run_many(uuids: list[str], action: Callable[[str], Awaitable[dict]]) -> dict[str, dict]:
+        results = await asyncio.gather(*(action(uuid) for uuid in uuids), return_exceptions=True)
+        return {
+            uuid: {"error": _error_message(result)} if isinstance(result, Exception) else result
+            for uuid, result in zip(uuids, results)
+        }
@@ -0,0 +1,237 @@
+"""
+Warm pools of pre-started trame instances.
+
+trame apps based on ParaView or VTK spend several seconds importing, before they can serve anything. If an app sets
+`warm_pool: N` in its `app.yml`, N instances are started ahead of time and handed out when the user launches the app.
+Warm instances are started with the `TRAME_WARM_POOL=1` environment variable. When they are claimed, they receive
+a POST request to their `/api` endpoint:
+
+    {"action": "claim", "name": "<instance name>", "data": "<data directory>"}
+
+Apps must answer it with a success status after switching to the new data directory.
+
+Like other instances, warm instances are recorded in the L{jupyterlab_trame_manager.store.InstanceStore}, so they are
+kept running and handed to the pool of the next server after a restart of JupyterLab. If an app fails to start, the
+pool retries it with an exponential backoff.
+"""
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from .configuration import Configuration, TrameApp, TrameInstance, TrameLaunchOptions
+
+
+__all__ = ["WarmPool", "process_tree_rss"]
+
+
+def process_tree_rss(pid: int) -> int:
+    """
+    Resident memory of a process and all of its descendants in bytes. Returns 0, if it can't be determined.
+    """
+    page_size = os.sysconf("SC_PAGE_SIZE")
+
+    rss = 0
+    pending = [pid]
+    while pending:
+        pid = pending.pop()
+        try:
+            with open(f"/proc/{pid}/statm") as statm:
+                rss += int(statm.read().split()[1]) * page_size
+            with open(f"/proc/{pid}/task/{pid}/children") as children:
+                pending.extend(int(child) for child in children.read().split())
+        except (OSError, ValueError):
+            continue
+
+    return rss
+
+
+class WarmPool:
+    """
+    The warm instances of one trame app.
+    """
+
+    def __init__(
+            self, app: TrameApp, configuration: Configuration, server_app,
+            claim: Callable[[TrameInstance, dict], Awaitable], log: logging.Logger,
+            save: Callable[[TrameInstance], Awaitable] | None = None,
+            forget: Callable[[TrameInstance], Awaitable] | None = None,
+    ):
+        """
+        @param app: The app whose instances are pre-started
+        @param configuration: The Configuration used to launch and stop instances
+        @param server_app: A reference to the server of JupyterLab, required to route trame
+        @param claim: Coroutine that sends a control message to an instance
+        @param log: The logger of the server
+        @param save: Coroutine that records a started worker in the instance store
+        @param forget: Coroutine that removes the record of a stopped worker from the instance store
+        """
+        self.app = app
+        self._configuration = configuration
+        self._server_app = server_app
+        self._claim = claim
+        self._log = log
+        self._save = save
+        self._forget = forget
+
+        self.workers: list[TrameInstance] = []
+        self._filling: asyncio.Future | None = None
+
+        # Workers that failed to start in a row, and the time after which the next one may be started
+        self._failures = 0
+        self._retry_at = -float("inf")
+
+    # Seconds to wait, before starting workers again after one failed to start. Doubled after every further failure
+    _backoff = 30
+    _max_backoff = 3600
+
+    async def idle_memory(self) -> int:
+        """ Resident memory of all workers in bytes. /proc is read in an executor """
+        pids = [worker.process_handle.pid for worker in self.workers if worker.process_handle is not None]
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: sum(map(process_tree_rss, pids)))
+
+    def fill(self, memory_budget: int | None = None):
+        """
+        Start workers in the background, until the pool has the configured size or no more fit into the memory budget.
+
+        @param memory_budget: Bytes of memory, which this pool may still use for new workers
+        """
+        if time.monotonic() < self._retry_at:
+            return
+
+        if self._filling is None or self._filling.done():
+            self._filling = asyncio.ensure_future(self._fill(memory_budget))
+
+    async def _fill(self, memory_budget: int | None):
+        while len(self.workers) < self.app.warm_pool:
+            # Assume that a new worker uses as much memory as the existing ones
+            if memory_budget is not None and self.workers:
+                expected = await self.idle_memory() / len(self.workers)
+                if expected > memory_budget:
+                    return
+                memory_budget -= expected
+
+            options = TrameLaunchOptions(name=f"{self.app.display_name} (warm)", data_directory=Path.home())
+            try:
+                worker = await self._configuration.launch_trame(self.app, options, self._server_app, warm=True)
+            except Exception as e:
+                self._log.error(f"Failed to start warm instance of {self.app.name!r}: {e}")
+                self._failed()
+                return
+
+            worker.app_name = self.app.name
+            self.workers.append(worker)
+            if self._save is not None:
+                await self._save(worker)
+
+            if not await self._wait(worker):
+                self._failed()
+                return
+            self._failures = 0
+
+    async def _wait(self, worker: TrameInstance) -> bool:
+        worker.state = "ready" if await self._configuration.wait_for_trame(worker) else "failed"
+
+        if worker.state == "failed":
+            self._log.error(f"Warm instance of {self.app.name!r} failed to start, see {str(worker.log_file)!r}")
+            await self.remove(worker)
+        return worker.state == "ready"
+
+    def _failed(self):
+        backoff = min(self._backoff * 2 ** self._failures, self._max_backoff)
+        self._failures += 1
+        self._retry_at = time.monotonic() + backoff
+        self._log.warning(f"Starting warm instances of {self.app.name!r} again in {backoff} seconds")
+
+    async def adopt(self, worker: TrameInstance):
+        """
+        Take over a worker, that was started by a previous server. See L{jupyterlab_trame_manager.store}
+
+        @param worker: The adopted instance
+        """
+        worker.app_name = self.app.name
+        worker.warm = True
+        self.workers.append(worker)
+        if self._save is not None:
+            await self._save(worker)  # Take over the ownership of the record
+        await self._wait(worker)
+
+    async def claim(self, options: TrameLaunchOptions) -> TrameInstance | None:
+        """
+        Hand out a ready worker. Afterwards, the pool can be refilled with L{fill}.
+
+        @param options: The options of the user for the instance
+        @return: The claimed instance, or None if no worker is ready
+        """
+        while True:
+            worker = next((worker for worker in self.workers if worker.state == "ready"), None)
+            if worker is None:
+                return None
+
+            # The process might have exited or been killed since it became ready
+            if worker.process_handle is None or worker.process_handle.returncode is not None:
+                self._log.warning(f"Warm instance of {self.app.name!r} has exited, see {str(worker.log_file)!r}")
+                await self.remove(worker)
+                continue
+            self.workers.remove(worker)
+
+            start = time.perf_counter()
+            try:
+                await self._claim(worker, {
+                    "action": "claim",
+                    "name": options.name,
+                    "data": str(options.data_directory),
+                })
+            except Exception as e:
+                self._log.error(f"Failed to claim warm instance of {self.app.name!r}: {e}")
+                await self._stop(worker)
+                continue
+
+            worker.name = options.name
+            worker.data_directory = options.data_directory
+            worker.warm = False
+            worker.timings = {"claim": (time.perf_counter() - start) * 1000}
+            return worker
+
+    async def evict(self) -> int:
+        """
+        Stop the oldest idle worker.
+
+        @return: The bytes of memory that were freed
+        """
+        if not self.workers:
+            return 0
+
+        worker = self.workers[0]
+        freed = 0
+        if worker.process_handle is not None:
+            freed = await asyncio.get_running_loop().run_in_executor(None, process_tree_rss, worker.process_handle.pid)
+        await self.remove(worker)
+
+        self._log.info(f"Evicted warm instance of {self.app.name!r}, freeing {freed / 2**20:.0f} MiB")
+        return freed
+
+    async def remove(self, worker: TrameInstance):
+        if worker in self.workers:
+            self.workers.remove(worker)
+        await self._stop(worker)
+
+    async def _stop(self, worker: TrameInstance):
+        if self._forget is not None:
+            await self._forget(worker)
+        await self._configuration.stop_trame(worker)
+
+    async def close(self, stop: bool = True):
+        """
+        Stop filling the pool.
+
+        @param stop: Whether to stop all workers. Otherwise, they keep running for the next server, like other instances
+        """
+        if self._filling is not None:
+            self._filling.cancel()
+
+        if stop:
+            for worker in list(self.workers):
+                await self.remove(worker)
@@ -0,0 +1,110 @@
+"""
+Readiness probes of ParaView Servers.
+
+A job in the state `RUNNING` does not mean, that pvserver accepts connections yet, e.g., while it is still loading
+its modules. The L{ServerProber} connects to the port of each running server, with a limited number of probes at the
+same time, and remembers the results. Servers that are ready are only probed again after a while, servers that are not
+ready on every probe. The probe only opens a TCP connection and closes it without a handshake, so pvserver must run
+with `--multi-clients`, otherwise it would exit after the probe.
+"""
+import asyncio
+import time
+
+from .configuration import ParaViewInstance
+
+
+__all__ = ["ServerProber"]
+
+
+class ServerProber:
+    """
+    Probes and caches whether ParaView Servers accept connections.
+    """
+
+    def __init__(self, concurrency: int = 8, timeout: float = 2, ttl: float = 60):
+        """
+        @param concurrency: The maximum number of probes at the same time
+        @param timeout: Seconds to wait for a connection
+        @param ttl: Seconds after which the result for a ready server expires
+        """
+        self.timeout = timeout
+        self.ttl = ttl
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # The connection attempts in flight, which are cancelled when the prober is closed
+        self._connecting: set[asyncio.Task] = set()
+        self._closed = False
+
+        # The time, readiness and latency in milliseconds of the last probe by address and port
+        self._results: dict[tuple[str, int], tuple[float, bool, float | None]] = {}
+
+    @staticmethod
+    def _key(server: ParaViewInstance) -> tuple[str, int]:
+        return server.connection_address, server.port
+
+    def apply(self, server: ParaViewInstance) -> bool:
+        """
+        Set `ready` and `latency` of a server from the last probe.
+
+        @return: Whether the result is still valid, i.e., the server does not need to be probed again
+        """
+        if server.state != "RUNNING":
+            server.ready, server.latency = False, None
+            return True
+
+        result = self._results.get(self._key(server))
+        if result is None:
+            return False
+
+        probed, server.ready, server.latency = result
+        return server.ready and time.monotonic() - probed < self.ttl
+
+    async def probe(self, server: ParaViewInstance) -> bool:
+        """
+        Probe a server and set its `ready` and `latency`.
+
+        @return: Whether the server became ready or stopped being ready
+        """
+        previous = server.ready
+        if self._closed:
+            return False
+
+        async with self._semaphore:
+            if self._closed:
+                return False
+
+            start = time.perf_counter()
+            connecting = asyncio.ensure_future(asyncio.wait_for(
+                asyncio.open_connection(server.connection_address, server.port), self.timeout
+            ))
+            self._connecting.add(connecting)
+            try:
+                _, writer = await connecting
+            except (OSError, asyncio.TimeoutError):
+                ready, latency = False, None
+            except asyncio.CancelledError:
+                # Cancelled by close, the result is no longer of interest
+                if self._closed:
+                    return False
+                raise
+            else:
+                ready, latency = True, (time.perf_counter() - start) * 1000
+                writer.close()
+            finally:
+                self._connecting.discard(connecting)
+
+        self._results[self._key(server)] = (time.monotonic(), ready, latency)
+        server.ready, server.latency = ready, latency
+        # The latency fluctuates, so only a change of the readiness counts
+        return previous != ready
+
+    def forget(self, servers: list[ParaViewInstance]):
+        """ Drop the results of servers, that are no longer running """
+        keep = {self._key(server) for server in servers}
+        for key in self._results.keys() - keep:
+            del self._results[key]
+
+    def close(self):
+        """ Cancel the probes in flight. Later probes return right away """
+        self._closed = True
+        for connecting in self._connecting:
+            connecting.cancel()
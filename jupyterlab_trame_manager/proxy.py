@@ -1,39 +1,100 @@
+import time
+
 from jupyter_server_proxy.handlers import NamedLocalProxyHandler
 from jupyter_server.utils import url_path_join
-from typing import Any
+from tornado import web
 
 
-def make_trame_proxy_handler(instance, base_url: str) -> tuple[str, tuple[str, Any]]:
+class TrameProxyHandler(NamedLocalProxyHandler):
     """
-    Create a JupyterServerProxy handler. This handler will append the authentication key to the URL whenever an
-    authenticated user tries to access the root of a trame app so trame/wslink can encrypt the traffic on the sockets
-
-    @param instance: The trame instance for which to create the proxy
-    @type instance: jupyterlab_trame_manager.configuration.TrameAppInstance
-    @param base_url: The base URL of the JupyterLab Server
-    @return: The URL for the proxy handler (<base_url>/trame/<uuid>/) and the parameters for creaing a handler
+    A JupyterServerProxy handler, which serves all trame instances on `<base_url>/trame/<uuid>/`. The instance is looked
+    up by its UUID in the routes of the Configuration, so only a single handler is registered on the server. This
+    handler will append the authentication key to the URL whenever an authenticated user tries to access the root of a
+    trame app so trame/wslink can encrypt the traffic on the sockets
     """
 
-    def _mappath(path):
+    def initialize(self, routes: dict):
+        """
+        @param routes: The routed trame instances by their UUID
+        @type routes: dict[str, jupyterlab_trame_manager.configuration.TrameInstance]
+        """
+        self.routes = routes
+        self.instance = None
+        self._websocket_open = False
+
+    @staticmethod
+    def rule(base_url: str) -> str:
+        """ The URL pattern of the handler. The groups are the UUID of the instance and the proxied path """
+        return url_path_join(base_url, "trame", r"(\w+)", r"(.*)")
+
+    async def prepare(self, *args, **kwargs):
+        # Authenticate before revealing, whether an instance exists
+        await super().prepare(*args, **kwargs)
+        if self._finished:
+            return
+
+        # The remaining path argument is passed on to the proxy methods of NamedLocalProxyHandler
+        uuid, *self.path_args = self.path_args
+        self.instance = self.routes.get(uuid)
+        if self.instance is None:
+            raise web.HTTPError(404, f"No trame instance with UUID {uuid!r}")
+
+        self.port = self.instance.port or 0
+        self.proxy_base = url_path_join("trame", uuid)
+        # jupyter_server_proxy connects over the unix socket instead of the port, if one is set
+        self.unix_socket = str(self.instance.unix_socket) if self.instance.unix_socket else None
+
+    async def proxy(self, port, path):
+        if not path.startswith("/"):
+            path = "/" + path
+
         # Append authKey to URL if we are at the base-url
         if path in ("/", "/index.html"):
-            path += f"?secret={instance.auth_key}"
+            path += f"?secret={self.instance.auth_key}"
             path += "&disableSharedArrayBuffer=1"  # Disable COI
 
-        return path
+        self.instance.proxied_requests += 1
+        if self.request.body:
+            self.instance.proxied_bytes_received += len(self.request.body)
+
+        return await super().proxy(port, path)
+
+    async def open(self, path):
+        await super().open(path)
+        self.instance.open_websockets += 1
+        self.instance.proxied_websockets += 1
+        self._websocket_open = True
+
+    # The traffic is only counted here, and collected into the metrics when they are scraped
+
+    def on_finish(self):
+        # Buffered responses, i.e., all but event streams, are sent at once and tornado sets their length. Counting the
+        # length here keeps the writes of the proxy free of bookkeeping
+        super().on_finish()
+        if self.instance is not None and self.ws_connection is None:
+            content_length = self._headers.get("Content-Length")
+            if content_length is not None:
+                self.instance.proxied_bytes_sent += int(content_length)
 
-    class _Proxy(NamedLocalProxyHandler):
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, **kwargs)
-            self.port = instance.port
-            self.mappath = _mappath
-            self.proxy_base = url_path_join("trame", instance.uuid)
+    def write_message(self, message, binary=False):
+        # Text messages are counted in characters, to avoid encoding them twice
+        if self.instance is not None:
+            self.instance.proxied_bytes_sent += len(message)
+        return super().write_message(message, binary=binary)
 
-            self.absolute_url = False
-            self.unix_socket = None
-            self.rewrite_response = tuple()
+    def on_message(self, message):
+        if self.instance is not None:
+            self.instance.proxied_bytes_received += len(message)
+        return super().on_message(message)
 
-    base_url = url_path_join(base_url, "trame", instance.uuid, "/")
-    rule_url = url_path_join(base_url, r"(.*)")
+    def on_close(self):
+        super().on_close()
+        if self._websocket_open:
+            self.instance.open_websockets -= 1
+            self._websocket_open = False
 
-    return base_url, (rule_url, _Proxy)
+    def _record_activity(self):
+        # The activity is used to stop idle instances, see Configuration.trame_idle_timeout
+        super()._record_activity()
+        if self.instance is not None:
+            self.instance.last_activity = time.time()
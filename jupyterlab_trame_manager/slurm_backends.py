@@ -0,0 +1,301 @@
+"""
+Backends used by L{jupyterlab_trame_manager.mixins.slurm.SlurmMixin} to talk to Slurm.
+
+L{SlurmCliBackend} forks `squeue` and `sbatch` (or asks the node-local cache, see
+L{jupyterlab_trame_manager.slurm_cache}). On clusters running `slurmrestd`, L{SlurmRestBackend} queries and submits
+jobs over HTTP instead, which needs no process per poll and returns structured JSON. A Configuration selects the
+backend with its `slurm_backend` attribute.
+"""
+import asyncio
+import os
+import pwd
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from .cmd import execute, output
+from .configuration import ParaViewLaunchOptions
+from . import slurm_cache
+from .tracing import span
+
+
+__all__ = ["SlurmBackend", "SlurmCliBackend", "SlurmRestBackend", "SlurmJob"]
+
+
+# The fields of a job, as passed to L{jupyterlab_trame_manager.configuration.ParaViewInstance}
+SlurmJob = dict[str, str | int]
+
+# The states in which squeue lists a job by default
+_QUEUED_STATES = {"PENDING", "RUNNING", "SUSPENDED", "COMPLETING", "CONFIGURING"}
+
+
+class SlurmBackend(ABC):
+    """
+    Lists and submits the jobs of the current user.
+    """
+
+    def __init__(self, configuration):
+        """
+        @param configuration: The Configuration using this backend, which provides its settings
+        @type configuration: jupyterlab_trame_manager.mixins.slurm.SlurmMixin
+        """
+        self.configuration = configuration
+
+    @property
+    def log(self):
+        return self.configuration.log
+
+    @abstractmethod
+    async def get_jobs(self) -> list[SlurmJob]:
+        """
+        @return: The queued jobs of the user with the fields `job_id`, `name`, `account`, `partition`, `nodes`,
+            `time_used`, `time_limit`, `state`, `node_list` and `std_out`, the file of the standard output
+        """
+        pass
+
+    @abstractmethod
+    async def submit(
+            self, job_path: Path, job_dir: Path, options: ParaViewLaunchOptions, array: str | None = None,
+    ) -> tuple[int, str]:
+        """
+        @param job_path: The rendered job script
+        @param job_dir: The directory of the job, which also contains its output
+        @param options: The options the job script was rendered with
+        @param array: The task ids, e.g. `0-19`, to submit the job as a job array
+        @return: The exit-code and the output of the submission, like `sbatch`
+        """
+        pass
+
+    async def close(self):
+        """ Release the resources of the backend """
+        pass
+
+
+class SlurmCliBackend(SlurmBackend):
+    """
+    Runs the Slurm commands in a subprocess.
+    """
+
+    async def get_jobs(self) -> list[SlurmJob]:
+        # Prefer the node-local cache and only fork squeue ourselves, if it is not available
+        out = await slurm_cache.query("squeue", logger=self.log)
+        if out is None:
+            result = await execute(
+                "squeue",
+                "--me", "--noheader",
+                f"--Format={slurm_cache.SQUEUE_FORMAT}",
+                timeout=self.configuration.slurm_timeout,
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"squeue exited with {result.returncode}: {result.stderr.strip()}")
+            out = result.stdout
+
+        jobs = []
+        for line in out.splitlines():
+            self.log.info(f"Found Server: {line}")
+            fields = [field.strip() for field in line.split(";")]
+            # A node-local cache of an older version might not report the output file yet
+            job_id, name, account, partition, nodes, time_used, time_limit, state, node_list, *std_out = fields
+            jobs.append(dict(
+                job_id=job_id, name=name, account=account, partition=partition, nodes=int(nodes),
+                time_used=time_used, time_limit=time_limit, state=state, node_list=node_list,
+                std_out=std_out[0] if std_out else "",
+            ))
+
+        return jobs
+
+    async def submit(
+            self, job_path: Path, job_dir: Path, options: ParaViewLaunchOptions, array: str | None = None,
+    ) -> tuple[int, str]:
+        args = [f"--array={array}"] if array else []
+        return await output("sbatch", *args, str(job_path), logger=self.log, timeout=self.configuration.slurm_timeout)
+
+
+def _number(value) -> int | None:
+    # Since v0.0.40, numbers are objects, which tell whether they are set or infinite
+    if isinstance(value, dict):
+        return value.get("number") if value.get("set", True) and not value.get("infinite", False) else None
+    return value
+
+
+def _format_duration(seconds: int | None) -> str:
+    # The format of squeue, e.g., `5:03`, `1:00:00` or `2-00:00:00`
+    if seconds is None:
+        return "UNLIMITED"
+
+    days, seconds = divmod(int(seconds), 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return f"{days}-{hours:02}:{minutes:02}:{seconds:02}"
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
+
+
+def _parse_duration(value: str) -> int:
+    # The time formats of sbatch, i.e., `minutes`, `minutes:seconds`, `hours:minutes:seconds`, `days-hours`,
+    # `days-hours:minutes` and `days-hours:minutes:seconds`. Returns minutes, rounded up like Slurm does
+    days, _, value = value.rpartition("-")
+    parts = [int(part) for part in value.split(":")]
+    if days:
+        hours, minutes, seconds = (parts + [0, 0])[:3]
+    elif len(parts) == 3:
+        hours, minutes, seconds = parts
+    else:
+        hours, (minutes, seconds) = 0, (parts + [0])[:2]
+
+    total = ((int(days or 0) * 24 + hours) * 60 + minutes) * 60 + seconds
+    return -(-total // 60)
+
+
+class SlurmRestBackend(SlurmBackend):
+    """
+    Talks to `slurmrestd` over a pool of keep-alive connections. Requests are authenticated with a JWT, which is taken
+    from the `SLURM_JWT` environment variable, or requested with `scontrol token` and cached until shortly before it
+    expires.
+
+    The Configuration must provide `slurmrestd_url`, `slurmrestd_api_version` and `slurmrestd_token_lifespan`.
+    """
+
+    def __init__(self, configuration):
+        super().__init__(configuration)
+        self._session = None
+        self._token: str | None = None
+        self._token_expires = -float("inf")
+        self._user = pwd.getpwuid(os.getuid()).pw_name
+
+    def _url(self, api: str, path: str) -> str:
+        # The API is either `slurm`, served by slurmctld, or `slurmdb`, served by slurmdbd
+        url = self.configuration.slurmrestd_url.rstrip("/")
+        return f"{url}/{api}/{self.configuration.slurmrestd_api_version}{path}"
+
+    async def _get_token(self) -> str:
+        if token := os.getenv("SLURM_JWT"):
+            return token
+
+        # Renew the token, before it might expire during a request
+        if self._token is None or time.monotonic() > self._token_expires:
+            lifespan = self.configuration.slurmrestd_token_lifespan
+            result = await execute(
+                "scontrol", "token", f"lifespan={lifespan}", timeout=self.configuration.slurm_timeout,
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"scontrol token exited with {result.returncode}: {result.stderr.strip()}")
+
+            self._token = result.stdout.strip().partition("SLURM_JWT=")[2]
+            self._token_expires = time.monotonic() + lifespan * 0.9
+
+        return self._token
+
+    async def _request(
+            self, method: str, api: str, path: str, body: dict | None = None, params: dict | None = None,
+    ) -> dict:
+        # aiohttp is only needed for this backend, so it is an optional dependency, which we import on first use
+        try:
+            import aiohttp
+        except ImportError as e:
+            raise RuntimeError("SlurmRestBackend needs aiohttp, install jupyterlab-trame-manager[slurmrestd]") from e
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.configuration.slurm_timeout),
+                connector=aiohttp.TCPConnector(limit=4),
+            )
+
+        for attempt in range(2):
+            headers = {"X-SLURM-USER-NAME": self._user, "X-SLURM-USER-TOKEN": await self._get_token()}
+            request = self._session.request(method, self._url(api, path), json=body, params=params, headers=headers)
+            async with span(f"slurmrestd.{method} /{api}{path}"), request as response:
+                # The cached token might have been revoked, so we request a new one once
+                if response.status == 401 and attempt == 0 and not os.getenv("SLURM_JWT"):
+                    self._token = None
+                    continue
+
+                data = await response.json(content_type=None)
+                errors = [error.get("error") or error.get("description") for error in (data or {}).get("errors", [])]
+                if response.status >= 400 or errors:
+                    raise RuntimeError(f"slurmrestd answered {response.status}: {'; '.join(map(str, errors))}")
+                return data
+
+    async def get_jobs(self) -> list[SlurmJob]:
+        # Only slurmdbd filters jobs by user and state, slurmctld would send the jobs of all users. A window from now
+        # to now selects the jobs, which are in one of the states right now, like `sacct --state`
+        now = int(time.time())
+        data = await self._request("GET", "slurmdb", "/jobs", params={
+            "users": self._user,
+            "state": ",".join(sorted(_QUEUED_STATES)).lower(),
+            "start_time": str(now),
+            "end_time": str(now),
+        })
+
+        jobs = []
+        for job in data.get("jobs", []):
+            state = job.get("state", {}).get("current")
+            state = state[0] if isinstance(state, list) else state
+            if state not in _QUEUED_STATES:
+                continue
+
+            # Identify the tasks of job arrays like squeue does, i.e., `<array job id>_<task id>`
+            job_id = str(job["job_id"])
+            array = job.get("array", {})
+            if array_job_id := _number(array.get("job_id")):
+                task_id = _number(array.get("task_id"))
+                # Pending tasks, that were not started yet, are listed together
+                task = task_id if task_id is not None else f"[{array.get('task', '')}]"
+                job_id = f"{array_job_id}_{task}"
+
+            times = job.get("time", {})
+            start_time = _number(times.get("start"))
+            time_limit = _number(times.get("limit"))
+            jobs.append(dict(
+                job_id=job_id,
+                name=job.get("name", ""),
+                account=job.get("account", ""),
+                partition=job.get("partition", ""),
+                nodes=_number(job.get("allocation_nodes")) or 0,
+                time_used=_format_duration(now - start_time if state == "RUNNING" and start_time else 0),
+                time_limit=_format_duration(time_limit * 60 if time_limit is not None else None),
+                state=state,
+                # Like squeue, we list no nodes for pending jobs
+                node_list=job.get("nodes", "") if state != "PENDING" else "",
+                std_out=job.get("stdout_expanded") or job.get("stdout", ""),
+            ))
+
+        return jobs
+
+    async def submit(
+            self, job_path: Path, job_dir: Path, options: ParaViewLaunchOptions, array: str | None = None,
+    ) -> tuple[int, str]:
+        # slurmrestd takes the options of the job from the request, instead of the #SBATCH lines of the script
+        suffix = ".%a" if array else ""
+        job = {
+            "name": options.name,
+            "account": options.account,
+            "partition": options.partition,
+            "minimum_nodes": options.nodes,
+            "time_limit": {"set": True, "number": _parse_duration(options.time_limit)},
+            "current_working_directory": str(job_dir),
+            "standard_output": str(job_dir / f"stdout{suffix}"),
+            "standard_error": str(job_dir / f"stderr{suffix}"),
+            "environment": [f"{key}={value}" for key, value in os.environ.items()],
+        }
+        if array:
+            job["array"] = array
+
+        # The job script might be on a network file system, so we don't block the event loop with reading it
+        script = await asyncio.get_running_loop().run_in_executor(None, job_path.read_text)
+        try:
+            data = await self._request("POST", "slurm", "/job/submit", {"script": script, "job": job})
+        except RuntimeError as e:
+            self.log.error(str(e))
+            return 1, str(e)
+
+        message = f"Submitted batch job {data['job_id']}"
+        self.log.info(message)
+        return 0, message
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
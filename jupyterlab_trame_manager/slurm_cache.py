@@ -0,0 +1,204 @@
+"""
+Node-local cache for Slurm queries.
+
+Many JupyterLab servers on the same login node query Slurm for the same information. Instead of each of them
+forking `squeue` and `sacctmgr`, a single cache process can run one aggregated query for all users per cycle and
+serve every extension its own slice over a unix socket:
+
+    python -m jupyterlab_trame_manager.slurm_cache --socket /run/trame-manager/slurm.sock
+
+The extension uses the cache, if the `TRAME_MANAGER_SLURM_CACHE` environment variable points to the socket, and falls
+back to querying Slurm directly when the cache is not reachable. The cache identifies the user of a connection via
+the credentials of the peer, so users only ever receive their own slice.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import pwd
+import socket
+import struct
+import time
+
+from .cmd import execute
+
+
+__all__ = ["SQUEUE_FORMAT", "ASSOCIATIONS_FORMAT", "query", "SlurmCache"]
+
+
+# Fields queried for each job. The cache prepends the user name to aggregate the query for all users
+SQUEUE_FORMAT = "JobID:;,Name:;,Account:;,Partition:;,NumNodes:;,TimeUsed:;,TimeLimit:;,State:;,NodeList:;,STDOUT"
+
+# Fields queried for each association. The cache prepends the user name to aggregate the query for all users
+ASSOCIATIONS_FORMAT = "Account,Partition"
+
+QUERY_TIMEOUT = 5
+
+# Outputs older than this many intervals of their query are not served anymore, e.g., while Slurm is unreachable
+STALE_INTERVALS = 3
+
+
+async def query(name: str, logger=None) -> str | None:
+    """
+    Query the slice of the current user from the node-local cache.
+
+    @param name: The name of the query, i.e., `squeue` or `associations`
+    @param logger: A optional logger to log failures into
+    @return: The output of the query, in the same format as querying Slurm directly, or None if the cache is unavailable
+    """
+    path = os.getenv("TRAME_MANAGER_SLURM_CACHE")
+    if not path:
+        return None
+
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(path), QUERY_TIMEOUT)
+        try:
+            writer.write(json.dumps({"query": name}).encode() + b"\n")
+            await writer.drain()
+            response = json.loads(await asyncio.wait_for(reader.readline(), QUERY_TIMEOUT))
+        finally:
+            writer.close()
+
+    except (OSError, ValueError, asyncio.TimeoutError) as e:
+        if logger:
+            logger.warning(f"Slurm cache at {path!r} is not available, querying Slurm directly: {e!r}")
+        return None
+
+    if "error" in response:
+        if logger:
+            logger.warning(f"Slurm cache failed to answer {name!r}: {response['error']}")
+        return None
+
+    if logger:
+        logger.debug(f"Slurm cache answered {name!r} with an output of {response['age']:.1f}s ago")
+    return response["output"]
+
+
+def _peer_user(sock: socket.socket) -> str:
+    # The kernel tells us the uid of the process on the other end of the socket
+    _, uid, _ = struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+    return pwd.getpwuid(uid).pw_name
+
+
+class _Query:
+    """
+    A periodically refreshed query, whose output is split into a slice per user. The first field of each line must
+    be the name of the user.
+    """
+
+    def __init__(self, command: list[str], separator: str, interval: float, log: logging.Logger):
+        self.command = command
+        self.separator = separator
+        self.interval = interval
+        self.log = log
+
+        self.slices: dict[str, str] = {}
+        # The monotonic time of the last successful refresh, None until the query succeeded once
+        self.updated: float | None = None
+
+    @property
+    def age(self) -> float | None:
+        """ Seconds since the last successful refresh, or None if the query has not succeeded yet """
+        return time.monotonic() - self.updated if self.updated is not None else None
+
+    def check(self):
+        """ @raise RuntimeError: If there is no output yet, or it is too old to be served """
+        if self.updated is None:
+            raise RuntimeError(f"{self.command[0]!r} has not succeeded yet")
+        if self.age > STALE_INTERVALS * self.interval:
+            raise RuntimeError(f"The last successful {self.command[0]!r} was {self.age:.0f}s ago")
+
+    async def refresh(self):
+        result = await execute(*self.command)
+        if result.returncode != 0:
+            self.log.error(f"{self.command[0]!r} exited with {result.returncode}: {result.stderr.strip()}")
+            return
+
+        lines: dict[str, list[str]] = {}
+        for line in result.stdout.splitlines():
+            user, _, rest = line.partition(self.separator)
+            lines.setdefault(user.strip(), []).append(rest)
+
+        self.slices = {user: "\n".join(rest) + "\n" for user, rest in lines.items()}
+        self.updated = time.monotonic()
+        self.log.info(f"Refreshed {self.command[0]!r} for {len(self.slices)} users in {result.duration:.2f}s")
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.log.error(f"Failed to run {self.command[0]!r}: {e!r}")
+
+            await asyncio.sleep(self.interval)
+
+
+class SlurmCache:
+    """
+    The cache process, serving the slices of the aggregated Slurm queries over a unix socket.
+    """
+
+    def __init__(self, socket_path: str, interval: float, associations_interval: float, log: logging.Logger):
+        self.socket_path = socket_path
+        self.log = log
+
+        self.queries = {
+            "squeue": _Query(
+                ["squeue", "--all", "--noheader", f"--Format=UserName:;,{SQUEUE_FORMAT}"],
+                ";", interval, log,
+            ),
+            "associations": _Query(
+                ["sacctmgr", "show", "association", f"format=User,{ASSOCIATIONS_FORMAT}", "--parsable2", "--noheader"],
+                "|", associations_interval, log,
+            ),
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            user = _peer_user(writer.get_extra_info("socket"))
+            request = json.loads(await reader.readline())
+
+            # Clients rather query Slurm themselves than wait for the cache or use outdated output
+            query = self.queries[request["query"]]
+            query.check()
+            response = {"output": query.slices.get(user, ""), "age": query.age}
+
+        except Exception as e:
+            response = {"error": repr(e)}
+
+        try:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+
+        server = await asyncio.start_unix_server(self._handle, self.socket_path)
+        os.chmod(self.socket_path, 0o666)  # Every user on the node may connect
+        self.log.info(f"Serving Slurm queries on {self.socket_path!r}")
+
+        async with server:
+            await asyncio.gather(server.serve_forever(), *(query.run() for query in self.queries.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--socket", required=True, help="Path of the unix socket to serve on")
+    parser.add_argument("--interval", type=float, default=15, help="Seconds between two `squeue` queries")
+    parser.add_argument(
+        "--associations-interval", type=float, default=600, help="Seconds between two `sacctmgr` queries"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s %(levelname)s] %(message)s")
+    cache = SlurmCache(args.socket, args.interval, args.associations_interval, logging.getLogger("slurm_cache"))
+    asyncio.run(cache.serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Versioned JSON snapshots of the resources served by the API.
+
+Clients poll the lists of trame apps and ParaView Servers, while they rarely change. A L{Snapshot} keeps the encoded
+list of the current version, so a poll costs no serialization. The version is only incremented, if an item actually
+changed after the snapshot was invalidated. Clients can revalidate their copy with the ETag of the version, or ask for
+the items that changed since a version they already know.
+"""
+import json
+from collections import deque
+from secrets import token_hex
+from typing import Callable
+
+
+__all__ = ["Snapshot"]
+
+
+# Distinguishes the versions of different server processes, so ETags of a previous process never match
+_EPOCH = token_hex(4)
+
+
+class Snapshot:
+    """
+    The serialized items of one resource, e.g., the trame apps.
+    """
+
+    def __init__(self, name: str, build: Callable[[], dict[str, dict]], history: int = 64):
+        """
+        @param name: The name of the resource
+        @param build: Returns the current items as JSON-serializable dicts by their key
+        @param history: Number of versions, whose changes are kept for L{delta}
+        """
+        self.name = name
+        self._build = build
+
+        self.version = 0
+        self._items: dict[str, dict] = {}
+        self._body = b"[]"
+        self._valid = False
+
+        # The added, changed and removed keys of the recent versions, to answer deltas
+        self._changes: deque[tuple[int, set[str], set[str], set[str]]] = deque(maxlen=history)
+        # The encoded deltas of the current version by the version they start from
+        self._deltas: dict[int, bytes] = {}
+
+    @property
+    def etag(self) -> str:
+        self._update()
+        return f'"{self.name}-{_EPOCH}-{self.version}"'
+
+    def invalidate(self):
+        """ Mark the snapshot as outdated. It is rebuilt on the next access """
+        self._valid = False
+
+    def body(self) -> bytes:
+        """ @return: The encoded list of all items of the current version """
+        self._update()
+        return self._body
+
+    def delta(self, since: int) -> bytes:
+        """
+        The changes between a previous version and the current one, encoded as:
+
+            {"version": <current>, "since": <since>, "reset": false, "added": [...], "changed": [...], "removed": [keys]}
+
+        If the changes since the version are no longer known, `reset` is true and all items are returned as added.
+
+        @param since: The version the client already knows
+        @return: The encoded changes
+        """
+        self._update()
+        cached = self._deltas.get(since)
+        if cached is not None:
+            return cached
+
+        delta = self._delta(since)
+        encoded = json.dumps(delta).encode()
+        # `since` comes from the client, so only the versions within the history are cached, i.e., at most `history + 1`
+        # deltas. Resets for any other version are built on every request
+        if not delta["reset"]:
+            self._deltas[since] = encoded
+        return encoded
+
+    def _delta(self, since: int) -> dict:
+        delta = {"version": self.version, "since": since, "reset": False, "added": [], "changed": [], "removed": []}
+
+        oldest = self._changes[0][0] if self._changes else self.version + 1
+        if since > self.version or (since < self.version and since < oldest - 1):
+            delta.update(reset=True, added=list(self._items.values()))
+            return delta
+
+        # Whether each touched key existed at the requested version, determined by its first change afterwards
+        existed: dict[str, bool] = {}
+        for version, added, changed, removed in self._changes:
+            if version <= since:
+                continue
+            for key in added:
+                existed.setdefault(key, False)
+            for key in changed | removed:
+                existed.setdefault(key, True)
+
+        for key, before in existed.items():
+            if key in self._items:
+                delta["changed" if before else "added"].append(self._items[key])
+            elif before:
+                delta["removed"].append(key)
+
+        return delta
+
+    def _update(self):
+        if self._valid:
+            return
+
+        items = self._build()
+        self._valid = True
+
+        added = items.keys() - self._items.keys()
+        removed = self._items.keys() - items.keys()
+        changed = {key for key in items.keys() & self._items.keys() if items[key] != self._items[key]}
+        if not (added or removed or changed):
+            return
+
+        self.version += 1
+        self._items = items
+        self._body = json.dumps(list(items.values())).encode()
+        self._changes.append((self.version, set(added), changed, set(removed)))
+        self._deltas.clear()
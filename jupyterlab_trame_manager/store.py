@@ -0,0 +1,152 @@
+"""
+Persistent state of the running trame instances.
+
+trame instances run in their own process group, so they outlive a restart of JupyterLab. The L{InstanceStore} records
+every instance in a SQLite database in the runtime directory, so the next server can take them over again instead of
+leaving them orphaned. A process is identified by its PID together with its start time, as PIDs are reused by the
+system. Each record is owned by the server, which launched or took over the instance. Records are only taken over,
+once their owner is gone, so several servers of the same user can share the database.
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+
+__all__ = ["InstanceStore", "AdoptedProcess", "process_start_time", "is_running"]
+
+
+def process_start_time(pid: int) -> int | None:
+    """
+    @return: The start time of a process in clock ticks since boot, or None if there is no process with this PID
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            # The command name in the second field might contain spaces, so we split after its closing parenthesis
+            return int(stat.read().rpartition(")")[2].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def is_running(pid: int | None, start_time: int | None) -> bool:
+    """ @return: Whether the process with this PID is still the one, that was started at the given time """
+    return pid is not None and start_time is not None and process_start_time(pid) == start_time
+
+
+class AdoptedProcess:
+    """
+    A process launched by a previous server, that mimics the parts of L{asyncio.subprocess.Process} used for trame
+    instances. As it is not a child of this server, it can only be polled, and its exit code is unknown.
+    """
+
+    def __init__(self, pid: int, start_time: int, poll_interval: float = 5):
+        """
+        @param pid: The PID of the process, which is also its process group
+        @param start_time: The start time of the process, see L{process_start_time}
+        @param poll_interval: Seconds between checks, whether the process is still running
+        """
+        self.pid = pid
+        self.start_time = start_time
+        self.poll_interval = poll_interval
+
+    @property
+    def running(self) -> bool:
+        return is_running(self.pid, self.start_time)
+
+    @property
+    def returncode(self) -> int | None:
+        """ None while the process is running, afterwards -1, as the actual exit code is unknown """
+        return None if self.running else -1
+
+    async def wait(self) -> None:
+        """ Wait until the process has exited. The exit code is unknown, so this always returns None """
+        while self.running:
+            await asyncio.sleep(self.poll_interval)
+
+
+class InstanceStore:
+    """
+    The records of the trame instances on this host. All methods are blocking.
+    """
+
+    _columns = (
+        "uuid", "host", "server_pid", "server_start_time", "app_name", "name", "data_directory", "pid", "start_time",
+        "port", "unix_socket", "log_file", "auth_key_file", "connection", "warm",
+    )
+
+    def __init__(self, path: Path):
+        """
+        @param path: The SQLite database. It is created on first use
+        """
+        self.path = path
+        self.host = socket.gethostname()
+        self._server_pid = os.getpid()
+        self._server_start_time = process_start_time(self._server_pid)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS instances (uuid TEXT PRIMARY KEY, host TEXT NOT NULL, "
+            "server_pid INTEGER, server_start_time INTEGER, app_name TEXT NOT NULL, name TEXT NOT NULL, "
+            "data_directory TEXT NOT NULL, pid INTEGER NOT NULL, start_time INTEGER, port INTEGER, unix_socket TEXT, "
+            "log_file TEXT NOT NULL, auth_key_file TEXT NOT NULL, connection TEXT, warm INTEGER NOT NULL DEFAULT 0)"
+        )
+        return connection
+
+    def save(self, instance):
+        """
+        Record a running instance, or update its record, e.g., after it was connected. This server becomes its owner.
+
+        @param instance: The trame instance
+        @type instance: jupyterlab_trame_manager.configuration.TrameInstance
+        """
+        pid = instance.process_handle.pid
+        start_time = getattr(instance.process_handle, "start_time", None) or process_start_time(pid)
+        record = (
+            instance.uuid, self.host, self._server_pid, self._server_start_time, instance.app_name, instance.name,
+            str(instance.data_directory), pid, start_time, instance.port,
+            str(instance.unix_socket) if instance.unix_socket else None, str(instance.log_file),
+            str(instance.auth_key_file), instance.connection.model_dump_json() if instance.connection else None,
+            instance.warm,
+        )
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO instances ({', '.join(self._columns)}) "
+                f"VALUES ({', '.join('?' * len(self._columns))})",
+                record,
+            )
+
+    def remove(self, uuid: str):
+        """ Delete the record of an instance """
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM instances WHERE uuid = ?", (uuid,))
+
+    def orphans(self) -> list[dict]:
+        """
+        The records of this host, whose owner is no longer running. The connection is parsed from JSON and `running`
+        tells, whether the process of the instance is still the same. `warm` tells, whether the instance is an unclaimed
+        worker of a warm pool.
+
+        @return: The records as dicts with the column names as keys
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT * FROM instances WHERE host = ?", (self.host,)).fetchall()
+
+        orphans = []
+        for row in map(dict, rows):
+            owned = (row["server_pid"], row["server_start_time"]) == (self._server_pid, self._server_start_time)
+            if not owned and is_running(row["server_pid"], row["server_start_time"]):
+                continue  # Another server still manages this instance
+
+            row["connection"] = json.loads(row["connection"]) if row["connection"] else None
+            row["running"] = is_running(row["pid"], row["start_time"])
+            row["warm"] = bool(row["warm"])
+            orphans.append(row)
+
+        return orphans
@@ -0,0 +1,267 @@
+"""
+Opt-in tracing of requests.
+
+While a request is handled, L{span} measures named sections of it, like the hooks of the Configuration or commands.
+The spans are collected in the L{Trace} of the request, which is kept in a context variable, so it follows the request
+across awaits and into the tasks started by it. The handlers send the spans as `Server-Timing` header, which the
+browser shows in the timing of the request. Without an active trace, i.e., while tracing is disabled or in background
+tasks, a span only looks up the context variable.
+
+Requests slower than a threshold can also be profiled: the L{SamplingProfiler} samples the stack of the event loop
+thread while requests are in flight, and writes the samples of a slow request into a file in the collapsed format of
+flame graph tools, e.g., `flamegraph.pl` or speedscope. All requests on the event loop share the thread, so the samples
+of concurrent requests overlap.
+"""
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from logging import Logger
+from pathlib import Path
+
+
+__all__ = ["Trace", "Tracer", "SamplingProfiler", "span", "traced", "current_trace"]
+
+
+_current: ContextVar["Trace | None"] = ContextVar("trame_manager_trace", default=None)
+
+# Characters that are not allowed in the names of the metrics of a Server-Timing header
+_INVALID_TOKEN = re.compile(r"[^!#$%&'*+\-.^_`|~0-9A-Za-z]")
+
+
+class Trace:
+    """
+    The spans of a single request.
+    """
+
+    def __init__(self, name: str):
+        """
+        @param name: Identifies the request, e.g., `TrameHandler.POST`
+        """
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration: float | None = None  # Seconds, once the request has finished
+        # Total duration in seconds and number of the spans by their name, in the order they were first entered
+        self.spans: dict[str, list[float | int]] = {}
+
+    def add(self, name: str, duration: float):
+        # Background tasks started by the request might outlive it
+        if self.duration is not None:
+            return
+
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [duration, 1]
+        else:
+            entry[0] += duration
+            entry[1] += 1
+
+    def finish(self) -> float:
+        """ @return: The duration of the request in seconds """
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.start
+        return self.duration
+
+    def server_timing(self) -> str:
+        """ @return: The spans and the total duration as value of a `Server-Timing` header """
+        metrics = []
+        for name, (duration, count) in self.spans.items():
+            metric = f"{_INVALID_TOKEN.sub('_', name)};dur={duration * 1000:.1f}"
+            if count > 1:
+                metric += f';desc="{count} calls"'
+            metrics.append(metric)
+
+        metrics.append(f"total;dur={self.finish() * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+def current_trace() -> Trace | None:
+    """ @return: The trace of the request, which is currently handled, if it is traced """
+    return _current.get()
+
+
+class span:
+    """
+    Measure a section of a request, e.g.:
+
+        with span("configuration.get_user_data"):
+            user_data = await self._configuration.get_user_data()
+    """
+    __slots__ = ("name", "trace", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current.get()
+        if self.trace is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.trace is not None:
+            self.trace.add(self.name, time.perf_counter() - self.start)
+
+    # Allows to combine the span with asynchronous context managers in a single `async with`
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        self.__exit__(*exc_info)
+
+
+def traced(name: str):
+    """
+    Decorate a function or coroutine function, so every call is measured as a span with the given name.
+    """
+    def decorator(function):
+        if iscoroutinefunction(function):
+            @wraps(function)
+            async def wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+        else:
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with span(name):
+                    return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of a thread in a background thread, while at least one trace is active. Each sample is counted
+    for all active traces.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: int | None = None):
+        """
+        @param interval: Seconds between samples
+        @param thread_id: The thread to sample, by default the current thread, i.e., the thread of the event loop
+        """
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self._samples: dict[Trace, Counter] = {}
+        self._lock = threading.Lock()
+        self._sampler: threading.Thread | None = None
+
+    def add(self, trace: Trace):
+        """ Start collecting samples for a trace """
+        with self._lock:
+            self._samples[trace] = Counter()
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._run, name="trame-manager-profiler", daemon=True)
+                self._sampler.start()
+
+    def remove(self, trace: Trace) -> Counter:
+        """ @return: The number of samples of a trace by their collapsed stack """
+        with self._lock:
+            return self._samples.pop(trace, Counter())
+
+    def _stack(self) -> str | None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return None
+
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(frames))
+
+    def _run(self):
+        # The sampler exits, once no trace is active anymore, and is restarted by the next one
+        while True:
+            stack = self._stack()
+            with self._lock:
+                if not self._samples:
+                    self._sampler = None
+                    return
+                if stack is not None:
+                    for samples in self._samples.values():
+                        samples[stack] += 1
+
+            time.sleep(self.interval)
+
+    @staticmethod
+    def dump(samples: Counter, path: Path):
+        """ Write samples in the collapsed format, i.e., a line with the stack and the number of samples each """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in samples.most_common()))
+
+
+class Tracer:
+    """
+    Starts and finishes the traces of requests, and profiles slow requests, if enabled.
+    """
+
+    def __init__(
+            self,
+            enabled: bool = False,
+            profile_dir: Path | None = None,
+            profile_threshold: float = 2,
+            profile_interval: float = 0.005,
+            logger: Logger | None = None,
+    ):
+        """
+        @param enabled: Whether the spans of requests are sent as `Server-Timing` header
+        @param profile_dir: Directory for the profiles of slow requests. None disables the profiler
+        @param profile_threshold: Seconds, after which a request is slow
+        @param profile_interval: Seconds between samples of the profiler
+        @param logger: A optional logger, which reports the written profiles
+        """
+        self.enabled = enabled
+        self.profile_dir = Path(profile_dir) if profile_dir is not None else None
+        self.profile_threshold = profile_threshold
+        self.profiler = SamplingProfiler(profile_interval) if self.profile_dir is not None else None
+        self.log = logger
+
+    def start(self, name: str) -> Trace | None:
+        """
+        Start the trace of a request in the current context.
+
+        @param name: Identifies the request
+        @return: The trace, or None if neither tracing nor profiling is enabled
+        """
+        if not self.enabled and self.profiler is None:
+            return None
+
+        trace = Trace(name)
+        _current.set(trace)
+        if self.profiler is not None:
+            self.profiler.add(trace)
+        return trace
+
+    def finish(self, trace: Trace) -> str | None:
+        """
+        Finish the trace of a request, and write its profile if it was slow.
+
+        @return: The value of the `Server-Timing` header, or None if tracing is disabled
+        """
+        header = trace.server_timing() if self.enabled else None
+        duration = trace.finish()
+
+        if self.profiler is not None:
+            samples = self.profiler.remove(trace)
+            if duration >= self.profile_threshold and samples:
+                name = _INVALID_TOKEN.sub("_", trace.name)
+                path = self.profile_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{duration * 1000:.0f}ms.folded"
+                try:
+                    self.profiler.dump(samples, path)
+                except OSError as e:
+                    if self.log:
+                        self.log.error(f"Failed to write profile of {trace.name}: {e}")
+                else:
+                    if self.log:
+                        self.log.warning(f"{trace.name} took {duration:.2f}s, profile written to {str(path)!r}")
+
+        return header
@@ -62,6 +62,7 @@ export class ParaViewLauncherDialog
   private readonly _partitionElement: HTMLSelectElement;
   private readonly _nodesElement: HTMLInputElement;
   private readonly _timeElement: HTMLInputElement;
+  private readonly _countElement: HTMLInputElement;
 
   constructor() {
     super();
@@ -110,6 +111,18 @@ export class ParaViewLauncherDialog
     );
     this.node.appendChild(timeForm);
 
+    // Count form. Several servers are named by the pattern `{index}` in the name
+    const countForm = document.createElement('div');
+    countForm.appendChild(createLabel('count', 'Count: '));
+    countForm.appendChild(
+      (this._countElement = createInput('count', 'number', '1', [
+        ['min', '1'],
+        ['max', '64'],
+        ['step', '1']
+      ]))
+    );
+    this.node.appendChild(countForm);
+
     this.fetchUserData();
   }
 
@@ -137,7 +150,8 @@ export class ParaViewLauncherDialog
       account: this._accountElement.value,
       partition: this._partitionElement.value,
       nodes: Number(this._nodesElement.value),
-      timeLimit: this._timeElement.value
+      timeLimit: this._timeElement.value,
+      count: Number(this._countElement.value)
     };
   }
 }
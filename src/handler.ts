@@ -1,6 +1,12 @@
 import { URLExt } from '@jupyterlab/coreutils';
 import { ServerConnection } from '@jupyterlab/services';
-import { useState, useEffect } from 'react';
+import {
+  useState,
+  useEffect,
+  useRef,
+  Dispatch,
+  SetStateAction
+} from 'react';
 
 /**
  * Call the API extension
@@ -54,7 +60,7 @@ export async function requestAPI<T>(
 export function useAPI<T>(
   endPoint: string,
   init: RequestInit = {}
-): [T | null, () => void] {
+): [T | null, () => void, Dispatch<SetStateAction<T | null>>] {
   const [data, setData] = useState<T | null>(null);
 
   const fetchData = () => {
@@ -63,7 +69,102 @@ export function useAPI<T>(
       .catch(error => console.error(error));
   };
 
-  useEffect(fetchData, [endPoint, init]);
+  // The default value of init is a new object on every render, so it must
+  // not be a dependency of the effect
+  useEffect(fetchData, [endPoint]);
 
-  return [data, fetchData];
+  return [data, fetchData, setData];
+}
+
+/**
+ * A change event pushed by the server
+ */
+export type ChangeEvent = {
+  resource: 'paraview' | 'trame' | 'connection';
+  action: string;
+  [key: string]: any;
+};
+
+type EventListener = {
+  onEvent: (event: ChangeEvent) => void;
+  onStatus: (connected: boolean) => void;
+};
+
+const ReconnectTimeout = 5 * 1000; // 5 Seconds
+const eventListeners = new Set<EventListener>();
+let eventSocket: WebSocket | null = null;
+let eventSocketConnected = false;
+let reconnectHandle: ReturnType<typeof setTimeout> | null = null;
+
+function setEventSocketStatus(connected: boolean) {
+  eventSocketConnected = connected;
+  eventListeners.forEach(listener => listener.onStatus(connected));
+}
+
+function openEventSocket() {
+  const settings = ServerConnection.makeSettings();
+  let url = URLExt.join(settings.wsUrl, 'trame-manager', 'events');
+  if (settings.token) {
+    url += `?token=${encodeURIComponent(settings.token)}`;
+  }
+
+  const socket = new settings.WebSocket(url);
+  socket.onopen = () => setEventSocketStatus(true);
+  socket.onmessage = message => {
+    const event = JSON.parse(message.data) as ChangeEvent;
+    eventListeners.forEach(listener => listener.onEvent(event));
+  };
+  socket.onclose = () => {
+    eventSocket = null;
+    setEventSocketStatus(false);
+
+    // Reconnect as long as someone is listening
+    if (eventListeners.size > 0) {
+      reconnectHandle = setTimeout(() => {
+        reconnectHandle = null;
+        openEventSocket();
+      }, ReconnectTimeout);
+    }
+  };
+
+  eventSocket = socket;
+}
+
+/**
+ * React hook for the change events pushed by the server. All hooks share a
+ * single WebSocket connection.
+ *
+ * @param onEvent Callback for every received event
+ * @returns Whether the event channel is connected. Callers should fall back
+ *   to polling while it is not.
+ */
+export function useEvents(onEvent: (event: ChangeEvent) => void): boolean {
+  const [connected, setConnected] = useState(eventSocketConnected);
+  const callback = useRef(onEvent);
+  callback.current = onEvent;
+
+  useEffect(() => {
+    const listener: EventListener = {
+      onEvent: event => callback.current(event),
+      onStatus: setConnected
+    };
+    eventListeners.add(listener);
+
+    if (eventSocket === null && reconnectHandle === null) {
+      openEventSocket();
+    }
+
+    return () => {
+      eventListeners.delete(listener);
+      if (eventListeners.size === 0) {
+        if (reconnectHandle !== null) {
+          clearTimeout(reconnectHandle);
+          reconnectHandle = null;
+        }
+        eventSocket?.close();
+      }
+    };
+  }, []);
+
+  return connected;
 }
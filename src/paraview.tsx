@@ -3,7 +3,7 @@ import Collapsible from 'react-collapsible';
 import { showDialog, showErrorMessage } from '@jupyterlab/apputils';
 import { refreshIcon } from '@jupyterlab/ui-components';
 
-import { requestAPI, useAPI } from './handler';
+import { ChangeEvent, requestAPI, useAPI, useEvents } from './handler';
 import { ParaViewLauncherDialog } from './dialogs';
 import { Info } from './components';
 
@@ -13,30 +13,58 @@ export type ParaViewLaunchOptions = {
   partition: string;
   nodes: number;
   timeLimit: string;
+  count?: number; // Launched as a job array, `{index}` in the name is replaced
 };
 
 export type ParaViewInstanceOptions = ParaViewLaunchOptions & {
+  jobId: string | null;
+  port: number;
   state: string;
   timeUsed: string;
+  ready: boolean; // pvserver accepts connections
+  latency: number | null;
+  nodeList: string; // Slurm hostlist, e.g. `jwb[0001-0004]`
+  rootNode: string | null; // The node pvserver runs on
 };
 
 type ParaViewReturnStatus = {
   returnCode: number;
   message: string;
+  elements?: {
+    name: string;
+    jobId: string | null;
+    returnCode: number;
+    message: string;
+  }[];
 };
 
 const RefreshTimeout = 30 * 1000; // 30 Seconds
 const ParaViewContext = createContext<ParaViewInstanceOptions[]>([]);
 
 function ParaViewInstance({ index }: { index: number }) {
-  const { name, account, nodes, partition, state, timeLimit, timeUsed } =
-    useContext(ParaViewContext)[index];
+  const {
+    name,
+    account,
+    nodes,
+    partition,
+    port,
+    state,
+    ready,
+    latency,
+    nodeList,
+    rootNode,
+    timeLimit,
+    timeUsed
+  } = useContext(ParaViewContext)[index];
 
   const label = (
     <>
       <b>{name}</b>
       <Info label="Nodes" value={nodes.toString()} />
-      <Info label="Status" value={state} />
+      <Info
+        label="Status"
+        value={state === 'RUNNING' && !ready ? 'STARTING' : state}
+      />
       <Info label="Time" value={`${timeUsed} / ${timeLimit}`} />
     </>
   );
@@ -47,18 +75,59 @@ function ParaViewInstance({ index }: { index: number }) {
         <Info label="Project" value={account} />
         <Info label="Partition" value={partition} />
         <Info label="Nodes" value={nodes.toString()} />
+        <Info label="Port" value={port.toString()} />
+        {rootNode && <Info label="Root Node" value={rootNode} />}
+        {nodeList && <Info label="Node List" value={nodeList} />}
+        {latency !== null && (
+          <Info label="Latency" value={`${latency.toFixed(1)} ms`} />
+        )}
       </Collapsible>
     </>
   );
 }
 
+function sameServer(a: ParaViewInstanceOptions, b: ParaViewInstanceOptions) {
+  return a.jobId === null ? a.name === b.name : a.jobId === b.jobId;
+}
+
+function applyServerEvent(
+  servers: ParaViewInstanceOptions[],
+  event: ChangeEvent
+): ParaViewInstanceOptions[] {
+  const server = event.server as ParaViewInstanceOptions;
+
+  switch (event.action) {
+    case 'added':
+      return [...servers, server];
+    case 'changed':
+      return servers.map(s => (sameServer(s, server) ? server : s));
+    case 'removed':
+      return servers.filter(s => !sameServer(s, server));
+    default:
+      return servers;
+  }
+}
+
 export default function ParaViewSidepanelSegment() {
-  const [instances, refresh] = useAPI<ParaViewInstanceOptions[]>('paraview');
+  const [instances, refresh, setInstances] =
+    useAPI<ParaViewInstanceOptions[]>('paraview');
 
+  const connected = useEvents(event => {
+    if (event.resource === 'paraview') {
+      setInstances(current => applyServerEvent(current ?? [], event));
+    }
+  });
+
+  // Only poll, if the server can't push changes to us
   useEffect(() => {
+    if (connected) {
+      refresh(); // Catch up on changes we missed while disconnected
+      return;
+    }
+
     const handle = setInterval(refresh, RefreshTimeout);
     return () => clearInterval(handle);
-  }, []);
+  }, [connected]);
 
   async function newInstance() {
     const options = await showDialog({
@@ -4,11 +4,11 @@ import {
   showErrorMessage,
   InputDialog
 } from '@jupyterlab/apputils';
-import React, { useState, createContext, useContext, useEffect } from 'react';
+import React, { createContext, useContext, useEffect } from 'react';
 import Collapsible from 'react-collapsible';
 
 import { Info, Path } from './components';
-import { requestAPI, useAPI } from './handler';
+import { ChangeEvent, requestAPI, useAPI, useEvents } from './handler';
 import { TrameLauncherDialog } from './dialogs';
 import { ParaViewInstanceOptions } from './paraview';
 
@@ -19,12 +19,25 @@ type TrameAppOptions = {
   instances: TrameInstanceOptions[];
 };
 
+type TrameConnection = {
+  server: string;
+  jobId: string | null;
+  url: string;
+  port: number;
+  latency: number | null;
+};
+
 type TrameInstanceOptions = {
+  uuid: string;
   name: string;
   dataDirectory: string;
-  port: number;
+  port: number | null;
   baseUrl: string;
   log: string;
+  connection: TrameConnection | null;
+  state: 'starting' | 'ready' | 'failed' | 'exited';
+  exitCode: number | null;
+  timings: { [phase: string]: number };
 };
 
 export type TrameLaunchOptions = Pick<
@@ -33,7 +46,6 @@ export type TrameLaunchOptions = Pick<
 >;
 
 type TrameInstanceProps = {
-  appName: string;
   appIndex: number;
   instanceIndex: number;
 };
@@ -41,14 +53,19 @@ type TrameInstanceProps = {
 const RefreshTimeout = 30 * 1000; // 30 Seconds
 const TrameContext = createContext<TrameAppOptions[]>([]);
 
-function TrameAppInstance({
-  appName,
-  appIndex,
-  instanceIndex
-}: TrameInstanceProps) {
-  const { baseUrl, dataDirectory, log, name, port } =
-    useContext(TrameContext)[appIndex].instances[instanceIndex];
-  const [connection, setConnection] = useState<[string, string] | null>(null);
+function TrameAppInstance({ appIndex, instanceIndex }: TrameInstanceProps) {
+  const {
+    baseUrl,
+    connection,
+    dataDirectory,
+    exitCode,
+    log,
+    name,
+    port,
+    state,
+    timings,
+    uuid
+  } = useContext(TrameContext)[appIndex].instances[instanceIndex];
 
   function openInstance() {
     window.open(baseUrl, '_blank', 'noreferrer');
@@ -57,45 +74,43 @@ function TrameAppInstance({
   async function connect() {
     const servers = await requestAPI<ParaViewInstanceOptions[]>('paraview');
 
-    const serverName = await InputDialog.getItem({
+    // Server names don't need to be unique, so we show the job ids as well
+    const labels = servers.map(
+      s =>
+        (s.jobId ? `${s.name} (${s.jobId})` : s.name) +
+        (s.ready ? '' : ' - starting')
+    );
+    const selection = await InputDialog.getItem({
       title: 'Select ParaView Server to connect to',
-      items: servers.map(s => s.name),
+      items: labels,
       current: 0,
       editable: false
     });
 
-    if (!serverName.value || serverName.value.length === 0) {
+    const server = servers[labels.indexOf(selection.value ?? '')];
+    if (!server) {
       return;
     }
-    console.log(
-      `Connecting instance '${name}' to Server '${serverName.value}'`
-    );
+    console.log(`Connecting instance '${name}' to Server '${server.name}'`);
 
-    const response = await requestAPI<{ url: string }>(
-      URLExt.join('trame', 'connect'),
-      {
-        method: 'POST',
-        body: JSON.stringify({
-          appName: appName,
-          instanceName: name,
-          serverName: serverName.value
-        })
-      }
-    );
+    await requestAPI<{ url: string }>(URLExt.join('trame', uuid, 'connect'), {
+      method: 'POST',
+      body: JSON.stringify(
+        server.jobId ? { jobId: server.jobId } : { serverName: server.name }
+      )
+    });
+  }
 
-    setConnection([serverName.value, response.url]);
+  async function stop() {
+    await requestAPI(URLExt.join('trame', uuid, 'stop'), {
+      method: 'POST'
+    });
   }
 
   async function disconnect() {
-    await requestAPI(URLExt.join('trame', 'disconnect'), {
-      method: 'POST',
-      body: JSON.stringify({
-        appName: appName,
-        instanceName: name
-      })
+    await requestAPI(URLExt.join('trame', uuid, 'disconnect'), {
+      method: 'POST'
     });
-
-    setConnection(null);
   }
 
   const title = (
@@ -107,9 +122,13 @@ function TrameAppInstance({
   const connectButton = connection ? (
     <div style={{ marginTop: '10px' }}>
       Connected to ParaView Server&nbsp;
-      <span style={{ fontWeight: 'bold' }}>{connection[0]}</span>
+      <span style={{ fontWeight: 'bold' }}>{connection.server}</span>
       &nbsp;on&nbsp;
-      <span style={{ fontWeight: 'bold' }}>{connection[1]}:11111</span>
+      <span style={{ fontWeight: 'bold' }}>
+        {connection.url}:{connection.port}
+      </span>
+      {connection.latency !== null &&
+        ` (${Math.round(connection.latency)} ms)`}
       <button className="disconnect-button" onClick={disconnect}>
         Disconnect
       </button>
@@ -125,15 +144,39 @@ function TrameAppInstance({
       <div style={{ flexGrow: 1 }}>
         <Collapsible trigger={title}>
           <Info label="Data Directory" value={<Path path={dataDirectory} />} />
-          <Info label="Port" value={`${port}`} />
+          <Info
+            label="Port"
+            value={port === null ? 'unix socket' : `${port}`}
+          />
           <Info label="Base URL" value={`${baseUrl}`} />
           <Info label="Log File" value={<Path path={log} />} />
+          <Info
+            label="Status"
+            value={
+              state === 'exited' && exitCode !== null
+                ? `exited with ${exitCode}`
+                : state
+            }
+          />
+          <Info
+            label="Launch Time"
+            value={Object.entries(timings)
+              .map(([phase, ms]) => `${phase}: ${Math.round(ms)} ms`)
+              .join(', ')}
+          />
           {connectButton}
+          <button className="stop-button" onClick={stop}>
+            Stop
+          </button>
         </Collapsible>
       </div>
 
-      <button className="open-button" onClick={openInstance}>
-        Open
+      <button
+        className="open-button"
+        onClick={openInstance}
+        disabled={state !== 'ready'}
+      >
+        {state === 'starting' ? 'Starting' : 'Open'}
       </button>
     </li>
   );
@@ -158,9 +201,11 @@ function TrameApp({ index }: { index: number }) {
       })
     });
 
+    const location =
+      instance.port === null ? 'a unix socket' : `port ${instance.port}`;
     await showErrorMessage(
       'Success',
-      `Launched new trame instance on port ${instance.port}`
+      `Launching new trame instance on ${location}. It can be opened as soon as it is ready.`
     );
   }
 
@@ -185,11 +230,7 @@ function TrameApp({ index }: { index: number }) {
 
         <div className="instance-list">
           {instances.map((_, idx) => (
-            <TrameAppInstance
-              appName={name}
-              appIndex={index}
-              instanceIndex={idx}
-            />
+            <TrameAppInstance appIndex={index} instanceIndex={idx} />
           ))}
         </div>
       </Collapsible>
@@ -197,13 +238,55 @@ function TrameApp({ index }: { index: number }) {
   );
 }
 
+function applyTrameEvent(
+  apps: TrameAppOptions[],
+  event: ChangeEvent
+): TrameAppOptions[] {
+  const instance = event.instance as TrameInstanceOptions;
+
+  return apps.map(app => {
+    if (app.name !== event.app) {
+      return app;
+    }
+
+    const others = app.instances.filter(i => i.uuid !== instance.uuid);
+    if (event.resource === 'trame' && event.action === 'removed') {
+      return { ...app, instances: others };
+    }
+    if (others.length === app.instances.length) {
+      return { ...app, instances: [...app.instances, instance] };
+    }
+    return {
+      ...app,
+      instances: app.instances.map(i =>
+        i.uuid === instance.uuid ? instance : i
+      )
+    };
+  });
+}
+
 export default function TrameSidepanelSegment() {
-  const [instances, refresh] = useAPI<TrameAppOptions[]>('trame');
+  const [instances, refresh, setInstances] =
+    useAPI<TrameAppOptions[]>('trame');
+
+  const connected = useEvents(event => {
+    if (event.resource === 'trame' && event.action === 'discovered') {
+      refresh();
+    } else if (event.resource === 'trame' || event.resource === 'connection') {
+      setInstances(current => applyTrameEvent(current ?? [], event));
+    }
+  });
 
+  // Only poll, if the server can't push changes to us
   useEffect(() => {
+    if (connected) {
+      refresh(); // Catch up on changes we missed while disconnected
+      return;
+    }
+
     const handle = setInterval(refresh, RefreshTimeout);
     return () => clearInterval(handle);
-  }, []);
+  }, [connected]);
 
   return (
     <>
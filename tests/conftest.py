@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import stat
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+from jupyter_server.serverapp import ServerApp
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+
+@pytest.fixture
+def stub_command(tmp_path, monkeypatch):
+    """
+    Put an executable stub in front of the PATH, e.g., for `squeue`. Returns a function, which takes the name of the
+    command and the body of a shell script.
+    """
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    def stub(name: str, script: str) -> Path:
+        path = bin_dir / name
+        path.write_text(f"#!/bin/sh\n{script}\n")
+        path.chmod(path.stat().st_mode | stat.S_IXUSR)
+        return path
+
+    return stub
+
+
+@pytest.fixture
+def jupyter_dirs(tmp_path, monkeypatch):
+    """ Point all directories of Jupyter into the temporary directory and select the desktop Configuration """
+    for name in ("path", "config", "data", "runtime", "root"):
+        (tmp_path / name).mkdir()
+    monkeypatch.setenv("TRAME_MANAGER_CONFIGURATION", "desktop")
+    monkeypatch.setenv("JUPYTER_PATH", str(tmp_path / "path"))
+    monkeypatch.setenv("JUPYTER_CONFIG_DIR", str(tmp_path / "config"))
+    monkeypatch.setenv("JUPYTER_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("JUPYTER_RUNTIME_DIR", str(tmp_path / "runtime"))
+    return tmp_path
+
+
+@pytest.fixture
+def write_app(jupyter_dirs):
+    """ Returns a function, which adds a trame app with the given name and app.yml fields to the JUPYTER_PATH """
+
+    def write(name: str, command: str = "sleep 30", **fields) -> Path:
+        app = jupyter_dirs / "path" / "trame" / name
+        app.mkdir(parents=True)
+        lines = [f"name: {name.title()}", f"command: {command}", f"working_directory: {app}"]
+        lines += [f"{field}: {value}" for field, value in fields.items()]
+        (app / "app.yml").write_text("\n".join(lines) + "\n")
+        return app
+
+    return write
+
+
+@pytest.fixture
+def serving(jupyter_dirs):
+    """
+    Returns an async context manager, which runs the extension in a Jupyter Server on a random port, once the apps are
+    discovered. It yields a function to fetch paths below `/trame-manager`, which returns error responses instead of
+    raising, and the Model.
+    """
+
+    @asynccontextmanager
+    async def serve():
+        server_app = ServerApp(jpserver_extensions={"jupyterlab_trame_manager": True})
+        server_app.initialize(argv=[
+            "--IdentityProvider.token=", "--ServerApp.port=0", "--ServerApp.open_browser=False", "--allow-root",
+            "--ServerApp.disable_check_xsrf=True", f"--ServerApp.root_dir={jupyter_dirs / 'root'}",
+            "--ServerApp.log_level=ERROR",
+        ])
+        server_app.start_app()
+        client = AsyncHTTPClient(force_instance=True)
+
+        async def fetch(path: str, **kwargs):
+            try:
+                return await client.fetch(f"http://127.0.0.1:{server_app.port}/trame-manager/{path}", **kwargs)
+            except HTTPClientError as e:
+                if e.response is None:
+                    raise
+                return e.response
+
+        for _ in range(100):
+            if json.loads((await fetch("status")).body)["state"] != "loading":
+                break
+            await asyncio.sleep(0.05)
+
+        try:
+            yield fetch, server_app.web_app.settings["trame_manager_model"]
+        finally:
+            client.close()
+            server_app.http_server.stop()
+            await server_app._cleanup()
+
+    return serve
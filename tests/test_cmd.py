@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from jupyterlab_trame_manager import cmd
+
+
+@pytest.fixture
+def observed():
+    results = []
+    cmd.add_observer(results.append)
+    yield results
+    cmd.remove_observer(results.append)
+
+
+def _running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_result_and_observers(observed):
+    script = "import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"
+    result = asyncio.run(cmd.execute(sys.executable, "-c", script))
+
+    assert (result.returncode, result.stdout, result.stderr) == (3, "out\n", "err\n")
+    assert result.executable == os.path.basename(sys.executable)
+    assert observed == [result]
+
+
+def test_timeout_kills_the_process(tmp_path, stub_command, observed):
+    stub_command("slow", 'echo $$ > "$1"\nexec sleep 30')
+    pid_file = tmp_path / "pid"
+
+    with pytest.raises(cmd.CommandTimeout) as error:
+        asyncio.run(cmd.execute("slow", str(pid_file), timeout=0.5))
+
+    assert error.value.result.returncode is None
+    assert not _running(int(pid_file.read_text()))
+    assert observed == [error.value.result]
+
+
+def test_cancellation_kills_the_process(tmp_path, stub_command):
+    stub_command("slow", 'echo $$ > "$1"\nexec sleep 30')
+    pid_file = tmp_path / "pid"
+
+    async def run():
+        task = asyncio.ensure_future(cmd.execute("slow", str(pid_file), timeout=None))
+        while not pid_file.exists() or not pid_file.read_text():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert not _running(int(pid_file.read_text()))
+
+
+def test_concurrency_limit_per_executable(tmp_path, stub_command):
+    # Each process records when it started and finished
+    stub_command("limited", f'echo "$(date +%s.%N) 1" >> {tmp_path}/events\nsleep 0.3\n'
+                            f'echo "$(date +%s.%N) -1" >> {tmp_path}/events')
+    cmd.set_concurrency_limit("limited", 2)
+
+    async def run():
+        return await asyncio.gather(*(cmd.execute("limited") for _ in range(5)))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        cmd.set_concurrency_limit("limited", cmd.DEFAULT_CONCURRENCY)
+
+    events = sorted((float(time), int(change)) for time, change in
+                    (line.split() for line in (tmp_path / "events").read_text().splitlines()))
+    running = peak = 0
+    for _, change in events:
+        running += change
+        peak = max(peak, running)
+    assert peak == 2
+
+    # The duration includes the time spent waiting for a free slot
+    assert max(result.duration for result in results) >= 0.9
@@ -0,0 +1,169 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from jupyterlab_trame_manager.control import ControlClient, ControlError
+
+
+@asynccontextmanager
+async def _trame(respond):
+    """
+    A stub of the `/api` endpoint of trame. `respond` takes the message and returns the raw response, or None to never
+    answer, or an empty response to close the connection without answering. Yields the received messages and the number of accepted connections.
+    """
+    messages = []
+    connections = []
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connections.append(writer)
+        try:
+            while request := await reader.readuntil(b"\r\n\r\n"):
+                length = int(request.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+                message = json.loads(await reader.readexactly(length))
+                messages.append(message)
+                response = respond(message)
+                if response is None:
+                    await asyncio.sleep(3600)
+                if response == b"":
+                    break  # Close without answering
+                writer.write(response)
+                await writer.drain()
+                if b"connection: close" in response.lower():
+                    break
+        except asyncio.IncompleteReadError:
+            pass
+        writer.close()
+
+    server = await asyncio.start_server(handle, "localhost", 0)
+    async with server:
+        yield server.sockets[0].getsockname()[1], messages, connections
+
+
+def _ok(body: bytes = b'{"ok": true}', headers: bytes = b"") -> bytes:
+    return b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n%s\r\n%s" % (len(body), headers, body)
+
+
+def test_messages_share_one_connection():
+    async def run():
+        async with _trame(lambda message: _ok()) as (port, messages, connections):
+            client = ControlClient(port=port)
+            first, _ = await client.post({"action": "connect"})
+            second, latency = await client.post({"action": "disconnect"})
+            await client.close()
+            return first, second, latency, messages, len(connections)
+
+    first, second, latency, messages, connections = asyncio.run(run())
+    assert first == second == {"ok": True} and latency > 0
+    assert messages == [{"action": "connect"}, {"action": "disconnect"}]
+    assert connections == 1
+
+
+def test_chunked_response():
+    chunked = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n5\r\n{\"a\":\r\n2\r\n1}\r\n0\r\n\r\n"
+
+    async def run():
+        async with _trame(lambda message: chunked) as (port, _, _):
+            client = ControlClient(port=port)
+            try:
+                return (await client.post({}))[0]
+            finally:
+                await client.close()
+
+    assert asyncio.run(run()) == {"a": 1}
+
+
+def test_error_status_raises():
+    async def run():
+        async with _trame(lambda message: b"HTTP/1.1 500 Error\r\nContent-Length: 4\r\n\r\nfail") as (port, _, _):
+            client = ControlClient(port=port)
+            try:
+                await client.post({})
+            finally:
+                await client.close()
+
+    with pytest.raises(ControlError) as error:
+        asyncio.run(run())
+    assert error.value.status == 500 and "fail" in str(error.value)
+
+
+def test_timeout_is_not_retried():
+    async def run():
+        async with _trame(lambda message: None) as (port, messages, _):
+            client = ControlClient(port=port, timeout=0.2, retries=3)
+            with pytest.raises(asyncio.TimeoutError):
+                await client.post({"action": "claim"})
+            await client.close()
+            return messages
+
+    # trame might have acted on the message, so it is sent only once
+    assert asyncio.run(run()) == [{"action": "claim"}]
+
+
+def test_closed_connection_is_reestablished():
+    async def run():
+        async with _trame(lambda message: _ok(headers=b"Connection: close\r\n")) as (port, messages, connections):
+            client = ControlClient(port=port)
+            await client.post({"n": 1})
+            await client.post({"n": 2})
+            await client.close()
+            return messages, len(connections)
+
+    messages, connections = asyncio.run(run())
+    assert messages == [{"n": 1}, {"n": 2}] and connections == 2
+
+
+def test_refused_connection_is_retried(monkeypatch):
+    attempts = []
+
+    async def refuse(*args, **kwargs):
+        attempts.append(args)
+        raise ConnectionRefusedError()
+
+    monkeypatch.setattr(asyncio, "open_connection", refuse)
+    client = ControlClient(port=1, retries=2, backoff=0.01)
+    with pytest.raises(ConnectionRefusedError):
+        asyncio.run(client.post({}))
+    assert len(attempts) == 3
+
+
+def test_response_delimited_by_closing_the_connection():
+    async def run():
+        async with _trame(lambda message: b"HTTP/1.1 200 OK\r\nConnection: close\r\n\r\n{\"a\": 1}") as (port, _, _):
+            client = ControlClient(port=port)
+            try:
+                return (await client.post({}))[0], client._writer
+            finally:
+                await client.close()
+
+    assert asyncio.run(run()) == ({"a": 1}, None)
+
+
+def test_message_dropped_by_a_kept_alive_connection_is_sent_again():
+    # trame closes the connection, that it answered the first message on, when the second message arrives
+    responses = iter([_ok(), b"", _ok(b'{"n": 2}')])
+
+    async def run():
+        async with _trame(lambda message: next(responses)) as (port, messages, connections):
+            client = ControlClient(port=port)
+            await client.post({"n": 1})
+            second, _ = await client.post({"n": 2})
+            await client.close()
+            return second, messages, len(connections)
+
+    second, messages, connections = asyncio.run(run())
+    assert second == {"n": 2}
+    assert messages == [{"n": 1}, {"n": 2}, {"n": 2}] and connections == 2
+
+
+def test_new_connection_closed_without_answer_is_not_retried():
+    async def run():
+        async with _trame(lambda message: b"") as (port, messages, _):
+            client = ControlClient(port=port)
+            with pytest.raises(ConnectionError):
+                await client.post({"action": "claim"})
+            await client.close()
+            return messages
+
+    assert asyncio.run(run()) == [{"action": "claim"}]
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import re
+
+from jupyterlab_trame_manager.tracing import Trace
+
+
+def test_trame_list_is_revalidated_with_its_etag(jupyter_dirs, write_app, serving):
+    write_app("first")
+
+    async def run():
+        async with serving() as (fetch, _):
+            listed = await fetch("trame")
+            assert listed.code == 200
+            assert [app["name"] for app in json.loads(listed.body)] == ["first"]
+
+            unchanged = await fetch("trame", headers={"If-None-Match": listed.headers["Etag"]})
+            assert unchanged.code == 304 and not unchanged.body
+
+            # A new app changes the version, so the old ETag does not match anymore
+            write_app("second")
+            discovered = await fetch("trame/discover", method="POST", body="{}")
+            assert json.loads(discovered.body) == {"changed": True, "apps": ["first", "second"]}
+            changed = await fetch("trame", headers={"If-None-Match": listed.headers["Etag"]})
+            assert changed.code == 200
+            assert changed.headers["Etag"] != listed.headers["Etag"]
+
+            version = listed.headers["X-Snapshot-Version"]
+            delta = await fetch(f"trame?since={version}")
+            assert int(delta.headers["X-Snapshot-Version"]) > int(version)
+            return json.loads(delta.body)
+
+    delta = asyncio.run(run())
+    # The index of the apps follows JUPYTER_DATA_DIR, instead of the data directory of the user
+    assert (jupyter_dirs / "data" / "trame-manager" / "apps.json").exists()
+    assert not delta["reset"]
+    assert [app["name"] for app in delta["added"]] == ["second"]
+    assert delta["changed"] == [] and delta["removed"] == []
+
+
+def test_invalid_version_is_rejected(serving):
+    async def run():
+        async with serving() as (fetch, _):
+            return await fetch("trame?since=latest")
+
+    assert asyncio.run(run()).code == 400
+
+
+def test_metrics_are_rendered_in_the_text_format_of_prometheus(serving):
+    async def run():
+        async with serving() as (fetch, model):
+            documented = model.metrics.counter("test_events_total", 'Events with "quotes", \\ and\nlines', ("name",))
+            documented.labels('say "hi"\\\n').inc(2)
+            model.metrics.trame_launch_duration.labels("demo", "cold").observe(0.3)
+
+            await fetch("status")
+            return await fetch("metrics")
+
+    scraped = asyncio.run(run())
+    assert scraped.code == 200
+    assert scraped.headers["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+    lines = scraped.body.decode().splitlines()
+
+    # Label values escape backslashes, quotes and line breaks, the documentation only backslashes and line breaks
+    assert '# HELP test_events_total Events with "quotes", \\\\ and\\nlines' in lines
+    assert "# TYPE test_events_total counter" in lines
+    assert 'test_events_total{name="say \\"hi\\"\\\\\\n"} 2' in lines
+
+    # Buckets are cumulative and end with +Inf
+    assert 'trame_manager_trame_launch_seconds_bucket{app="demo",source="cold",le="0.25"} 0' in lines
+    assert 'trame_manager_trame_launch_seconds_bucket{app="demo",source="cold",le="0.5"} 1' in lines
+    assert 'trame_manager_trame_launch_seconds_bucket{app="demo",source="cold",le="+Inf"} 1' in lines
+    assert 'trame_manager_trame_launch_seconds_sum{app="demo",source="cold"} 0.3' in lines
+    assert 'trame_manager_trame_launch_seconds_count{app="demo",source="cold"} 1' in lines
+
+    # Requests to the handlers are counted by their handler, method and status, including those while starting
+    (requests,) = [line for line in lines if line.startswith(
+        'trame_manager_http_requests_total{handler="StatusHandler",method="GET",code="200"} '
+    )]
+    assert int(requests.rpartition(" ")[2]) >= 2
+
+
+def test_spans_are_sent_as_server_timing_header(write_app, serving):
+    write_app("demo")
+
+    async def run():
+        async with serving() as (fetch, model):
+            untraced = await fetch("trame")
+            model.tracer.enabled = True
+            launched = await fetch("trame", method="POST",
+                                   body=json.dumps({"appName": "demo", "name": "timed", "dataDirectory": "/tmp"}))
+            await fetch(f"trame/{json.loads(launched.body)['uuid']}/stop", method="POST", body="{}")
+            return untraced, launched
+
+    untraced, launched = asyncio.run(run())
+    assert "Server-Timing" not in untraced.headers
+
+    # Each span is a metric with its duration in milliseconds, followed by the duration of the whole request
+    metrics = [metric.strip() for metric in launched.headers["Server-Timing"].split(",")]
+    assert all(re.fullmatch(r"[\w.\-]+;dur=\d+\.\d", metric) for metric in metrics), metrics
+    names = [metric.partition(";")[0] for metric in metrics]
+    assert names[-1] == "total"
+    assert {"validate", "configuration.launch_trame", "trame.spawn"} <= set(names)
+
+
+def test_server_timing_counts_repeated_spans_and_sanitizes_names():
+    trace = Trace("TrameHandler.POST")
+    trace.add("squeue", 0.0101)
+    trace.add("squeue", 0.0202)
+    trace.add("pool claim/warm", 0.001)
+
+    squeue, claim, total = trace.server_timing().split(", ")
+    assert squeue == 'squeue;dur=30.3;desc="2 calls"'
+    assert claim == "pool_claim_warm;dur=1.0"
+    assert re.fullmatch(r"total;dur=\d+\.\d", total)
@@ -0,0 +1,32 @@
+import pytest
+
+from jupyterlab_trame_manager import hostlist
+
+
+def test_expand_ranges_and_products():
+    assert hostlist.expand("jwb[0001-0003,0010],login") == ("jwb0001", "jwb0002", "jwb0003", "jwb0010", "login")
+    assert hostlist.expand("rack[1-2]n[01-02]") == ("rack1n01", "rack1n02", "rack2n01", "rack2n02")
+    assert hostlist.expand("") == ()
+
+
+def test_first_and_count_without_expanding():
+    huge = "node[000000-999999],gpu[1-4]"
+    assert hostlist.first(huge) == "node000000"
+    assert hostlist.count(huge) == 1_000_004
+    assert hostlist.first("") is None and hostlist.count("") == 0
+
+    # Only the first host is parsed
+    assert hostlist.first("jwb0001,jwb[oops") == "jwb0001"
+
+
+@pytest.mark.parametrize("malformed", ["jwb[0001-", "jwb[3-1]", "jwb[a-b]", "a,,b", "jwb[1]]"])
+def test_malformed_hostlists_are_rejected(malformed):
+    with pytest.raises(ValueError):
+        hostlist.parse(malformed)
+
+
+def test_compress_is_the_inverse_of_expand():
+    hosts = ["jwb0001", "jwb0002", "jwb0004", "login", "jwc01n1", "jwc01n2"]
+    compressed = hostlist.compress(hosts)
+    assert compressed == "jwb[0001-0002,0004],login,jwc01n[1-2]"
+    assert hostlist.expand(compressed) == tuple(hosts)
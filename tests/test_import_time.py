@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_loading_the_extension_stays_within_budget():
+    # The benchmark exits with 1, if the budget is exceeded or dependencies are imported before their first use
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.getenv("PYTHONPATH")]))}
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, str(ROOT / "benchmarks" / "import_time.py"), "--repeat", "3"],
+        env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr + result.stdout
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+
+from jupyterlab_trame_manager import logs
+from jupyterlab_trame_manager.handlers.trame import TrameLogHandler
+
+
+def test_read_from_an_offset_with_a_limit(tmp_path):
+    log = tmp_path / "log"
+    log.write_bytes(b"0123456789")
+
+    assert logs.read(log, 0, 3, size=4) == (3, b"3456")
+    assert logs.read(log, 0, 10) == (10, b"")
+    assert (logs.start(log, 0), logs.end(log, 0)) == (0, 10)
+
+
+def test_offsets_continue_across_rotations(tmp_path):
+    log = tmp_path / "log"
+    with open(log, "ab") as writer:
+        writer.write(b"0123456789")
+        writer.flush()
+
+        assert logs.rotate(log, max_bytes=20) == 0
+        rotated = logs.rotate(log, max_bytes=5)
+        assert rotated == 10 and log.stat().st_size == 0
+
+        # Appending continues at the start of the truncated file, while the offsets continue after the rotated bytes
+        writer.write(b"abcdef")
+        writer.flush()
+
+    assert (logs.start(log, rotated), logs.end(log, rotated)) == (0, 16)
+
+    # A read stops at the end of the backup, the rest follows from the log file
+    assert logs.read(log, rotated, 8) == (8, b"89")
+    assert logs.read(log, rotated, 10) == (10, b"abcdef")
+    assert logs.read(log, rotated, 12, size=2) == (12, b"cd")
+
+    # After a second rotation, the first part is gone and reads continue at the oldest available byte
+    rotated += logs.rotate(log, max_bytes=5)
+    assert rotated == 16
+    assert logs.start(log, rotated) == 10
+    assert logs.read(log, rotated, 0) == (10, b"abcdef")
+    assert logs.read(log, rotated, 16) == (16, b"")
+
+
+def test_log_is_served_and_followed_until_the_timeout(write_app, serving, monkeypatch):
+    write_app("chatty", command="echo hello; sleep 30")
+    monkeypatch.setattr(TrameLogHandler, "follow_timeout", 1)
+    monkeypatch.setattr(TrameLogHandler, "follow_interval", 0.05)
+
+    async def run():
+        async with serving() as (fetch, model):
+            launched = await fetch("trame", method="POST",
+                                   body=json.dumps({"appName": "chatty", "name": "c", "dataDirectory": "/tmp"}))
+            uuid = json.loads(launched.body)["uuid"]
+            instance = model.get_trame(uuid)
+            while b"hello" not in instance.log_file.read_bytes():
+                await asyncio.sleep(0.05)
+
+            partial = await fetch(f"trame/{uuid}/log?offset=1&limit=3")
+            assert partial.body == b"ell"
+            assert (partial.headers["X-Log-Offset"], partial.headers["X-Log-End"]) == ("1", "6")
+
+            # Rotate the log and append to it. Offsets before the rotation start at the oldest available byte
+            instance.log_rotated += logs.rotate(instance.log_file, max_bytes=1)
+            instance.logger.write(b"world\n")
+            rotated = await fetch(f"trame/{uuid}/log?offset=0")
+            assert rotated.body == b"hello\nworld\n" and rotated.headers["X-Log-End"] == "12"
+            after = await fetch(f"trame/{uuid}/log?offset=6")
+            assert after.body == b"world\n" and after.headers["X-Log-Offset"] == "6"
+
+            start = time.monotonic()
+            followed = await fetch(f"trame/{uuid}/log?offset=6&follow=1", request_timeout=10)
+            assert followed.body == b"world\n" and 1 <= time.monotonic() - start < 5
+
+            await fetch(f"trame/{uuid}/stop", method="POST", body="{}")
+
+    asyncio.run(run())
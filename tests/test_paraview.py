@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+
+def test_outdated_list_is_served_while_the_refresh_hangs_or_fails(serving):
+    async def run():
+        async with serving() as (fetch, model):
+            configuration = model._configuration
+            refreshes = []
+
+            async def hang():
+                refreshes.append("hang")
+                await asyncio.sleep(3600)
+
+            async def fail():
+                refreshes.append("fail")
+                raise RuntimeError("squeue failed")
+
+            # Wait for the first poll, then outdate the list
+            for _ in range(100):
+                if model.servers_age != float("inf") and model._servers_refresh is None:
+                    break
+                await asyncio.sleep(0.05)
+            model._servers_updated = time.monotonic() - configuration.server_snapshot_ttl - 5
+
+            configuration.get_running_servers = hang
+            start = time.monotonic()
+            listed = await fetch("paraview")
+            assert listed.code == 200 and time.monotonic() - start < 1
+            assert int(listed.headers["Age"]) >= configuration.server_snapshot_ttl
+            await asyncio.sleep(0.1)
+            assert refreshes == ["hang"]
+
+            # The hanging refresh is joined instead of starting another one
+            assert (await fetch("paraview")).code == 200
+            await asyncio.sleep(0.1)
+            assert refreshes == ["hang"]
+
+            model._servers_refresh.cancel()
+            await asyncio.sleep(0.1)
+            configuration.get_running_servers = fail
+            assert (await fetch("paraview")).code == 200
+            await asyncio.sleep(0.1)
+            assert refreshes == ["hang", "fail"]
+            assert (await fetch("paraview")).code == 200
+
+    asyncio.run(run())
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+import signal
+from pathlib import Path
+
+import pytest
+
+from jupyterlab_trame_manager.configuration import TrameApp, TrameInstance, TrameLaunchOptions
+from jupyterlab_trame_manager.pool import WarmPool
+from jupyterlab_trame_manager.store import InstanceStore
+
+
+class _Configuration:
+    """ Launches `sleep` as trame, or fails to launch, if `failing` is set """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.failing = False
+        self.launched = 0
+
+    async def launch_trame(self, app, options, server_app, warm=False):
+        self.launched += 1
+        if self.failing:
+            raise RuntimeError("launch failed")
+
+        log_file = self.directory / f"{self.launched}.log"
+        auth_key_file = self.directory / f"{self.launched}.key"
+        auth_key_file.write_text("key")
+        logger = open(log_file, "ab", buffering=0)
+        instance = TrameInstance(
+            **options.model_dump(), port=1, log_file=log_file, logger=logger, auth_key="key",
+            auth_key_file=auth_key_file, process_handle=None, base_url=None, warm=warm,
+        )
+        instance.process_handle = await asyncio.create_subprocess_exec("sleep", "30", start_new_session=True)
+        return instance
+
+    async def wait_for_trame(self, instance):
+        return True
+
+    async def stop_trame(self, instance):
+        if instance.process_handle.returncode is None:
+            instance.process_handle.kill()
+            await instance.process_handle.wait()
+        instance.logger.close()
+
+
+@pytest.fixture
+def app(tmp_path):
+    (tmp_path / "app.yml").touch()
+    return TrameApp(name="app", path=tmp_path / "app.yml", display_name="App", command="sleep 30",
+                    working_directory=None, warm_pool=2)
+
+
+def _pool(app, configuration, claimed, store=None):
+    async def claim(worker, message):
+        claimed.append(worker)
+
+    async def save(worker):
+        await asyncio.get_running_loop().run_in_executor(None, store.save, worker)
+
+    async def forget(worker):
+        await asyncio.get_running_loop().run_in_executor(None, store.remove, worker.uuid)
+
+    return WarmPool(app, configuration, None, claim, logging.getLogger(__name__),
+                    save=save if store else None, forget=forget if store else None)
+
+
+def _options(tmp_path):
+    return TrameLaunchOptions(name="Mine", data_directory=tmp_path)
+
+
+def test_claim_skips_exited_workers(tmp_path, app):
+    configuration = _Configuration(tmp_path)
+    claimed = []
+
+    async def run():
+        pool = _pool(app, configuration, claimed)
+        pool.fill()
+        await pool._filling
+        exited, alive = pool.workers
+
+        os.kill(exited.process_handle.pid, signal.SIGKILL)
+        await exited.process_handle.wait()
+
+        worker = await pool.claim(_options(tmp_path))
+        await pool.close()
+        # The claimed worker belongs to the user, so the pool does not stop it
+        assert worker.process_handle.returncode is None
+        await configuration.stop_trame(worker)
+        return worker, exited, alive
+
+    worker, exited, alive = asyncio.run(run())
+    assert worker is alive and claimed == [alive]
+    assert worker.name == "Mine" and not worker.warm
+    assert exited.logger.closed
+
+
+def test_failing_app_backs_off_exponentially(tmp_path, app):
+    configuration = _Configuration(tmp_path)
+    configuration.failing = True
+
+    async def run():
+        pool = _pool(app, configuration, [])
+        pool.fill()
+        await pool._filling
+        first_retry = pool._retry_at
+
+        # Within the backoff, no instance is started
+        pool.fill()
+        assert configuration.launched == 1
+
+        pool._retry_at = 0
+        pool.fill()
+        await pool._filling
+        assert configuration.launched == 2
+        second_retry = pool._retry_at
+
+        # A successful start resets the backoff
+        configuration.failing = False
+        pool._retry_at = 0
+        pool.fill()
+        await pool._filling
+        failures = pool._failures
+        await pool.close()
+        return first_retry, second_retry, failures
+
+    first_retry, second_retry, failures = asyncio.run(run())
+    assert second_retry - first_retry >= WarmPool._backoff
+    assert failures == 0
+
+
+def test_workers_are_recorded_in_the_store(tmp_path, app):
+    configuration = _Configuration(tmp_path)
+    store = InstanceStore(tmp_path / "state.db")
+
+    async def run():
+        pool = _pool(app, configuration, [], store)
+        pool.fill()
+        await pool._filling
+        recorded = {record["uuid"]: record for record in store.orphans()}
+
+        # Kept running and recorded for the next server
+        await pool.close(stop=False)
+        kept = len(store.orphans())
+
+        for worker in list(pool.workers):
+            await pool.remove(worker)
+        return pool.workers, recorded, kept
+
+    workers, recorded, kept = asyncio.run(run())
+    assert len(recorded) == 2 and kept == 2
+    assert all(record["warm"] and record["app_name"] == "app" and record["running"] for record in recorded.values())
+    assert store.orphans() == []
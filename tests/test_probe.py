@@ -0,0 +1,100 @@
+import asyncio
+import socket
+
+from jupyterlab_trame_manager.configuration import ParaViewInstance
+from jupyterlab_trame_manager.probe import ServerProber
+
+
+def _server(port: int, state: str = "RUNNING") -> ParaViewInstance:
+    return ParaViewInstance(
+        job_id="1", name="Server", account="", partition="", nodes=1, time_used="0:01", time_limit="1:00:00",
+        state=state, connection_address="127.0.0.1", port=port,
+    )
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_probe_connects_to_a_listening_server():
+    async def run():
+        connections = []
+        server = await asyncio.start_server(lambda reader, writer: connections.append(writer), "127.0.0.1", 0)
+        async with server:
+            paraview = _server(server.sockets[0].getsockname()[1])
+            changed = await ServerProber().probe(paraview)
+            await asyncio.sleep(0.05)
+        return paraview, changed, len(connections)
+
+    paraview, changed, connections = asyncio.run(run())
+    assert changed and paraview.ready and paraview.latency > 0
+    assert connections == 1
+
+
+def test_refused_server_is_not_ready():
+    paraview = _server(_closed_port())
+    changed = asyncio.run(ServerProber().probe(paraview))
+    assert not changed and not paraview.ready and paraview.latency is None
+
+
+def test_probe_times_out(monkeypatch):
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(asyncio, "open_connection", hang)
+    paraview = _server(1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await ServerProber(timeout=0.1).probe(paraview)
+        return loop.time() - start
+
+    assert asyncio.run(run()) < 1
+    assert not paraview.ready
+
+
+def test_results_expire_after_the_ttl(monkeypatch):
+    prober = ServerProber(ttl=60)
+    paraview = _server(1)
+    now = 1000.0
+    monkeypatch.setattr("jupyterlab_trame_manager.probe.time.monotonic", lambda: now)
+
+    # Never probed
+    assert not prober.apply(paraview)
+
+    prober._results[prober._key(paraview)] = (now, True, 1.5)
+    fresh = _server(1)
+    assert prober.apply(fresh) and fresh.ready and fresh.latency == 1.5
+
+    now += 61
+    assert not prober.apply(fresh)
+
+    # Servers that are not ready are probed every time
+    prober._results[prober._key(paraview)] = (now, False, None)
+    assert not prober.apply(fresh)
+
+    # Servers that are not running are never probed
+    pending = _server(1, state="PENDING")
+    assert prober.apply(pending) and not pending.ready
+
+    prober.forget([])
+    assert prober._results == {}
+
+
+def test_close_cancels_probes_in_flight(monkeypatch):
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(asyncio, "open_connection", hang)
+
+    async def run():
+        prober = ServerProber(timeout=3600)
+        probe = asyncio.ensure_future(prober.probe(_server(1)))
+        await asyncio.sleep(0.05)
+        prober.close()
+        return await asyncio.wait_for(probe, 1), await prober.probe(_server(1))
+
+    assert asyncio.run(run()) == (False, False)
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+
+from jupyterlab_trame_manager.configuration import ParaViewLaunchOptions
+from jupyterlab_trame_manager.mixins.slurm import SlurmMixin
+
+
+class _Configuration(SlurmMixin):
+    def __init__(self, tmp_path):
+        self.job_script_template = tmp_path / "paraview.job.j2"
+        self.temp_dir = tmp_path / "jobs"
+        super().__init__(logging.getLogger(__name__))
+
+    def get_connection_address(self, server):
+        return f"{server.root_node}:{server.port}"
+
+    async def get_user_data(self):
+        raise NotImplementedError
+
+
+def _options(name="pv-{index}"):
+    return ParaViewLaunchOptions(name=name, account="acc", partition="batch", nodes=1, time_limit="1:00:00")
+
+
+def test_template_is_rendered_again_after_it_changed(tmp_path):
+    configuration = _Configuration(tmp_path)
+    template = configuration.job_script_template
+    template.write_text("#SBATCH --account={{ account }}\n")
+    job_path, _ = configuration.write_job_script(_options())
+    assert job_path.read_text() == "#SBATCH --account=acc"
+
+    # Editing the template within the same second must be noticed, so it gets a distinct modification time
+    template.write_text("#SBATCH --partition={{ partition }}\n")
+    stat = template.stat()
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    job_path, _ = configuration.write_job_script(_options())
+    assert job_path.read_text() == "#SBATCH --partition=batch"
+
+
+def test_batch_is_submitted_as_job_array(tmp_path, stub_command):
+    configuration = _Configuration(tmp_path)
+    configuration.job_script_template.write_text("#SBATCH --job-name={{ name }}\n#SBATCH --output={{ stdout }}\n")
+    calls = tmp_path / "sbatch.calls"
+    job_ids = tmp_path / "sbatch.ids"
+    job_ids.write_text("42\n43\n")
+    # Each call takes the next job id
+    stub_command("sbatch", f'echo "$@" >> {calls}\nid=$(head -n 1 {job_ids})\nsed -i 1d {job_ids}\n'
+                           f'echo "Submitted batch job $id"')
+
+    elements = asyncio.run(configuration.launch_paraview_batch([(_options(), 3), (_options("single-{index}"), 1)]))
+
+    assert [(element["name"], element["jobId"], element["returnCode"]) for element in elements] == [
+        ("pv-0", "42_0", 0), ("pv-1", "42_1", 0), ("pv-2", "42_2", 0), ("single-3", "43", 0),
+    ]
+
+    array_call, single_call = calls.read_text().splitlines()
+    assert array_call.startswith("--array=0-2 ") and not single_call.startswith("--array")
+
+    # The tasks of the array write separate output files, the single job has its final name
+    array_script = array_call.split()[-1]
+    array_dir = os.path.dirname(array_script)
+    assert open(array_script).read() == f"#SBATCH --job-name=pv-{{index}}\n#SBATCH --output={array_dir}/stdout.%a"
+    single_script = single_call.split()[-1]
+    single_dir = os.path.dirname(single_script)
+    assert open(single_script).read() == f"#SBATCH --job-name=single-3\n#SBATCH --output={single_dir}/stdout"
+
+
+def test_failed_submission_has_no_job_ids(tmp_path, stub_command):
+    configuration = _Configuration(tmp_path)
+    configuration.job_script_template.write_text("#SBATCH --job-name={{ name }}\n")
+    stub_command("sbatch", 'echo "sbatch: error: invalid account" >&2\nexit 1')
+
+    elements = asyncio.run(configuration.launch_paraview_batch([(_options(), 2)]))
+
+    assert [(element["name"], element["jobId"]) for element in elements] == [("pv-0", None), ("pv-1", None)]
+    assert all(element["returnCode"] == 1 and "invalid account" in element["message"] for element in elements)
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import os
+import pwd
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from jupyterlab_trame_manager.configuration import ParaViewLaunchOptions
+from jupyterlab_trame_manager.slurm_backends import SlurmRestBackend
+
+web = pytest.importorskip("aiohttp.web")
+
+
+USER = pwd.getpwuid(os.getuid()).pw_name
+
+
+def _job(job_id, state, **fields):
+    return {
+        "job_id": job_id, "name": "ParaView", "account": "acc", "partition": "batch", "user": USER,
+        "state": {"current": [state]}, "allocation_nodes": 1, "nodes": "node1",
+        "time": {"start": 0, "limit": {"set": True, "infinite": False, "number": 60}},
+        "array": {"job_id": 0, "task_id": {"set": False}}, "stdout_expanded": f"/jobs/{job_id}/stdout",
+        **fields,
+    }
+
+
+@asynccontextmanager
+async def _slurmrestd(jobs: list[dict]):
+    # Answers like slurmdbd, which filters by user and state, accepts submissions and records the requests, or
+    # the bodies of submissions
+    requests = []
+
+    async def list_jobs(request):
+        requests.append(request)
+        users = request.query.get("users", "").split(",")
+        states = request.query.get("state", "").upper().split(",")
+        return web.json_response({"jobs": [
+            job for job in jobs if job["user"] in users and job["state"]["current"][0] in states
+        ], "errors": []})
+
+    async def submit(request):
+        requests.append(await request.json())
+        return web.json_response({"job_id": 7, "errors": []})
+
+    app = web.Application()
+    app.router.add_get("/slurmdb/v0.0.40/jobs", list_jobs)
+    app.router.add_post("/slurm/v0.0.40/job/submit", submit)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    configuration = SimpleNamespace(
+        log=logging.getLogger(__name__), slurm_timeout=5, slurmrestd_url=f"http://127.0.0.1:{port}/",
+        slurmrestd_api_version="v0.0.40", slurmrestd_token_lifespan=60,
+    )
+    backend = SlurmRestBackend(configuration)
+    try:
+        yield backend, requests
+    finally:
+        await backend.close()
+        await runner.cleanup()
+
+
+def test_lists_the_queued_jobs_of_the_user_filtered_by_slurmdbd(monkeypatch):
+    monkeypatch.setenv("SLURM_JWT", "token")
+    jobs = [
+        _job(1, "RUNNING"),
+        _job(2, "PENDING", array={"job_id": 2, "task_id": {"set": False}, "task": "0-3"}),
+        _job(3, "COMPLETED"),
+        _job(4, "RUNNING", user="somebody-else"),
+    ]
+
+    async def run():
+        async with _slurmrestd(jobs) as (backend, requests):
+            return await backend.get_jobs(), requests
+
+    listed, requests = asyncio.run(run())
+    assert [job["job_id"] for job in listed] == ["1", "2_[0-3]"]
+    assert listed[0]["time_limit"] == "1:00:00" and listed[0]["std_out"] == "/jobs/1/stdout"
+    assert listed[1]["node_list"] == ""
+
+    # The filters are sent to slurmrestd instead of being applied to the jobs of all users
+    (request,) = requests
+    assert request.query["users"] == USER
+    assert set(request.query["state"].split(",")) == {"pending", "running", "suspended", "completing", "configuring"}
+    assert request.headers["X-SLURM-USER-NAME"] == USER
+    assert request.headers["X-SLURM-USER-TOKEN"] == "token"
+
+
+def test_submits_the_job_script_with_the_options_of_the_job(tmp_path, monkeypatch):
+    monkeypatch.setenv("SLURM_JWT", "token")
+    job_path = tmp_path / "paraview.job"
+    job_path.write_text("#!/bin/bash\nsrun pvserver\n")
+    options = ParaViewLaunchOptions(name="pv", account="acc", partition="batch", nodes=2, time_limit="1:30:00")
+
+    async def run():
+        async with _slurmrestd([]) as (backend, requests):
+            return await backend.submit(job_path, tmp_path, options, array="0-3"), requests
+
+    (return_code, message), (body,) = asyncio.run(run())
+    assert (return_code, message) == (0, "Submitted batch job 7")
+    assert body["script"] == "#!/bin/bash\nsrun pvserver\n"
+    job = body["job"]
+    assert (job["name"], job["account"], job["minimum_nodes"], job["array"]) == ("pv", "acc", 2, "0-3")
+    assert job["time_limit"]["number"] == 90 and job["standard_output"] == str(tmp_path / "stdout.%a")
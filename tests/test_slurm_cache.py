@@ -0,0 +1,91 @@
+import asyncio
+import getpass
+import logging
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from jupyterlab_trame_manager import slurm_cache
+from jupyterlab_trame_manager.slurm_cache import SlurmCache
+
+
+pytestmark = pytest.mark.skipif(sys.platform != "linux", reason="The cache identifies users via SO_PEERCRED")
+
+
+USER = getpass.getuser()
+
+
+@asynccontextmanager
+async def _serving(cache: SlurmCache):
+    # Serve like SlurmCache.serve, but the tests refresh the queries themselves
+    server = await asyncio.start_unix_server(cache._handle, cache.socket_path)
+    async with server:
+        yield
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch, stub_command):
+    stub_command("squeue", f'echo "{USER};1;ParaView;acc;batch;1;0:10;1:00:00;RUNNING;node1;/out"\n'
+                           'echo "somebody-else;2;Other;acc;batch;1;0:10;1:00:00;RUNNING;node2;/out"')
+    stub_command("sacctmgr", f'echo "{USER}|acc|batch"\necho "somebody-else|other|batch"')
+
+    path = tmp_path / "slurm.sock"
+    monkeypatch.setenv("TRAME_MANAGER_SLURM_CACHE", str(path))
+    return SlurmCache(str(path), interval=60, associations_interval=60, log=logging.getLogger(__name__))
+
+
+def test_serves_only_the_slice_of_the_connecting_user(cache):
+    async def run():
+        async with _serving(cache):
+            await cache.queries["squeue"].refresh()
+            await cache.queries["associations"].refresh()
+            return await slurm_cache.query("squeue"), await slurm_cache.query("associations")
+
+    jobs, associations = asyncio.run(run())
+    assert jobs == "1;ParaView;acc;batch;1;0:10;1:00:00;RUNNING;node1;/out\n"
+    assert associations == "acc|batch\n"
+
+
+def test_answers_right_away_before_the_first_query(cache):
+    async def run():
+        async with _serving(cache):
+            start = time.monotonic()
+            return await slurm_cache.query("squeue"), time.monotonic() - start
+
+    output, duration = asyncio.run(run())
+    assert output is None
+    assert duration < slurm_cache.QUERY_TIMEOUT / 2
+
+
+def test_failed_refresh_is_not_served(cache, stub_command):
+    stub_command("squeue", 'echo "slurm_load_jobs error" >&2\nexit 1')
+
+    async def run():
+        async with _serving(cache):
+            await cache.queries["squeue"].refresh()
+            return await slurm_cache.query("squeue")
+
+    assert asyncio.run(run()) is None
+
+
+def test_stale_output_is_not_served(cache):
+    async def run():
+        async with _serving(cache):
+            query = cache.queries["squeue"]
+            await query.refresh()
+            fresh = await slurm_cache.query("squeue")
+
+            # The later refreshes failed for longer than the allowed number of intervals
+            query.updated -= (slurm_cache.STALE_INTERVALS + 1) * query.interval
+            return fresh, await slurm_cache.query("squeue")
+
+    fresh, stale = asyncio.run(run())
+    assert fresh is not None
+    assert stale is None
+
+
+def test_unreachable_cache_falls_back(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRAME_MANAGER_SLURM_CACHE", str(tmp_path / "missing.sock"))
+    assert asyncio.run(slurm_cache.query("squeue")) is None
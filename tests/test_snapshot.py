@@ -0,0 +1,78 @@
+import json
+
+from jupyterlab_trame_manager.snapshot import Snapshot
+
+
+class _Items:
+    def __init__(self, **items):
+        self.items = items
+
+    def build(self):
+        return {key: {"key": key, "value": value} for key, value in self.items.items()}
+
+
+def test_version_only_changes_with_the_items():
+    items = _Items(a=1)
+    snapshot = Snapshot("test", items.build)
+    etag = snapshot.etag
+    assert json.loads(snapshot.body()) == [{"key": "a", "value": 1}]
+
+    # Invalidating without a change keeps the version and thereby the ETag
+    snapshot.invalidate()
+    assert snapshot.etag == etag and snapshot.version == 1
+
+    items.items["a"] = 2
+    snapshot.invalidate()
+    assert snapshot.etag != etag and snapshot.version == 2
+
+
+def test_delta_since_a_known_version():
+    items = _Items(a=1, b=1)
+    snapshot = Snapshot("test", items.build)
+    snapshot.body()
+    version = snapshot.version
+
+    items.items = {"a": 2, "c": 1}
+    snapshot.invalidate()
+    delta = json.loads(snapshot.delta(version))
+    assert delta["version"] == version + 1 and not delta["reset"]
+    assert delta["added"] == [{"key": "c", "value": 1}]
+    assert delta["changed"] == [{"key": "a", "value": 2}]
+    assert delta["removed"] == ["b"]
+
+    # The client is up to date
+    delta = json.loads(snapshot.delta(snapshot.version))
+    assert (delta["added"], delta["changed"], delta["removed"]) == ([], [], [])
+
+
+def test_item_added_and_removed_in_between_is_not_reported():
+    items = _Items(a=1)
+    snapshot = Snapshot("test", items.build)
+    snapshot.body()
+    version = snapshot.version
+
+    for change in ({"a": 1, "b": 1}, {"a": 1}):
+        items.items = change
+        snapshot.invalidate()
+        snapshot.body()
+
+    delta = json.loads(snapshot.delta(version))
+    assert (delta["added"], delta["changed"], delta["removed"]) == ([], [], [])
+
+
+def test_delta_outside_the_history_resets():
+    items = _Items(a=0)
+    snapshot = Snapshot("test", items.build, history=2)
+    for value in range(1, 5):
+        items.items["a"] = value
+        snapshot.invalidate()
+        snapshot.body()
+
+    for since in (1, snapshot.version + 1):
+        delta = json.loads(snapshot.delta(since))
+        assert delta["reset"] and delta["added"] == [{"key": "a", "value": 4}]
+
+    # Only deltas of versions within the history are cached, whatever versions clients ask for
+    for since in range(-100, 100):
+        snapshot.delta(since)
+    assert set(snapshot._deltas) <= set(range(snapshot.version - 2, snapshot.version + 1))
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import subprocess
+from contextlib import closing
+from types import SimpleNamespace
+
+from jupyterlab_trame_manager.store import InstanceStore, process_start_time
+
+
+def _instance(tmp_path, warm):
+    return SimpleNamespace(
+        uuid="abc", app_name="app", name="App (warm)", data_directory=tmp_path, process_handle=SimpleNamespace(pid=1),
+        port=1234, unix_socket=None, log_file=tmp_path / "log", auth_key_file=tmp_path / "key", connection=None,
+        warm=warm,
+    )
+
+
+def test_warm_instances_are_recorded(tmp_path):
+    store = InstanceStore(tmp_path / "state.db")
+    store.save(_instance(tmp_path, warm=True))
+    (record,) = store.orphans()
+    assert record["warm"] is True
+
+    # Claiming turns the record into one of a regular instance
+    store.save(_instance(tmp_path, warm=False))
+    (record,) = store.orphans()
+    assert record["warm"] is False
+
+
+
+def _orphan(jupyter_dirs, process, start_time=None):
+    """ Record a trame instance of the demo app, whose server is gone, in the state file of the desktop Configuration """
+    (jupyter_dirs / "key").write_text("secret")
+    (jupyter_dirs / "log").write_text("")
+    instance = _instance(jupyter_dirs, warm=False)
+    instance.app_name, instance.name = "demo", "orphan"
+    instance.process_handle = SimpleNamespace(pid=process.pid, start_time=start_time)
+
+    store = InstanceStore(jupyter_dirs / "runtime" / "trame-manager.sqlite")
+    store.save(instance)
+    with closing(store._connect()) as connection, connection:
+        connection.execute("UPDATE instances SET server_pid = 0")
+    return store
+
+
+def test_running_instance_is_adopted(write_app, serving, jupyter_dirs):
+    write_app("demo")
+    process = subprocess.Popen(["sleep", "30"], start_new_session=True)
+    try:
+        store = _orphan(jupyter_dirs, process)
+
+        async def run():
+            async with serving() as (fetch, model):
+                instance = model.get_trame("abc")
+                assert instance.process_handle.pid == process.pid and instance.process_handle.running
+                assert model.find_trame("demo", "orphan") is instance
+
+        asyncio.run(run())
+
+        # The new server owns the record now
+        (record,) = store.orphans()
+        assert record["server_pid"] == os.getpid()
+    finally:
+        process.kill()
+        process.wait()
+
+
+def test_instance_with_a_reused_pid_is_discarded(write_app, serving, jupyter_dirs):
+    write_app("demo")
+    process = subprocess.Popen(["sleep", "30"], start_new_session=True)
+    try:
+        # The PID belongs to a process started at another time
+        store = _orphan(jupyter_dirs, process, start_time=process_start_time(process.pid) + 1)
+
+        async def run():
+            async with serving() as (fetch, model):
+                assert model._instances == {}
+
+        asyncio.run(run())
+
+        assert store.orphans() == []
+        assert not (jupyter_dirs / "key").exists() and not (jupyter_dirs / "log").exists()
+        # The unrelated process, that reuses the PID, is left alone
+        assert process.poll() is None
+    finally:
+        process.kill()
+        process.wait()
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from tempfile import mkdtemp
+
+import pytest
+
+from jupyterlab_trame_manager.configuration import Configuration
+from jupyterlab_trame_manager.configurations.desktop import DesktopConfiguration
+
+
+def _launch(fetch, name: str, app: str = "demo"):
+    return fetch("trame", method="POST", body=json.dumps({"appName": app, "name": name, "dataDirectory": "/tmp"}))
+
+
+def test_concurrent_launches_with_the_same_name(write_app, serving):
+    write_app("demo")
+
+    async def run():
+        async with serving() as (fetch, model):
+            responses = await asyncio.gather(_launch(fetch, "twin"), _launch(fetch, "twin"))
+            assert sorted(response.code for response in responses) == [200, 400]
+            assert list(model._instance_names) == [("demo", "twin")]
+
+            # The instance is stopped, although a second launch was attempted with its name
+            (instance,) = model._instances.values()
+            stopped = await fetch(f"trame/{instance.uuid}/stop", method="POST", body="{}")
+            assert stopped.code == 200
+            assert model._instances == {} and model._instance_names == {}
+            return instance.process_handle
+
+    process = asyncio.run(run())
+    assert process.returncode is not None
+
+
+def test_name_is_released_after_a_failed_launch(jupyter_dirs, write_app, serving):
+    app = write_app("demo")
+    working_directory = jupyter_dirs / "work"
+    working_directory.mkdir()
+    (app / "app.yml").write_text(f"name: Demo\ncommand: sleep 30\nworking_directory: {working_directory}\n")
+
+    async def run():
+        async with serving() as (fetch, model):
+            # Spawning fails without the working directory
+            shutil.rmtree(working_directory)
+            assert (await _launch(fetch, "retry")).code == 400
+            assert model._launching == set()
+
+            working_directory.mkdir()
+            launched = await _launch(fetch, "retry")
+            assert launched.code == 200
+            await fetch(f"trame/{json.loads(launched.body)['uuid']}/stop", method="POST", body="{}")
+
+    asyncio.run(run())
+
+
+def test_failed_launch_leaves_nothing_behind(jupyter_dirs, write_app, serving, monkeypatch):
+    app = write_app("demo")
+    working_directory = jupyter_dirs / "work"
+    working_directory.mkdir()
+    (app / "app.yml").write_text(f"name: Demo\ncommand: sleep 30\nworking_directory: {working_directory}\n")
+
+    async def run():
+        async with serving() as (fetch, model):
+            configuration = model._configuration
+            shutil.rmtree(working_directory)
+            generated = []
+            generate = configuration.generate_trame_parameters
+            monkeypatch.setattr(configuration, "generate_trame_parameters", lambda app: generated.append(generate(app))
+                                or generated[-1])
+
+            # Spawning fails without the working directory
+            assert (await _launch(fetch, "spawn")).code == 400
+            (parameters,) = generated
+            assert parameters["logger"].closed
+            assert not os.path.exists(parameters["log_file"]) and not os.path.exists(parameters["auth_key_file"])
+            assert configuration._trame_routes == {}
+
+            # Storing the launched instance is cancelled
+            working_directory.mkdir()
+            spawned = []
+            launch = configuration.launch_trame
+
+            async def spy(*args, **kwargs):
+                spawned.append(await launch(*args, **kwargs))
+                return spawned[-1]
+
+            async def cancel(instance):
+                raise asyncio.CancelledError()
+
+            monkeypatch.setattr(configuration, "launch_trame", spy)
+            monkeypatch.setattr(model, "_save_trame", cancel)
+            with pytest.raises(asyncio.CancelledError):
+                await model.launch_trame("demo", {"name": "save", "dataDirectory": "/tmp"})
+
+            (instance,) = spawned
+            assert instance.process_handle.returncode is not None and instance.logger.closed
+            assert model._instances == {} and model._instance_names == {} and model._launching == set()
+            assert configuration._trame_routes == {}
+
+    asyncio.run(run())
+
+
+def _alive(pid: int) -> bool:
+    # Orphans might not be reaped in containers, so zombies count as exited
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rpartition(")")[2].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_exited_instance_is_shown_and_removed(write_app, serving, monkeypatch):
+    write_app("demo", command="exit 3")
+    monkeypatch.setattr(Configuration, "trame_exited_retention", 0.5)
+
+    async def run():
+        async with serving() as (fetch, model):
+            launched = await _launch(fetch, "short")
+            instance = model.get_trame(json.loads(launched.body)["uuid"])
+            for _ in range(100):
+                if instance.state == "exited":
+                    break
+                await asyncio.sleep(0.02)
+            assert instance.exit_code == 3 and model.find_trame("demo", "short") is instance
+
+            for _ in range(100):
+                if instance.uuid not in model._instances:
+                    break
+                await asyncio.sleep(0.02)
+            assert model._instances == {} and model._instance_names == {}
+            assert instance.logger.closed
+            assert not instance.log_file.exists() and not instance.auth_key_file.exists()
+
+    asyncio.run(run())
+
+
+def test_stopping_kills_the_process_group(jupyter_dirs, write_app, serving):
+    child_pid = jupyter_dirs / "child.pid"
+    write_app("demo", command=f"'sleep 30 & echo $! > {child_pid}; wait'")
+
+    async def run():
+        async with serving() as (fetch, model):
+            launched = await _launch(fetch, "family")
+            uuid = json.loads(launched.body)["uuid"]
+            for _ in range(100):
+                if child_pid.exists() and child_pid.read_text().strip():
+                    break
+                await asyncio.sleep(0.02)
+            child = int(child_pid.read_text())
+            assert _alive(child)
+
+            assert (await fetch(f"trame/{uuid}/stop", method="POST", body="{}")).code == 200
+            return child
+
+    child = asyncio.run(run())
+    for _ in range(100):
+        if not _alive(child):
+            break
+        time.sleep(0.02)
+    assert not _alive(child)
+
+
+def test_instance_args_survive_evaluation_by_the_shell(jupyter_dirs, write_app, serving):
+    app = write_app("demo", command='eval "exec sh args.sh $TRAME_INSTANCE_ARGS"', transport="unix")
+    (app / "args.sh").write_text("printf '%s\\n' \"$@\" > args\nexec sleep 30\n")
+    data_directory = jupyter_dirs / "it's $HOME"
+    data_directory.mkdir()
+
+    async def run():
+        async with serving() as (fetch, model):
+            launched = await fetch("trame", method="POST", body=json.dumps(
+                {"appName": "demo", "name": "quoted", "dataDirectory": str(data_directory)}
+            ))
+            instance = model.get_trame(json.loads(launched.body)["uuid"])
+            for _ in range(100):
+                if (app / "args").exists() and (app / "args").read_text().endswith("--server\n"):
+                    break
+                await asyncio.sleep(0.02)
+
+            assert (app / "args").read_text().splitlines() == [
+                f"--unix-socket={instance.unix_socket}", f"--data={data_directory}",
+                f"--authKeyFile={instance.auth_key_file}", "--server",
+            ]
+
+            # The private directory of the socket is removed, even if trame left files in it
+            (instance.unix_socket.parent / "leftover").write_text("")
+            await fetch(f"trame/{instance.uuid}/stop", method="POST", body="{}")
+            assert not instance.unix_socket.parent.exists()
+
+    asyncio.run(run())
+
+
+def test_discarded_instance_leaves_no_files(tmp_path):
+    configuration = DesktopConfiguration(logging.getLogger(__name__))
+    unix_socket = Path(mkdtemp(prefix="trame-"), "trame.sock")
+    unix_socket.write_text("")
+    log_file, auth_key_file = tmp_path / "log", tmp_path / "key"
+    log_file.write_text("")
+    auth_key_file.write_text("")
+
+    configuration.discard_trame({
+        "running": False, "pid": 0, "log_file": str(log_file), "auth_key_file": str(auth_key_file),
+        "unix_socket": str(unix_socket),
+    })
+    assert not unix_socket.parent.exists() and not log_file.exists() and not auth_key_file.exists()